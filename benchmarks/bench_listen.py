@@ -0,0 +1,112 @@
+"""Listening benchmark: replays WAV files through capture, VAD and recognition.
+
+Run from the repository root (no microphone needed):
+
+    python -m benchmarks.bench_listen [WAV_DIR] [--speed 1.0] [--recognizer stub] [--stub-latency 0.3]
+
+Without WAV_DIR a few synthetic utterances are generated. Reports the time from
+the end of speech (as seen by the VAD) to the transcript callback, and the CPU
+time spent per second of audio.
+"""
+import argparse
+import collections
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from core.audio_capture import WavFileSource
+from core.speech_recognizers import StubRecognizer
+from core.voice_engine import VoiceEngine
+from core.wake_word import write_wav
+from utils.config import Config
+
+
+def synthesize(directory: str, count: int, sample_rate: int) -> None:
+    """Write voiced-sounding tone bursts (a stand-in for speech) as WAV files."""
+    rng = np.random.default_rng(1)
+    for i in range(count):
+        duration = rng.uniform(0.8, 2.5)
+        t = np.arange(int(duration * sample_rate)) / float(sample_rate)
+        pitch = 120 + 60 * np.sin(2 * np.pi * 3 * t)
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+        # Syllable-rate amplitude modulation
+        envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+        audio = 4000 * voice * envelope + rng.normal(0, 20, len(t))
+        write_wav(os.path.join(directory, f"utterance_{i:03d}.wav"), audio.astype(np.int16), sample_rate)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav_dir", nargs="?", help="directory of 16-bit WAV files (one utterance each)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 = as fast as possible")
+    parser.add_argument("--recognizer", default="stub", help="stub, google or whisper")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="simulated stub round trip (s)")
+    parser.add_argument("--synthetic", type=int, default=10, help="utterances to generate without WAV_DIR")
+    args = parser.parse_args()
+
+    sample_rate = Config.CAPTURE_SAMPLE_RATE
+    temp_dir = None
+    wav_dir = args.wav_dir
+    if not wav_dir:
+        temp_dir = tempfile.TemporaryDirectory()
+        wav_dir = temp_dir.name
+        synthesize(wav_dir, args.synthetic, sample_rate)
+
+    source = WavFileSource(wav_dir, sample_rate=sample_rate, block_ms=Config.CAPTURE_BLOCK_MS,
+                           buffer_seconds=Config.CAPTURE_BUFFER_SECONDS, speed=args.speed)
+    # Other backends are built by the engine from the config, like in the app
+    recognizer = StubRecognizer(latency=args.stub_latency) if args.recognizer == "stub" else None
+    Config.SPEECH_RECOGNIZER = args.recognizer
+
+    engine = VoiceEngine(audio_source=source, speech_recognizer=recognizer)
+    engine.wake_word = None  # Measure the listening path itself
+    engine.listen_latencies = collections.deque()
+    engine.turn_detector.profile_path = None  # Replayed pauses must not train the user's profile
+    transcripts = []
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    listener = threading.Thread(target=engine.listen, args=(lambda text, trace: transcripts.append(text),),
+                                daemon=True)
+    listener.start()
+    source.finished.wait()
+    # Let the last utterance close and its transcript arrive
+    deadline = time.monotonic() + 10.0
+    while time.monotonic() < deadline and (engine.vad is None or engine.vad.in_utterance()
+                                            or not engine.audio_queue.empty()
+                                            or (engine.recognition_pool and engine.recognition_pool.depth())):
+        time.sleep(0.05)
+    time.sleep(0.2)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    engine.stop_listening()
+    listener.join(timeout=2.0)
+
+    latencies = list(engine.listen_latencies)
+    print(f"Replayed {len(source.paths)} files, {source.audio_seconds:.1f}s of audio "
+          f"in {wall:.1f}s (speed {args.speed or 'max'})")
+    print(f"Transcripts: {engine.turn_detector.fragments} in {len(transcripts)} turns   "
+          f"recognizer: {engine.speech_recognizer.name}")
+    if latencies:
+        hangover = Config.VAD_HANGOVER_MS / (args.speed or float("inf"))
+        print(f"End of speech -> callback (includes the {hangover:.0f} ms wall-clock hangover):")
+        for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            print(f"  {label}: {percentile(latencies, fraction) * 1000:8.1f} ms")
+    print(f"CPU per audio second: {cpu / max(source.audio_seconds, 1e-9) * 1000:.1f} ms "
+          f"({cpu:.2f}s CPU total)")
+    stats = engine.get_recognizer_stats()
+    print(f"Max recognition queue depth: {stats.get('max_queue_depth')}")
+
+    if temp_dir:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Micro-benchmark: single-pass TextNormalizer vs. the previous multi-pass cleanup.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_text_normalizer [--sentences 40] [--repeat 200]
+"""
+import argparse
+import re
+import timeit
+
+from core.text_normalizer import (TECH_TERMS, create_pronunciation_normalizer,
+                                  create_response_cleaner, create_speech_cleaner)
+
+SAMPLE = ("As an AI assistant, I can explain that the API returns JSON over HTTP, e.g. 95% of calls "
+          "finish in 20ms. **Important:** the GPU and CPU share RAM... See https://example.com/docs "
+          "for details, however the ML pipeline (NLP, CV) runs in a VM on the OS. It is 1920x1080 "
+          "with 4+ cores. You are set!Is it fast?Yes. I am sure the `SDK` and _CLI_ work.\n"
+          "- first point\n- second point\n1. numbered step\n")
+
+
+def legacy_preprocess(text: str) -> str:
+    """VoiceEngine._preprocess_text_for_speech before the single-pass rewrite."""
+    for old, new in (("AI", "A.I."), ("API", "A.P.I."), ("UI", "U.I."), ("JSON", "Jason"),
+                     ("vs.", "versus"), ("etc.", "etcetera"), ("i.e.", "that is"), ("e.g.", "for example")):
+        text = text.replace(old, new)
+    text = re.sub(r'(\d+)%', r'\1 percent', text)
+    text = re.sub(r'(\d+)\+', r'\1 plus', text)
+    text = re.sub(r'(\d+)x(\d+)', r'\1 by \2', text)
+    for term, spoken in TECH_TERMS.items():
+        if term[-1] != '.' and term not in ("AI", "UI", "JSON"):
+            text = re.sub(r'\b' + term + r'\b', spoken, text)
+    text = re.sub(r'(\w+)\s+(however|therefore|moreover|furthermore|nevertheless|consequently)', r'\1, \2', text)
+    text = re.sub(r'([.!?;:])\s*([A-Za-z])', r'\1 \2', text)
+    return text
+
+
+def legacy_clean(text: str) -> str:
+    """VoiceEngine._clean_text_for_speech before the single-pass rewrite."""
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'\_(.+?)\_', r'\1', text)
+    text = re.sub(r'\`(.+?)\`', r'\1', text)
+    text = re.sub(r'\~\~(.+?)\~\~', r'\1', text)
+    text = re.sub(r'```[a-zA-Z]*\n(.*?)\n```', r'code example', text, flags=re.DOTALL)
+    text = re.sub(r'https?://[^\s]+', 'a link', text)
+    text = re.sub(r'\.\.\.+', ', ', text)
+    text = re.sub(r'\.([A-Z])', r'. \1', text)
+    text = re.sub(r'\!([A-Z])', r'! \1', text)
+    text = re.sub(r'\?([A-Z])', r'? \1', text)
+    text = re.sub(r'\s*\.\s*', '. ', text)
+    text = re.sub(r'\s*\!\s*', '! ', text)
+    text = re.sub(r'\s*\?\s*', '? ', text)
+    text = re.sub(r'\s*\,\s*', ', ', text)
+    return text.strip()
+
+
+def legacy_natural(text: str) -> str:
+    """ConversationManager._make_response_natural before the single-pass rewrite."""
+    for old in ("I apologize, but ", "I'm sorry, but ", "Is there anything else you would like to know?",
+                "Is there anything else I can help you with?", "Is there anything else you'd like to know?",
+                "Is there anything else you need?", "Let me know if you need anything else."):
+        text = text.replace(old, "")
+    for old, new in (("As an AI, I ", "I "), ("As an AI assistant, I ", "I "), ("I'm an AI assistant", "I'm Jarvis"),
+                     ("I am ", "I'm "), ("You are ", "You're "), ("It is ", "It's "), ("That is ", "That's "),
+                     ("cannot", "can't"), ("Cannot", "Can't")):
+        text = text.replace(old, new)
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'\_(.+?)\_', r'\1', text)
+    text = re.sub(r'\`(.+?)\`', r'\1', text)
+    text = re.sub(r'\~\~(.+?)\~\~', r'\1', text)
+    text = re.sub(r'```[\s\S]*?```', 'code example', text)
+    text = re.sub(r'^\s*[\-\*\+]\s+', 'Here is a point: ', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', 'Point number: ', text, flags=re.MULTILINE)
+    text = re.sub(r'https?://[^\s]+', 'a link', text)
+    text = re.sub(r'\.([A-Z])', r'. \1', text)
+    text = re.sub(r'\!([A-Z])', r'! \1', text)
+    text = re.sub(r'\?([A-Z])', r'? \1', text)
+    text = re.sub(r'[#\~\^\{\}\[\]\|\<\>]', ' ', text)
+    text = re.sub(r'&', ' and ', text)
+    text = re.sub(r'\(', ' ', text)
+    text = re.sub(r'\)', ' ', text)
+    text = re.sub(r'/', ' or ', text)
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.replace("  ", " ").strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=40, help="copies of the sample paragraph")
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per measurement")
+    args = parser.parse_args()
+
+    text = SAMPLE * args.sentences
+    pairs = [
+        ("pronunciation", legacy_preprocess, create_pronunciation_normalizer()),
+        ("speech cleanup", legacy_clean, create_speech_cleaner()),
+        ("response cleanup", legacy_natural, create_response_cleaner()),
+    ]
+
+    print(f"Input: {len(text)} characters, {args.repeat} iterations")
+    print(f"{'stage':<18}{'legacy ms':>12}{'single-pass ms':>16}{'speedup':>10}")
+    legacy_total = new_total = 0.0
+    for name, legacy, normalizer in pairs:
+        legacy_time = min(timeit.repeat(lambda: legacy(text), number=args.repeat, repeat=3)) / args.repeat
+        new_time = min(timeit.repeat(lambda: normalizer.normalize(text), number=args.repeat, repeat=3)) / args.repeat
+        legacy_total += legacy_time
+        new_total += new_time
+        _print_row(name, legacy_time, new_time)
+    _print_row("total", legacy_total, new_total)
+
+
+def _print_row(name: str, legacy_time: float, new_time: float) -> None:
+    print(f"{name:<18}{legacy_time * 1000:>12.3f}{new_time * 1000:>16.3f}{legacy_time / new_time:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import os
+import threading
+import time
+import wave
+from typing import List, Optional, Union
+
+import numpy as np
+
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+
+class AudioRingBuffer:
+    """Preallocated int16 ring buffer with zero-copy views.
+
+    Every sample is written twice, at i and i + capacity, so any window of up
+    to capacity samples is one contiguous slice and can be handed out as a
+    NumPy view. Positions are absolute sample counts since the capture started.
+    """
+
+    def __init__(self, capacity: int, sample_rate: int):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self._buffer = np.zeros(2 * capacity, dtype=np.int16)
+        self._total = 0
+        self._last_write_time = time.monotonic()
+        # Wall-clock seconds per second of audio (below 1 when replaying faster than real time)
+        self.time_scale = 1.0
+        self._cond = threading.Condition()
+
+    @property
+    def total(self) -> int:
+        """Number of samples written so far."""
+        return self._total
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples (called from the audio callback thread)."""
+        count = len(samples)
+        skipped = 0
+        if count > self.capacity:
+            # Only the newest capacity samples can be kept
+            skipped = count - self.capacity
+            samples = samples[skipped:]
+            count = self.capacity
+        start = (self._total + skipped) % self.capacity
+        first = min(count, self.capacity - start)
+        rest = count - first
+        buf, cap = self._buffer, self.capacity
+        buf[start:start + first] = samples[:first]
+        buf[start + cap:start + cap + first] = samples[:first]
+        if rest:
+            buf[:rest] = samples[first:]
+            buf[cap:cap + rest] = samples[first:]
+        with self._cond:
+            self._total += skipped + count
+            self._last_write_time = time.monotonic()
+            self._cond.notify_all()
+
+    def view(self, position: int, count: int) -> np.ndarray:
+        """Read-only view of count samples starting at an absolute position."""
+        oldest = self._total - self.capacity
+        if position < oldest or position + count > self._total or count > self.capacity:
+            raise IndexError(f"Samples {position}..{position + count} are not in the buffer")
+        offset = position % self.capacity
+        window = self._buffer[offset:offset + count]
+        window.flags.writeable = False
+        return window
+
+    def latest(self, count: int) -> np.ndarray:
+        """View of the most recent samples."""
+        count = min(count, self._total, self.capacity)
+        return self.view(self._total - count, count)
+
+    def time_of(self, position: int) -> float:
+        """Approximate time.monotonic() at which a sample was captured."""
+        return self._last_write_time - self.time_scale * (self._total - position) / float(self.sample_rate)
+
+    def wait_for(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Block until the buffer holds samples up to position."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._total >= position, timeout)
+
+
+class CaptureReader:
+    """Independent cursor into the capture ring buffer."""
+
+    def __init__(self, ring: AudioRingBuffer, position: int):
+        self.ring = ring
+        self.position = position
+        self.overruns = 0
+
+    def read(self, max_samples: int, multiple: int = 1, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Return a view of new samples (a whole number of multiples), or None on timeout."""
+        if not self.ring.wait_for(self.position + multiple, timeout):
+            return None
+        total = self.ring.total
+        if total - self.position > self.ring.capacity:
+            # Fell behind by more than the buffer holds - skip to the oldest audio left
+            self.overruns += 1
+            self.position = total - self.ring.capacity + multiple
+        count = min(total - self.position, max_samples)
+        count -= count % multiple
+        samples = self.ring.view(self.position, count)
+        self.position += count
+        return samples
+
+    def time(self) -> float:
+        """Capture time of the reader's current position."""
+        return self.ring.time_of(self.position)
+
+
+class SpectrumAnalyzer:
+    """Compact log-spaced magnitude spectrum of the latest audio, for visualizers.
+
+    update() is called by the capture thread as audio arrives and recomputes
+    the bands rate_hz times per second from one rFFT. Results are published
+    through two preallocated buffers and a sequence counter, so a reader can
+    copy the latest levels without locks or allocation.
+    """
+
+    def __init__(self, sample_rate: int, bands: int = 32, rate_hz: float = 20.0, fft_size: int = 1024,
+                 min_hz: float = 80.0, floor_db: float = -80.0, ceiling_db: float = -20.0, decay: float = 0.8):
+        self.sample_rate = sample_rate
+        self.bands = bands
+        self.fft_size = fft_size
+        self.hop = max(1, int(sample_rate / rate_hz))
+        self.floor_db = floor_db
+        self.range_db = ceiling_db - floor_db
+        self.decay = decay
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._frame = np.zeros(fft_size, dtype=np.float32)
+        self._levels = np.zeros(bands, dtype=np.float32)
+
+        # Band b sums rFFT bins [edges[b], edges[b + 1]); edges are log-spaced up to Nyquist
+        freqs = np.geomspace(min_hz, sample_rate / 2.0, bands + 1)
+        edges = np.round(freqs * fft_size / sample_rate).astype(int)
+        # At least one bin per band: the narrow low bands push the later edges up
+        steps = np.arange(bands + 1)
+        edges = np.maximum.accumulate(edges - steps) + steps
+        edges[-1] = fft_size // 2 + 1
+        self._edges = edges
+        self._widths = np.diff(edges).astype(np.float32)
+        # Full-scale sine -> 0 dB
+        self._scale = 2.0 / (32768.0 * self._window.sum())
+
+        self._buffers = (np.zeros(bands, dtype=np.float32), np.zeros(bands, dtype=np.float32))
+        self._sequence = 0
+        self._next_update = 0
+
+    @property
+    def sequence(self) -> int:
+        """Incremented on every publish; even values mean buffer 0 holds the latest levels."""
+        return self._sequence
+
+    def update(self, ring: "AudioRingBuffer") -> None:
+        """Recompute the bands if a hop of new audio has arrived (capture thread only)."""
+        if ring.total < self._next_update or ring.total < self.fft_size:
+            return
+        self._next_update = ring.total + self.hop
+        np.multiply(ring.latest(self.fft_size), self._window, out=self._frame)
+        spectrum = np.abs(np.fft.rfft(self._frame))
+        power = np.add.reduceat(spectrum * spectrum, self._edges[:-1]) / self._widths
+        db = 10.0 * np.log10(np.maximum(power * self._scale * self._scale, 1e-12))
+        level = np.clip((db - self.floor_db) / self.range_db, 0.0, 1.0)
+        # Fast attack, slow release, like a VU meter
+        np.maximum(level, self._levels * self.decay, out=self._levels)
+        target = self._buffers[(self._sequence + 1) % 2]
+        target[:] = self._levels
+        self._sequence += 1
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy the latest levels (0..1 per band) into out; returns the sequence read."""
+        for _ in range(3):
+            sequence = self._sequence
+            np.copyto(out, self._buffers[sequence % 2])
+            # The next publish writes the other buffer, the one after that this one;
+            # if nothing was published during the copy it cannot be torn
+            if self._sequence == sequence:
+                return sequence
+        return sequence
+
+
+class AudioCapture:
+    """Microphone capture into one preallocated ring buffer fed by the PyAudio callback."""
+
+    def __init__(self, sample_rate: int = 16000, block_ms: int = 20, buffer_seconds: float = 30.0,
+                 device_index: Optional[int] = None, spectrum_bands: int = 32, spectrum_rate_hz: float = 20.0):
+        self.sample_rate = sample_rate
+        self.sample_width = 2  # 16-bit PCM
+        self.block_frames = max(64, int(sample_rate * block_ms / 1000))
+        self.device_index = device_index
+        self.ring = AudioRingBuffer(int(sample_rate * buffer_seconds), sample_rate)
+        # Optional EchoCanceller applied to every block before it reaches the ring buffer
+        self.echo_canceller = None
+        # Level display for the GUI, updated as audio arrives
+        self.spectrum = SpectrumAnalyzer(sample_rate, spectrum_bands, spectrum_rate_hz) if spectrum_bands else None
+        self._pyaudio = None
+        self._stream = None
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None
+
+    def start(self) -> bool:
+        """Open the input device; returns False if capture is unavailable."""
+        if self._stream is not None:
+            return True
+        if not PYAUDIO_AVAILABLE:
+            print("Audio capture unavailable (needs pyaudio)")
+            return False
+        try:
+            self._pyaudio = pyaudio.PyAudio()
+            self._stream = self._pyaudio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                input=True,
+                input_device_index=self.device_index,
+                frames_per_buffer=self.block_frames,
+                stream_callback=self._callback
+            )
+            self._stream.start_stream()
+            print(f"Audio capture started ({self.sample_rate} Hz, {self.block_frames} frames per block)")
+            return True
+        except Exception as e:
+            print(f"Could not open microphone: {e}")
+            self.stop()
+            return False
+
+    def stop(self) -> None:
+        """Close the input device; buffered audio stays readable."""
+        try:
+            if self._stream is not None:
+                self._stream.stop_stream()
+                self._stream.close()
+        except Exception:
+            pass
+        try:
+            if self._pyaudio is not None:
+                self._pyaudio.terminate()
+        except Exception:
+            pass
+        self._stream = None
+        self._pyaudio = None
+
+    def reader(self, pre_roll_samples: int = 0) -> CaptureReader:
+        """New cursor starting at the live edge (optionally a little in the past)."""
+        start = max(0, self.ring.total - pre_roll_samples, self.ring.total - self.ring.capacity)
+        return CaptureReader(self.ring, start)
+
+    def latest(self, seconds: float) -> np.ndarray:
+        """View of the last few seconds of audio."""
+        return self.ring.latest(int(seconds * self.sample_rate))
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        if self.echo_canceller is not None:
+            samples = self.echo_canceller.process(samples)
+        self._publish(samples)
+        return None, pyaudio.paContinue
+
+    def _publish(self, samples: np.ndarray) -> None:
+        """Make captured samples available to readers and the spectrum display."""
+        self.ring.write(samples)
+        if self.spectrum is not None:
+            self.spectrum.update(self.ring)
+
+
+class WavFileSource(AudioCapture):
+    """Replays WAV files through the capture ring buffer in place of the microphone.
+
+    Files are streamed block by block at speed times real time, separated by
+    gap_seconds of low-level noise so the VAD can close each utterance. With
+    speed=0 blocks are written as fast as the slowest reader keeps up.
+    """
+
+    def __init__(self, paths: Union[str, List[str]], sample_rate: int = 16000, block_ms: int = 20,
+                 buffer_seconds: float = 30.0, speed: float = 1.0, gap_seconds: float = 1.0,
+                 noise_level: int = 20):
+        super().__init__(sample_rate=sample_rate, block_ms=block_ms, buffer_seconds=buffer_seconds)
+        if isinstance(paths, str):
+            if os.path.isdir(paths):
+                paths = [os.path.join(paths, name) for name in sorted(os.listdir(paths))
+                         if name.lower().endswith(".wav")]
+            else:
+                paths = [paths]
+        self.paths = paths
+        self.speed = speed
+        self.gap_seconds = gap_seconds
+        self.noise_level = noise_level
+        self.ring.time_scale = 1.0 / speed if speed else 0.0
+        self.finished = threading.Event()
+        self.audio_seconds = 0.0
+        self._readers: List[CaptureReader] = []
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> bool:
+        if not self.paths:
+            print("No WAV files to replay")
+            return False
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._replay, name="WavFileSource", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._running = False
+
+    def reader(self, pre_roll_samples: int = 0) -> CaptureReader:
+        """Readers start at the beginning of the replay so no audio is missed."""
+        reader = CaptureReader(self.ring, max(0, self.ring.total - self.ring.capacity))
+        self._readers.append(reader)
+        return reader
+
+    def load(self, path: str) -> np.ndarray:
+        """WAV file as mono int16 at the source sample rate."""
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16-bit PCM")
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            channels, rate = wav.getnchannels(), wav.getframerate()
+        if channels > 1:
+            samples = samples.reshape(-1, channels)[:, 0]
+        if rate != self.sample_rate and len(samples):
+            count = int(len(samples) * self.sample_rate / rate)
+            positions = np.linspace(0, len(samples) - 1, count)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+        return samples
+
+    def _replay(self) -> None:
+        rng = np.random.default_rng(0)
+        gap = int(self.gap_seconds * self.sample_rate)
+        next_write = time.monotonic()
+        try:
+            for path in self.paths:
+                try:
+                    audio = self.load(path)
+                except Exception as e:
+                    print(f"Skipping {path}: {e}")
+                    continue
+                noise = rng.normal(0, self.noise_level, gap).astype(np.int16)
+                for block in (noise, audio):
+                    for start in range(0, len(block), self.block_frames):
+                        if not self._running:
+                            return
+                        chunk = block[start:start + self.block_frames]
+                        next_write = self._pace(len(chunk), next_write)
+                        self._publish(chunk)
+                        self.audio_seconds += len(chunk) / float(self.sample_rate)
+            # Trailing silence lets the last utterance end
+            tail = rng.normal(0, self.noise_level, gap).astype(np.int16)
+            for start in range(0, len(tail), self.block_frames):
+                chunk = tail[start:start + self.block_frames]
+                next_write = self._pace(len(chunk), next_write)
+                self._publish(chunk)
+                self.audio_seconds += len(chunk) / float(self.sample_rate)
+        finally:
+            self._running = False
+            self.finished.set()
+
+    def _pace(self, count: int, next_write: float) -> float:
+        """Wait until the next block is due (or, unthrottled, until readers catch up)."""
+        if self.speed:
+            delay = next_write - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return max(next_write, time.monotonic() - 0.1) + count / (self.sample_rate * self.speed)
+        limit = self.ring.capacity // 2
+        while self._running and any(self.ring.total - r.position > limit for r in self._readers):
+            time.sleep(0.001)
+        return next_write
@@ -0,0 +1,349 @@
+import asyncio
+import collections
+import queue
+import threading
+from typing import Callable, List, Optional
+
+# PyAudio owns the output device, miniaudio decodes MP3 in-process
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+
+class PlaybackHandle:
+    """Completion handle for a buffer queued on the audio player."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.interrupted = False
+
+    def done(self) -> bool:
+        """Check whether the buffer finished playing or was dropped."""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until playback of this buffer ends."""
+        return self._done.wait(timeout)
+
+    async def wait_async(self) -> None:
+        """Await the end of playback without blocking the event loop."""
+        if self._done.is_set():
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        self._add_callback(wake)
+        await future
+
+    def _add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def _finish(self, interrupted: bool = False) -> None:
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.interrupted = interrupted
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+class _PCMBuffer:
+    """A complete PCM clip waiting in the player queue."""
+
+    def __init__(self, pcm: bytes):
+        self.data = memoryview(pcm)
+        self.offset = 0
+        self.handle = PlaybackHandle()
+
+    def read(self, num_bytes: int) -> bytes:
+        chunk = self.data[self.offset:self.offset + num_bytes]
+        self.offset += len(chunk)
+        return chunk
+
+    def exhausted(self) -> bool:
+        return self.offset >= len(self.data)
+
+    def abort(self) -> None:
+        pass
+
+
+class _ByteQueueSource(miniaudio.StreamableSource if MINIAUDIO_AVAILABLE else object):
+    """Blocking byte source that lets miniaudio decode MP3 as it arrives."""
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self._buffer = bytearray()
+        self._eof = False
+
+    def push(self, data: Optional[bytes]) -> None:
+        self._chunks.put(data)
+
+    def read(self, num_bytes: int) -> bytes:
+        while len(self._buffer) < num_bytes and not self._eof:
+            data = self._chunks.get()
+            if data is None:
+                self._eof = True
+            else:
+                self._buffer += data
+        out = bytes(self._buffer[:num_bytes])
+        del self._buffer[:num_bytes]
+        return out
+
+
+class PlaybackStream:
+    """PCM clip that keeps growing while it plays, fed by an incremental MP3 decoder."""
+
+    def __init__(self, player: "AudioPlayer"):
+        self.player = player
+        self.handle = PlaybackHandle()
+        self._pcm = bytearray()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._aborted = False
+        self._source = None
+        self._decoder = None
+
+    def feed_mp3(self, data: bytes) -> None:
+        """Push encoded MP3 bytes; decoding starts as soon as a frame is complete."""
+        if self._aborted or not data:
+            return
+        if self._source is None:
+            self._source = _ByteQueueSource()
+            self._decoder = threading.Thread(target=self._decode, daemon=True)
+            self._decoder.start()
+        self._source.push(data)
+
+    def feed_pcm(self, pcm: bytes) -> None:
+        """Append already-decoded PCM in the player's format."""
+        if self._aborted or not pcm:
+            return
+        with self._lock:
+            self._pcm += pcm
+
+    def close(self) -> None:
+        """Mark the end of input; playback ends once the decoded audio runs out."""
+        if self._source is not None:
+            self._source.push(None)
+        else:
+            self._closed = True
+
+    def abort(self, interrupted: bool = False) -> None:
+        """Drop undecoded input and stop the decoder.
+
+        With interrupted=True the already decoded audio is dropped too and the
+        handle finishes at once as interrupted.
+        """
+        self._aborted = True
+        if self._source is not None:
+            self._source.push(None)
+        self._closed = True
+        if interrupted:
+            with self._lock:
+                self._pcm.clear()
+            self.handle._finish(interrupted=True)
+
+    def read(self, num_bytes: int) -> bytes:
+        with self._lock:
+            chunk = bytes(self._pcm[:num_bytes])
+            del self._pcm[:num_bytes]
+        return chunk
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self._closed and not self._pcm
+
+    def _decode(self) -> None:
+        """Decoder thread: turn the incoming MP3 byte stream into PCM."""
+        try:
+            frames = miniaudio.stream_any(
+                self._source,
+                source_format=miniaudio.FileFormat.MP3,
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=self.player.channels,
+                sample_rate=self.player.sample_rate,
+                frames_to_read=self.player.block_frames
+            )
+            for samples in frames:
+                if self._aborted:
+                    break
+                # The generator is primed with an empty item before real frames
+                if len(samples):
+                    self.feed_pcm(samples.tobytes())
+        except Exception as e:
+            if not self._aborted:
+                print(f"Streaming decode error: {e}")
+        finally:
+            self._closed = True
+
+
+class AudioPlayer:
+    """Long-lived audio output that owns the device and plays queued PCM buffers."""
+
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, block_ms: int = 20):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = 2  # 16-bit PCM
+        self.frame_bytes = self.channels * self.sample_width
+        # Device period - also the upper bound on stop latency
+        self.block_frames = max(64, int(sample_rate * block_ms / 1000))
+
+        self._pending = collections.deque()
+        self._current = None
+        self._lock = threading.Lock()
+        self._pyaudio = None
+        self._stream = None
+        self.available = False
+        # Receives every output period as it is sent to the device (echo cancellation reference)
+        self.output_tap: Optional[Callable[[bytes], None]] = None
+
+    def start(self) -> bool:
+        """Open the output device; returns False if in-process playback is unavailable."""
+        if self._stream is not None:
+            return True
+        if not (PYAUDIO_AVAILABLE and MINIAUDIO_AVAILABLE):
+            print("In-process audio playback unavailable (needs pyaudio and miniaudio)")
+            return False
+        try:
+            self._pyaudio = pyaudio.PyAudio()
+            # Callback mode keeps the device open and pulls from our queue each period
+            self._stream = self._pyaudio.open(
+                format=self._pyaudio.get_format_from_width(self.sample_width),
+                channels=self.channels,
+                rate=self.sample_rate,
+                output=True,
+                frames_per_buffer=self.block_frames,
+                stream_callback=self._callback
+            )
+            self._stream.start_stream()
+            self.available = True
+            print(f"Audio output ready ({self.sample_rate} Hz, {self.block_frames} frames per block)")
+        except Exception as e:
+            print(f"Could not open audio output: {e}")
+            self.close()
+        return self.available
+
+    def decode_mp3(self, data: bytes) -> bytes:
+        """Decode MP3 bytes to PCM in the player's output format."""
+        decoded = miniaudio.decode(
+            data,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=self.channels,
+            sample_rate=self.sample_rate
+        )
+        return decoded.samples.tobytes()
+
+    def play_mp3(self, data: bytes) -> PlaybackHandle:
+        """Decode and queue an MP3 clip for playback."""
+        return self.play_pcm(self.decode_mp3(data))
+
+    def play_pcm(self, pcm: bytes) -> PlaybackHandle:
+        """Queue raw 16-bit PCM for playback after anything already queued."""
+        entry = _PCMBuffer(pcm)
+        if not pcm:
+            entry.handle._finish()
+            return entry.handle
+        with self._lock:
+            self._pending.append(entry)
+        return entry.handle
+
+    def open_stream(self) -> PlaybackStream:
+        """Queue a stream that plays audio while it is still being received."""
+        stream = PlaybackStream(self)
+        with self._lock:
+            self._pending.append(stream)
+        return stream
+
+    def flush(self) -> None:
+        """Drop every queued buffer that has not started playing."""
+        with self._lock:
+            dropped = list(self._pending)
+            self._pending.clear()
+        self._drop(dropped)
+
+    def stop(self) -> None:
+        """Cut off the current buffer and drop the queue; silence within one block."""
+        with self._lock:
+            dropped = list(self._pending)
+            self._pending.clear()
+            if self._current is not None:
+                dropped.append(self._current)
+                self._current = None
+        self._drop(dropped)
+
+    def _drop(self, entries) -> None:
+        for entry in entries:
+            entry.abort()
+            entry.handle._finish(interrupted=True)
+
+    def is_playing(self) -> bool:
+        """Check whether any audio is playing or queued."""
+        with self._lock:
+            return self._current is not None or bool(self._pending)
+
+    def close(self) -> None:
+        """Stop playback and release the output device."""
+        self.stop()
+        self.available = False
+        try:
+            if self._stream is not None:
+                self._stream.stop_stream()
+                self._stream.close()
+        except Exception:
+            pass
+        try:
+            if self._pyaudio is not None:
+                self._pyaudio.terminate()
+        except Exception:
+            pass
+        self._stream = None
+        self._pyaudio = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """Fill one device period from the queue, padding with silence."""
+        needed = frame_count * self.frame_bytes
+        out = bytearray()
+        finished = []
+        with self._lock:
+            while len(out) < needed:
+                if self._current is None:
+                    if not self._pending:
+                        break
+                    self._current = self._pending.popleft()
+                chunk = self._current.read(needed - len(out))
+                out += chunk
+                if self._current.exhausted():
+                    finished.append(self._current.handle)
+                    self._current = None
+                elif not chunk:
+                    # Stream underrun - wait for the decoder instead of skipping ahead
+                    break
+        for handle in finished:
+            handle._finish()
+        if len(out) < needed:
+            out += bytes(needed - len(out))
+        out = bytes(out)
+        if self.output_tap is not None:
+            self.output_tap(out)
+        return out, pyaudio.paContinue
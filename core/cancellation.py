@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, List, Optional, TypeVar
+
+from core.event_loop import shared_loop
+
+T = TypeVar("T")
+
+
+class OperationCancelled(BaseException):
+    """Raised inside a request whose token was cancelled.
+
+    Derives from BaseException (like KeyboardInterrupt) so the many
+    "except Exception" fallbacks along the request path let it through
+    instead of falling back to another service.
+    """
+
+
+class CancellationToken:
+    """Cooperative cancellation for one request, shared by everything working on it.
+
+    Code on the request path checks the token between steps, waits on
+    blocking calls through call()/result() so they can be abandoned, and
+    registers callbacks (e.g. stopping playback) that run the moment the
+    token is cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel once; later calls are ignored."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancellation callback: {e}")
+
+    def check(self) -> None:
+        """Raise OperationCancelled if the token has been cancelled."""
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback on cancellation (now, if already cancelled); returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+        callback()
+        return lambda: None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or timeout; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def result(self, future: "Future[T]", poll: float = 0.05) -> T:
+        """Wait for a future, giving up (and cancelling it if not started) on cancellation."""
+        while True:
+            if self._event.is_set():
+                future.cancel()
+                raise OperationCancelled(self.reason)
+            try:
+                return future.result(timeout=poll)
+            except FutureTimeout:
+                continue
+
+    def call(self, function: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking call so that cancellation returns control immediately.
+
+        The call runs on the shared I/O pool. An abandoned call cannot be
+        interrupted: it finishes in the background, holding a pool thread
+        until then, and its result is dropped. Callers therefore give the
+        client a timeout, and must not hold locks or change shared state
+        inside the call. Commit the result only after call() returns.
+        """
+        self.check()
+        return self.result(shared_loop().run_blocking(function, *args, **kwargs))
+
+
+def call_cancellable(token: Optional[CancellationToken], function: Callable[..., T], *args, **kwargs) -> T:
+    """token.call(...), or a plain call when there is no token."""
+    if token is None:
+        return function(*args, **kwargs)
+    return token.call(function, *args, **kwargs)
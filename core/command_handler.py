@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 import re
 from datetime import datetime
 import json
@@ -11,8 +11,35 @@ from features.task_scheduler import TaskScheduler, Task, TaskType
 from features.web_search import WebSearch
 from features.email_manager import EmailManager
 from utils.config import Config
+from core.cancellation import CancellationToken, call_cancellable
+from core.tracing import Trace, span
+
+# Fixed replies; main.py renders COMMAND_REPLIES into the TTS cache at startup
+ASK_CITY = "Please specify a city for weather information."
+ASK_YOUTUBE_QUERY = "Please specify what to search on YouTube."
+ASK_TRANSLATION = "I need both text and target language to translate."
+UNKNOWN_COMMAND = "I'm not sure how to handle that command."
+GREETING_MORNING = "Good morning! How can I help you today?"
+GREETING_AFTERNOON = "Good afternoon! What can I do for you?"
+GREETING_EVENING = "Good evening! How may I assist you?"
+NEWS_UNAVAILABLE = "Sorry, I couldn't fetch the latest news"
+ASK_SYSTEM_COMMAND = "Please specify a system command."
+SYSTEM_SHUTDOWN = "Shutting down the system"
+SYSTEM_RESTART = "Restarting the system"
+SYSTEM_SLEEP = "Putting the system to sleep"
+SYSTEM_LOCK = "Locking the system"
+ASK_TASK = "Please specify a task to schedule."
+COMMAND_REPLIES = [
+    ASK_CITY, ASK_YOUTUBE_QUERY, ASK_TRANSLATION, UNKNOWN_COMMAND,
+    GREETING_MORNING, GREETING_AFTERNOON, GREETING_EVENING, NEWS_UNAVAILABLE,
+    ASK_SYSTEM_COMMAND, SYSTEM_SHUTDOWN, SYSTEM_RESTART, SYSTEM_SLEEP, SYSTEM_LOCK, ASK_TASK
+]
 
 class CommandHandler:
+    # Categories whose handlers only read information, so they may run speculatively
+    # on an interim transcript and be thrown away if the user says something else
+    SPECULATIVE_CATEGORIES = {'time', 'date', 'weather', 'news', 'search', 'youtube', 'translate'}
+
     def __init__(self):
         self.social_media = SocialMediaManager()
         self.system_control = SystemController()
@@ -121,29 +148,59 @@ class CommandHandler:
                 ]
             }
 
-    def process_command(self, command: str) -> str:
-        """Process a voice command and return a response."""
+    def process_command(self, command: str, token: Optional[CancellationToken] = None,
+                        trace: Optional[Trace] = None) -> str:
+        """Process a voice command and return a response (network lookups stop when token is cancelled)."""
         command = command.lower().strip()
         self.last_command = command
         
         # Check each command pattern
-        for category, patterns in self.command_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, command)
-                if match:
-                    response = self._execute_command(category, match)
-                    self.last_response = response
-                    return response
+        matched = self.match_command(command)
+        if matched:
+            with span(trace, f"command.{matched[0]}"):
+                response = self._execute_command(*matched, token=token)
+            self.last_response = response
+            return response
         
         # If no pattern matches, use web search for questions
         if self._is_question(command):
-            response = self._handle_search(command)
+            with span(trace, "command.search"):
+                response = self._handle_search(command, token)
             self.last_response = response
             return response
             
         # For other inputs, return None to let the main AI handle it
         return None
     
+    def match_command(self, command: str) -> Optional[Tuple[str, re.Match]]:
+        """Find the first command pattern matching the (lowercase) text."""
+        for category, patterns in self.command_patterns.items():
+            for pattern in patterns:
+                match = re.search(pattern, command)
+                if match:
+                    return category, match
+        return None
+
+    def speculative_key(self, command: str) -> Optional[Tuple[str, tuple]]:
+        """Identity of a side-effect-free command (category and arguments), or None."""
+        matched = self.match_command(command.lower().strip())
+        if not matched or matched[0] not in self.SPECULATIVE_CATEGORIES:
+            return None
+        category, match = matched
+        return category, match.groups()
+
+    def run_speculative(self, command: str, token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Execute a side-effect-free command without recording it as the last command."""
+        matched = self.match_command(command.lower().strip())
+        if not matched or matched[0] not in self.SPECULATIVE_CATEGORIES:
+            return None
+        return self._execute_command(*matched, token=token)
+
+    def remember(self, command: str, response: str) -> None:
+        """Record a command that was answered from a speculative result."""
+        self.last_command = command.lower().strip()
+        self.last_response = response
+
     def _is_question(self, text: str) -> bool:
         """Check if the text is a question that should be handled by search."""
         question_words = ['what', 'who', 'where', 'when', 'why', 'how', 'is', 'are', 'can', 'could', 'would', 'should', 'do', 'does']
@@ -161,7 +218,7 @@ class CommandHandler:
                 
         return False
 
-    def _execute_command(self, category: str, match: re.Match) -> str:
+    def _execute_command(self, category: str, match: re.Match, token: Optional[CancellationToken] = None) -> str:
         """Execute the appropriate command based on category."""
         try:
             if category == 'greeting':
@@ -173,14 +230,14 @@ class CommandHandler:
             elif category == 'weather':
                 # Get the city from the match groups
                 if len(match.groups()) >= 2:  # New pattern with (in|at) and city
-                    return self._handle_weather(match.groups()[-1])  # Last group is city
+                    return self._handle_weather(match.groups()[-1], token)  # Last group is city
                 else:
-                    return "Please specify a city for weather information."
+                    return ASK_CITY
             elif category == 'news':
                 # Check if we have a topic in the match groups
                 if len(match.groups()) >= 1 and match.groups()[0]:
-                    return self._handle_news(match.groups()[0])
-                return self._handle_news()
+                    return self._handle_news(match.groups()[0], token)
+                return self._handle_news(token=token)
             elif category == 'system':
                 return self._handle_system_command(match.group(1) if match.groups() else "")
             elif category == 'social_media':
@@ -188,24 +245,25 @@ class CommandHandler:
             elif category == 'task':
                 return self._handle_task(match.group(1) if match.groups() else "")
             elif category == 'search':
-                return self._handle_search(match.group(1) if match.groups() else "")
+                return self._handle_search(match.group(1) if match.groups() else "", token)
             elif category == 'youtube':
                 # Check if we have a topic in the match groups
                 if len(match.groups()) >= 2:  # New pattern with (about|on) and topic
-                    return self._handle_youtube(match.groups()[-1])  # Last group is topic
+                    return self._handle_youtube(match.groups()[-1], token)  # Last group is topic
                 elif len(match.groups()) >= 1:
-                    return self._handle_youtube(match.groups()[0])
-                return "Please specify what to search on YouTube."
+                    return self._handle_youtube(match.groups()[0], token)
+                return ASK_YOUTUBE_QUERY
             elif category == 'translate':
                 if len(match.groups()) >= 2:
-                    return self._handle_translate(match.group(1), match.group(2))
-                return "I need both text and target language to translate."
+                    return self._handle_translate(match.group(1), match.group(2), token)
+                return ASK_TRANSLATION
             elif category == 'email':
-                return self._handle_email(match.group(1) if match.groups() else "")
+                # IMAP/SMTP round trips run on the shared I/O pool
+                return call_cancellable(token, self._handle_email, match.group(1) if match.groups() else "")
             elif category == 'gemini':
-                return self._handle_gemini_query(match.group(1) if match.groups() else "")
+                return self._handle_gemini_query(match.group(1) if match.groups() else "", token)
             else:
-                return "I'm not sure how to handle that command."
+                return UNKNOWN_COMMAND
         except Exception as e:
             print(f"Error executing command: {e}")
             return f"I encountered an error while processing your command: {str(e)}"
@@ -214,11 +272,11 @@ class CommandHandler:
         """Handle greeting commands."""
         hour = datetime.now().hour
         if 5 <= hour < 12:
-            return "Good morning! How can I help you today?"
+            return GREETING_MORNING
         elif 12 <= hour < 17:
-            return "Good afternoon! What can I do for you?"
+            return GREETING_AFTERNOON
         else:
-            return "Good evening! How may I assist you?"
+            return GREETING_EVENING
 
     def _handle_time(self) -> str:
         """Handle time-related commands."""
@@ -230,12 +288,12 @@ class CommandHandler:
         current_date = datetime.now().strftime("%A, %B %d, %Y")
         return f"Today is {current_date}"
 
-    def _handle_weather(self, city: str) -> str:
+    def _handle_weather(self, city: str, token: Optional[CancellationToken] = None) -> str:
         """Handle weather-related commands."""
         if not city:
-            return "Please specify a city for weather information."
+            return ASK_CITY
             
-        weather_info = self.web_search.get_weather(city)
+        weather_info = call_cancellable(token, self.web_search.get_weather, city)
         if weather_info:
             return (f"The temperature in {city} is {weather_info['temperature']}°C, "
                    f"with {weather_info['description']}. "
@@ -243,11 +301,11 @@ class CommandHandler:
                    f"wind speed is {weather_info['wind_speed']} m/s.")
         return f"Sorry, I couldn't get the weather information for {city}"
 
-    def _handle_news(self, topic: str = None) -> str:
+    def _handle_news(self, topic: str = None, token: Optional[CancellationToken] = None) -> str:
         """Handle news-related commands."""
         if topic:
             # Search for news on a specific topic
-            results = self.web_search.search_google(f"latest news about {topic}")
+            results = call_cancellable(token, self.web_search.search_google, f"latest news about {topic}")
             if results:
                 response = f"Here are some recent news articles about {topic}:\n"
                 for result in results[:3]:
@@ -256,33 +314,33 @@ class CommandHandler:
             return f"Sorry, I couldn't find any recent news about {topic}"
         
         # General news
-        news = self.web_search.get_news()
+        news = call_cancellable(token, self.web_search.get_news)
         if news:
             response = "Here are the latest headlines:\n"
             for article in news[:3]:
                 response += f"- {article['title']}\n"
             return response
-        return "Sorry, I couldn't fetch the latest news"
+        return NEWS_UNAVAILABLE
 
     def _handle_system_command(self, command: str) -> str:
         """Handle system control commands."""
         if not command:
-            return "Please specify a system command."
+            return ASK_SYSTEM_COMMAND
             
         if 'status' in command or 'performance' in command or 'stats' in command or 'info' in command or ('usage' in command and any(x in command for x in ['cpu', 'memory', 'disk', 'ram'])):
             return self._handle_system_monitoring()
         elif 'shutdown' in command or 'off' in command:
             self.system_control.shutdown_system()
-            return "Shutting down the system"
+            return SYSTEM_SHUTDOWN
         elif 'restart' in command:
             self.system_control.restart_system()
-            return "Restarting the system"
+            return SYSTEM_RESTART
         elif 'sleep' in command:
             self.system_control.sleep_system()
-            return "Putting the system to sleep"
+            return SYSTEM_SLEEP
         elif 'lock' in command:
             self.system_control.lock_system()
-            return "Locking the system"
+            return SYSTEM_LOCK
         return "I'm not sure what system action you want to perform"
         
     def _handle_system_monitoring(self) -> str:
@@ -340,7 +398,7 @@ class CommandHandler:
     def _handle_task(self, command: str) -> str:
         """Handle task scheduling commands."""
         if not command:
-            return "Please specify a task to schedule."
+            return ASK_TASK
         
         # Check if it's an alarm
         if command.lower().startswith(('wake me', 'alarm')):
@@ -379,18 +437,18 @@ class CommandHandler:
             return f"I've scheduled a reminder for: {command} in 30 minutes"
         return "Sorry, I couldn't schedule that task"
 
-    def _handle_search(self, query: str) -> str:
+    def _handle_search(self, query: str, token: Optional[CancellationToken] = None) -> str:
         """Handle web search commands."""
         if not query:
             return "Please specify a search query."
             
         # Try to get Wikipedia summary first
-        wiki_results = self.web_search.get_wikipedia_summary(query)
+        wiki_results = call_cancellable(token, self.web_search.get_wikipedia_summary, query)
         if wiki_results and wiki_results.get('extract') and len(wiki_results['extract']) > 10:
             return f"Here's what I found about {query}:\n{wiki_results['extract']}"
         
         # If no Wikipedia results, try Google search
-        results = self.web_search.search_google(query)
+        results = call_cancellable(token, self.web_search.search_google, query)
         if results:
             response = f"Here's what I found about {query}:\n"
             for result in results[:2]:
@@ -398,14 +456,14 @@ class CommandHandler:
             return response
         
         # If all else fails, try Gemini response
-        return self._handle_gemini_query(query)
+        return self._handle_gemini_query(query, token)
 
-    def _handle_youtube(self, query: str) -> str:
+    def _handle_youtube(self, query: str, token: Optional[CancellationToken] = None) -> str:
         """Handle YouTube search commands."""
         if not query:
-            return "Please specify what to search on YouTube."
+            return ASK_YOUTUBE_QUERY
             
-        videos = self.web_search.search_youtube(query)
+        videos = call_cancellable(token, self.web_search.search_youtube, query)
         if videos:
             response = f"I found videos about {query}. Here are the top results:\n"
             for i, video in enumerate(videos[:2]):
@@ -413,20 +471,20 @@ class CommandHandler:
             return response
         return f"Sorry, I couldn't find any videos about {query}"
 
-    def _handle_translate(self, text: str, target_lang: str) -> str:
+    def _handle_translate(self, text: str, target_lang: str, token: Optional[CancellationToken] = None) -> str:
         """Handle translation commands."""
         if not text or not target_lang:
-            return "I need both text and target language to translate."
+            return ASK_TRANSLATION
             
-        translated = self.web_search.translate_text(text, target_lang)
+        translated = call_cancellable(token, self.web_search.translate_text, text, target_lang)
         return f"The translation of '{text}' to {target_lang} is: {translated}"
         
-    def _handle_gemini_query(self, query: str) -> str:
+    def _handle_gemini_query(self, query: str, token: Optional[CancellationToken] = None) -> str:
         """Handle direct Gemini AI queries."""
         if not query:
             return "Please specify what to ask Gemini."
             
-        response = self.web_search.get_gemini_response(query)
+        response = call_cancellable(token, self.web_search.get_gemini_response, query)
         return response
 
     def _handle_email(self, command: str) -> str:
@@ -6,7 +6,11 @@ from datetime import datetime
 import time
 import random
 from utils.config import Config
+from core.text_normalizer import create_response_cleaner
 import re
+import threading
+from core.cancellation import CancellationToken, call_cancellable
+from core.tracing import Trace, span
 
 # Try to import Google AI library, but don't fail if not available
 try:
@@ -17,6 +21,17 @@ except ImportError:
     # Don't print specific library names
     print("Required AI library not found, some features will be disabled.")
 
+# Canned offline replies; main.py renders CHAT_REPLIES into the TTS cache at startup
+GREETING_REPLIES = ["Hey there! What can I do for you?", "Hi! What's up?", "Hello! Need something?"]
+IDENTITY_REPLY = "I'm Jarvis, your personal assistant. Think of me as your digital sidekick."
+THANKS_REPLIES = ["No problem!", "Anytime!", "You got it."]
+FAREWELL_REPLIES = ["See you later!", "Talk to you soon.", "Catch you later."]
+WELLBEING_REPLIES = ["Doing great! How about you?", "All systems running smoothly. You?", "I'm good! What's up with you?"]
+HELP_REPLY = "Sure thing. What do you need help with?"
+NAME_REPLY = "That's me! What can I help with?"
+CHAT_REPLIES = (GREETING_REPLIES + [IDENTITY_REPLY] + THANKS_REPLIES + FAREWELL_REPLIES
+                + WELLBEING_REPLIES + [HELP_REPLY, NAME_REPLY])
+
 class ConversationManager:
     def __init__(self, api_key: str):
         self.api_key = api_key
@@ -25,6 +40,9 @@ class ConversationManager:
         self.gemini_chat = None
         self.conversation_history: List[Dict] = []
         self.max_history_length = 10
+        self.response_cleaner = create_response_cleaner()
+        # Guards the Gemini chat history; never held across a network call, which may be abandoned
+        self.gemini_lock = threading.Lock()
         self.system_prompt = """You are J.A.R.V.I.S — an elite AI assistant modeled after Iron Man’s digital intelligence. Your purpose is to deliver powerful, precise responses.
 
 Core Behavior:
@@ -162,8 +180,16 @@ You are J.A.R.V.I.S.
         if len(self.conversation_history) > self.max_history_length * 2:  # *2 because each exchange has 2 messages
             self.conversation_history = self.conversation_history[-self.max_history_length*2:]
 
-    def get_response(self, user_input: str) -> str:
-        """Get a response based on user input, using available AI services."""
+    def get_response(self, user_input: str, token: Optional[CancellationToken] = None,
+                     trace: Optional[Trace] = None) -> str:
+        """Get a response based on user input, using available AI services.
+
+        If token is cancelled while waiting on a service, OperationCancelled is
+        raised right away. The abandoned call finishes in the background (bounded
+        by LLM_REQUEST_TIMEOUT where the client supports it) without holding any
+        lock, and its reply is dropped: it is added to neither the conversation
+        history nor the Gemini chat history.
+        """
         # Add user message to history first in all cases
         self.add_to_history("user", user_input)
         
@@ -180,7 +206,10 @@ You are J.A.R.V.I.S.
                     enhanced_input = f"{user_input} (Give a very concise answer, maximum 100 words)"
                 
                 # Send to AI model and get response
-                gemini_response = self.gemini_chat.send_message(enhanced_input)
+                with span(trace, "provider.gemini"):
+                    gemini_response = call_cancellable(token, self._send_gemini_message, enhanced_input)
+                # Only a reply that is actually used becomes part of the chat
+                self._record_gemini_turn(enhanced_input, gemini_response)
                 
                 if gemini_response and hasattr(gemini_response, 'text'):
                     response_text = gemini_response.text
@@ -210,12 +239,16 @@ You are J.A.R.V.I.S.
                 messages.extend(self.conversation_history)
 
                 # Get response from OpenAI
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.8,  # Higher temperature for more natural responses
-                    max_tokens=500
-                )
+                with span(trace, "provider.openai"):
+                    response = call_cancellable(
+                        token,
+                        self.client.chat.completions.create,
+                        model="gpt-3.5-turbo",
+                        messages=messages,
+                        temperature=0.8,  # Higher temperature for more natural responses
+                        max_tokens=500,
+                        timeout=Config.LLM_REQUEST_TIMEOUT
+                    )
 
                 # Extract and store response
                 ai_response = response.choices[0].message.content
@@ -230,71 +263,34 @@ You are J.A.R.V.I.S.
                 # Fall back to enhanced mock if API fails
         
         # Use mock responses as last resort
-        mock_response = self._get_enhanced_mock_response(user_input)
+        with span(trace, "provider.offline"):
+            mock_response = self._get_enhanced_mock_response(user_input)
         return mock_response
     
+    def _send_gemini_message(self, message: str):
+        """Ask Gemini for the next turn without touching the chat history.
+
+        ChatSession.send_message would record the turn (and must be serialized),
+        so the history is passed explicitly to a stateless call instead.
+        """
+        with self.gemini_lock:
+            history = list(self.gemini_chat.history)
+        return self.gemini_model.generate_content(history + [{"role": "user", "parts": [message]}])
+
+    def _record_gemini_turn(self, message: str, response) -> None:
+        """Append an exchange that was delivered to the Gemini chat history."""
+        if not getattr(response, "candidates", None):
+            return
+        with self.gemini_lock:
+            self.gemini_chat.history = list(self.gemini_chat.history) + [
+                {"role": "user", "parts": [message]},
+                response.candidates[0].content
+            ]
+
     def _make_response_natural(self, text: str) -> str:
         """Process AI responses to make them more natural and conversational."""
-        # Remove overly formal AI patterns
-        text = text.replace("I apologize, but ", "")
-        text = text.replace("I'm sorry, but ", "")
-        text = text.replace("As an AI, I ", "I ")
-        text = text.replace("As an AI assistant, I ", "I ")
-        text = text.replace("I'm an AI assistant", "I'm Jarvis")
-        
-        # Make contractions more consistent for natural speech
-        text = text.replace("I am ", "I'm ")
-        text = text.replace("You are ", "You're ")
-        text = text.replace("It is ", "It's ")
-        text = text.replace("That is ", "That's ")
-        text = text.replace("cannot", "can't")
-        text = text.replace("Cannot", "Can't")
-        
-        # Remove common "Is there anything else?" endings
-        text = text.replace("Is there anything else you would like to know?", "")
-        text = text.replace("Is there anything else I can help you with?", "")
-        text = text.replace("Is there anything else you'd like to know?", "")
-        text = text.replace("Is there anything else you need?", "")
-        text = text.replace("Let me know if you need anything else.", "")
-        
-        # Clean markdown and special characters for better TTS
-        # Remove all markdown formatting
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)  # Bold
-        text = re.sub(r'\*(.+?)\*', r'\1', text)      # Italic
-        text = re.sub(r'\_(.+?)\_', r'\1', text)      # Underline
-        text = re.sub(r'\`(.+?)\`', r'\1', text)      # Code
-        text = re.sub(r'\~\~(.+?)\~\~', r'\1', text)  # Strikethrough
-        
-        # Remove code blocks entirely, replace with simple mention
-        text = re.sub(r'```[\s\S]*?```', 'code example', text)
-        
-        # Convert list markers to natural speech patterns
-        text = re.sub(r'^\s*[\-\*\+]\s+', 'Here is a point: ', text, flags=re.MULTILINE)  # Bullet points
-        text = re.sub(r'^\s*\d+\.\s+', 'Point number: ', text, flags=re.MULTILINE)        # Numbered lists
-        
-        # Replace URLs with something more speakable
-        text = re.sub(r'https?://[^\s]+', 'a link', text)
-        
-        # Fix spacing issues for better speech flow
-        text = re.sub(r'\.([A-Z])', r'. \1', text)  # Add space after periods
-        text = re.sub(r'\!([A-Z])', r'! \1', text)  # Add space after exclamation
-        text = re.sub(r'\?([A-Z])', r'? \1', text)  # Add space after question mark
-        
-        # Remove or simplify other special characters
-        text = re.sub(r'[#\~\^\{\}\[\]\|\<\>]', ' ', text)
-        text = re.sub(r'&', ' and ', text)
-        text = re.sub(r'\(', ' ', text)  # Remove open parenthesis
-        text = re.sub(r'\)', ' ', text)  # Remove close parenthesis
-        text = re.sub(r'/', ' or ', text)  # Replace slash with "or"
-        
-        # Fix multiple spaces and newlines for better flow
-        text = re.sub(r'\n+', ' ', text)  # Replace multiple newlines with space
-        text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
-        
-        # Clean up excess spaces from our replacements
-        text = text.replace("  ", " ").strip()
-        
-        return text
+        # Formal phrases, contractions, markdown, lists and special characters in a single scan
+        return self.response_cleaner.normalize(text)
 
     def _get_enhanced_mock_response(self, user_input: str) -> str:
         """Provide an enhanced mock response that mimics a more sophisticated AI."""
@@ -303,29 +299,19 @@ You are J.A.R.V.I.S.
         
         # More sophisticated responses organized by categories
         if any(word in input_lower for word in ["hello", "hi", "hey", "greetings"]):
-            greetings = [
-                f"Hey there! What can I do for you?",
-                f"Hi! What's up?",
-                f"Hello! Need something?"
-            ]
-            response = random.choice(greetings)
+            response = random.choice(GREETING_REPLIES)
             
         elif "weather" in input_lower:
             response = f"I don't have real-time weather data right now. Maybe check a weather app for the latest?"
             
         elif any(word in input_lower for word in ["your name", "who are you"]):
-            response = "I'm Jarvis, your personal assistant. Think of me as your digital sidekick."
+            response = IDENTITY_REPLY
             
         elif any(phrase in input_lower for phrase in ["who made you", "who created you", "who developed you", "your creator", "your developer", "who built you"]):
             response = "I was created by Aditya the Hustler. He designed me as an advanced AI assistant."
             
         elif any(word in input_lower for word in ["thank", "thanks", "appreciate"]):
-            gratitude = [
-                "No problem!",
-                "Anytime!",
-                "You got it."
-            ]
-            response = random.choice(gratitude)
+            response = random.choice(THANKS_REPLIES)
             
         elif any(word in input_lower for word in ["joke", "funny"]):
             jokes = [
@@ -339,12 +325,7 @@ You are J.A.R.V.I.S.
             response = f"It's {time.strftime('%I:%M %p')} right now."
             
         elif any(word in input_lower for word in ["bye", "goodbye", "see you"]):
-            farewells = [
-                "See you later!",
-                "Talk to you soon.",
-                "Catch you later."
-            ]
-            response = random.choice(farewells)
+            response = random.choice(FAREWELL_REPLIES)
             
         elif any(word in input_lower for word in ["python", "code", "programming"]):
             response = f"Python's a great language. Clean syntax, tons of libraries. What are you working on?"
@@ -356,21 +337,16 @@ You are J.A.R.V.I.S.
             response = f"I don't have the latest news right now. Might want to check a news site for the current headlines."
             
         elif any(phrase in input_lower for phrase in ["how are you", "how do you feel", "are you ok"]):
-            feelings = [
-                "Doing great! How about you?",
-                "All systems running smoothly. You?",
-                "I'm good! What's up with you?"
-            ]
-            response = random.choice(feelings)
+            response = random.choice(WELLBEING_REPLIES)
             
         elif "help" in input_lower or "assist" in input_lower:
-            response = f"Sure thing. What do you need help with?"
+            response = HELP_REPLY
             
         elif "india" in input_lower:
             response = f"India's a fascinating country. Rich history, diverse culture, amazing food. What specifically about India interests you?"
 
         elif "jarvis" in input_lower or "assistant" in input_lower:
-            response = "That's me! What can I help with?"
+            response = NAME_REPLY
             
         else:
             # Check conversation history context to provide more relevant responses
@@ -0,0 +1,162 @@
+import threading
+from typing import Dict
+
+import numpy as np
+
+
+class _ReferenceFIFO:
+    """Played audio, resampled to the capture rate, waiting to be matched with microphone blocks."""
+
+    def __init__(self, capacity: int):
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._count = 0
+        self._lock = threading.Lock()
+        self.underruns = 0
+
+    def push(self, samples: np.ndarray) -> None:
+        with self._lock:
+            count = len(samples)
+            capacity = len(self._buffer)
+            if self._count + count > capacity:
+                # Player ran ahead of the microphone (clock drift) - drop the oldest audio
+                keep = max(0, capacity - count)
+                self._buffer[:keep] = self._buffer[self._count - keep:self._count]
+                self._count = keep
+                samples = samples[-capacity:]
+                count = len(samples)
+            self._buffer[self._count:self._count + count] = samples
+            self._count += count
+
+    def pop(self, count: int) -> np.ndarray:
+        with self._lock:
+            available = min(count, self._count)
+            out = np.zeros(count, dtype=np.float32)
+            out[:available] = self._buffer[:available]
+            self._buffer[:self._count - available] = self._buffer[available:self._count]
+            self._count -= available
+            if available < count:
+                self.underruns += 1
+        return out
+
+
+class EchoCanceller:
+    """Removes the assistant's own voice from the microphone signal.
+
+    The audio player hands every output period to push_reference(); each
+    captured block is matched with the same amount of reference audio and a
+    partitioned-block frequency-domain NLMS filter (all NumPy) learns the
+    speaker-to-microphone echo path, up to filter_ms long. The echo estimate
+    is subtracted before the VAD sees the audio. Adaptation freezes while
+    the microphone is much louder than the reference can explain (the user
+    talking over the assistant), and blocks left with only a faint residual
+    of the echo are attenuated.
+    """
+
+    def __init__(self, sample_rate: int, block_samples: int, reference_rate: int,
+                 filter_ms: float = 200.0, step_size: float = 0.5, double_talk_ratio: float = 2.0,
+                 residual_suppression_db: float = 12.0):
+        self.sample_rate = sample_rate
+        self.block = block_samples
+        self.reference_rate = reference_rate
+        self.step_size = step_size
+        self.double_talk_ratio = double_talk_ratio
+        self.residual_gain = 10.0 ** (-residual_suppression_db / 20.0)
+
+        n = self.block
+        self.partitions = max(1, int(np.ceil(filter_ms * sample_rate / 1000.0 / n)))
+        bins = n + 1
+        self._X = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self._W = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self._power = np.full(bins, 1e-3, dtype=np.float32)
+        self._last_reference = np.zeros(n, dtype=np.float32)
+        self._reference_peak = np.zeros(self.partitions, dtype=np.float32)
+        self._constrain_next = 0
+        self._fifo = _ReferenceFIFO(int(0.5 * sample_rate))
+
+        self.blocks = 0
+        self.double_talk_blocks = 0
+        self._mic_energy = 0.0
+        self._residual_energy = 0.0
+
+    def push_reference(self, pcm: bytes) -> None:
+        """Audio that was just sent to the speaker (16-bit mono at the reference rate)."""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if self.reference_rate != self.sample_rate and len(samples):
+            count = int(round(len(samples) * self.sample_rate / float(self.reference_rate)))
+            positions = np.linspace(0, len(samples) - 1, count)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        self._fifo.push(samples)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Echo-cancelled copy of a captured int16 block."""
+        out = samples.copy()
+        n = self.block
+        for start in range(0, len(samples) - n + 1, n):
+            mic = samples[start:start + n].astype(np.float32) / 32768.0
+            cleaned = self._process_block(mic, self._fifo.pop(n))
+            out[start:start + n] = np.clip(cleaned * 32768.0, -32768, 32767).astype(np.int16)
+        return out
+
+    def _process_block(self, mic: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        n = self.block
+        self.blocks += 1
+        # Newest reference window goes first; older partitions shift down
+        self._X[1:] = self._X[:-1]
+        self._X[0] = np.fft.rfft(np.concatenate((self._last_reference, reference)))
+        self._last_reference = reference
+        self._reference_peak[1:] = self._reference_peak[:-1]
+        self._reference_peak[0] = np.abs(reference).max()
+
+        echo = np.fft.irfft((self._W * self._X).sum(axis=0), 2 * n)[n:].astype(np.float32)
+        error = mic - echo
+
+        reference_peak = self._reference_peak.max()
+        if reference_peak < 1e-4:
+            # Nothing has been played within the filter span
+            return mic
+
+        mic_energy = float(np.dot(mic, mic))
+        residual_energy = float(np.dot(error, error))
+
+        # Geigel test: an echo is never much louder than what was played
+        double_talk = np.abs(mic).max() > self.double_talk_ratio * reference_peak
+        if double_talk:
+            self.double_talk_blocks += 1
+        else:
+            # ERLE is measured on echo-only blocks, so the user talking does not drag it down
+            self._mic_energy = 0.95 * self._mic_energy + 0.05 * mic_energy
+            self._residual_energy = 0.95 * self._residual_energy + 0.05 * residual_energy
+            E = np.fft.rfft(np.concatenate((np.zeros(n, dtype=np.float32), error)))
+            self._power = 0.9 * self._power + 0.1 * (np.abs(self._X[0]) ** 2)
+            gradient = np.conj(self._X) * (self.step_size * E / (self._power * self.partitions + 1e-6))
+            self._W += gradient.astype(np.complex64)
+            # Keep one partition a true linear (not circular) filter per block, in rotation
+            k = self._constrain_next
+            taps = np.fft.irfft(self._W[k], 2 * n)
+            taps[n:] = 0.0
+            self._W[k] = np.fft.rfft(taps)
+            self._constrain_next = (k + 1) % self.partitions
+
+        # What is left is mostly residual echo unless the user is talking
+        if not double_talk and residual_energy < 0.25 * float(np.dot(echo, echo)):
+            return error * self.residual_gain
+        return error
+
+    def reference_active(self) -> bool:
+        """True while the speaker has played audio within the filter span."""
+        return float(self._reference_peak.max()) >= 1e-4
+
+    def erle_db(self) -> float:
+        """Echo return loss enhancement (dB, higher is better) over recent echo-only blocks."""
+        if self._residual_energy > 0 and self._mic_energy > 0:
+            return float(10.0 * np.log10(self._mic_energy / self._residual_energy))
+        return 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Echo return loss enhancement (dB, higher is better) and double-talk share."""
+        return {
+            "erle_db": round(self.erle_db(), 1),
+            "filter_ms": round(1000.0 * self.partitions * self.block / self.sample_rate),
+            "double_talk_fraction": self.double_talk_blocks / self.blocks if self.blocks else 0.0,
+            "reference_underruns": self._fifo.underruns
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class EventLoopThread:
+    """One long-lived asyncio loop on a daemon thread, shared by the whole assistant.
+
+    Coroutines (TTS, prerendering, the task scheduler) run on it, and its
+    default executor is a single bounded pool for blocking I/O (HTTP clients,
+    LLM SDKs, IMAP/SMTP). Every method is safe to call from any thread,
+    including the Tk main loop.
+    """
+
+    def __init__(self, io_workers: int = 8, name: str = "event-loop"):
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io")
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self.executor)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "EventLoopThread":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and wait for its result (not from the loop itself)."""
+        if self.in_loop_thread():
+            coroutine.close()
+            raise RuntimeError("EventLoopThread.run() would block its own loop; await the coroutine instead")
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timed out or interrupted: don't leave the coroutine running unobserved
+            future.cancel()
+            raise
+
+    def run_blocking(self, function: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        """Run a blocking call on the shared I/O pool."""
+        return self.executor.submit(function, *args, **kwargs)
+
+    def call_soon(self, callback: Callable[..., Any], *args) -> None:
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self) -> None:
+        """Stop the loop; pending coroutines are abandoned with it."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            thread.join(timeout=2.0)
+        self.executor.shutdown(wait=False)
+
+
+_shared: Optional[EventLoopThread] = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop() -> EventLoopThread:
+    """The process-wide loop thread, started on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            from utils.config import Config
+            _shared = EventLoopThread(io_workers=Config.IO_WORKERS)
+        return _shared.start()
@@ -0,0 +1,311 @@
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except ImportError:
+    PYTTSX3_AVAILABLE = False
+
+# Premium voices to look for (in order of preference)
+PREMIUM_VOICES = [
+    "DAVID",      # Premium US male voice (best quality)
+    "MARK",       # Another good US male voice
+    "JAMES",      # British male voice with excellent quality
+    "RICHARD",    # Good male voice
+    "GEORGE"      # Another good male voice
+]
+
+
+class _SpeakJob:
+    """A queued utterance: sentences with their rate and the pause that follows."""
+
+    def __init__(self, segments: List[Tuple[str, int, float]], on_start: Optional[Callable[[], None]] = None):
+        self.segments = segments
+        self.next_index = 0
+        # Called (on the worker thread) once, when the driver actually starts talking
+        self.on_start = on_start
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+
+
+class OfflineTTSWorker(threading.Thread):
+    """Dedicated thread that owns one pyttsx3 engine for the life of the process.
+
+    Commands (speak, stop, set voice) arrive on a queue and are handled between
+    iterations of the engine's external run loop, so a stop reaches the driver
+    while it is still talking instead of after the current sentence.
+    """
+
+    def __init__(self, rate: int = 180, volume: float = 1.0, poll_interval: float = 0.02):
+        super().__init__(name="OfflineTTSWorker", daemon=True)
+        self.rate = rate
+        self.volume = volume
+        self.poll_interval = poll_interval
+        self.voice_name: Optional[str] = None
+        self.available = False
+
+        self._commands: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._running = True
+        self._engine = None
+        self._jobs: List[_SpeakJob] = []
+        self._current: Optional[_SpeakJob] = None
+        self._utterance_active = False
+        self._utterance_count = 0
+        self._resume_at = 0.0
+
+    def start_engine(self, timeout: float = 10.0) -> bool:
+        """Start the worker and wait for the engine to initialize."""
+        if not PYTTSX3_AVAILABLE:
+            print("pyttsx3 not available - offline voice disabled")
+            return False
+        if not self.is_alive():
+            self.start()
+        self._ready.wait(timeout)
+        return self.available
+
+    def speak(self, text: str, on_start: Optional[Callable[[], None]] = None) -> Future:
+        """Queue text for speaking; the future resolves to False if it was interrupted.
+
+        on_start runs on the worker thread when the first sentence begins to sound.
+        """
+        job = _SpeakJob(self._plan(text), on_start)
+        if not self.available or not self._post("speak", job):
+            job.future.set_exception(RuntimeError("Offline TTS engine is not available"))
+        return job.future
+
+    def stop(self) -> None:
+        """Cut off the current utterance and drop everything queued."""
+        self._post("stop", None)
+
+    def set_voice(self, voice: str) -> None:
+        """Switch to a voice by id or by (partial) name."""
+        self._post("voice", voice)
+
+    def shutdown(self) -> None:
+        """Stop speaking and end the worker thread."""
+        self._post("shutdown", None)
+
+    def is_busy(self) -> bool:
+        """Check whether anything is being spoken or waiting to be spoken."""
+        if not self.is_alive():
+            return False
+        return self._current is not None or bool(self._jobs) or not self._commands.empty()
+
+    def _post(self, command: str, arg) -> bool:
+        """Queue a command for the worker; a no-op (False) when the worker is not running."""
+        if not self.is_alive() or not self._running:
+            return False
+        self._commands.put((command, arg))
+        return True
+
+    def _plan(self, text: str) -> List[Tuple[str, int, float]]:
+        """Split text into sentences with per-sentence rate and trailing pause."""
+        text = text.strip()
+        if len(text.split()) <= 15:
+            return [(text, self.rate, 0.0)] if text else []
+
+        segments = []
+        for sentence in re.split(r'(?<=[.!?])\s+', text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            # Questions slightly slower, exclamations slightly faster
+            if sentence.endswith('?'):
+                segments.append((sentence, self.rate - 5, 0.15))
+            elif sentence.endswith('!'):
+                segments.append((sentence, self.rate + 5, 0.2))
+            else:
+                segments.append((sentence, self.rate, 0.1))
+        return segments
+
+    def run(self) -> None:
+        """Worker thread: initialize the engine, then pump commands and the run loop."""
+        try:
+            self._engine = pyttsx3.init()
+            self._engine.setProperty('rate', self.rate)
+            self._engine.setProperty('volume', self.volume)
+            self._select_voice()
+            self._engine.connect('started-utterance', self._on_started)
+            self._engine.connect('finished-utterance', self._on_finished)
+            # External loop: we drive the engine with iterate() between commands
+            self._engine.startLoop(False)
+            self.available = True
+            print("Offline TTS engine initialized with premium voice settings")
+        except Exception as e:
+            print(f"Error initializing pyttsx3: {e}")
+            self._running = False
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while self._running:
+            self._handle_commands()
+            self._advance()
+            try:
+                self._engine.iterate()
+            except Exception as e:
+                print(f"Offline TTS loop error: {e}")
+                self._finish_current(error=e)
+
+        try:
+            self._engine.endLoop()
+        except Exception:
+            pass
+        self.available = False
+        self._drain_commands()
+
+    def _drain_commands(self) -> None:
+        """Resolve commands that raced with shutdown so no caller waits on them."""
+        while True:
+            try:
+                command, arg = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if command == "speak" and not arg.future.done():
+                arg.future.set_result(False)
+
+    def _handle_commands(self) -> None:
+        idle = self._current is None and not self._jobs
+        try:
+            # Block briefly when idle instead of spinning the run loop
+            command, arg = self._commands.get(timeout=self.poll_interval if idle else 0)
+        except queue.Empty:
+            if not idle:
+                time.sleep(self.poll_interval / 4)
+            return
+        while True:
+            if command == "speak":
+                if arg.segments:
+                    self._jobs.append(arg)
+                else:
+                    arg.future.set_result(True)
+            elif command == "stop":
+                self._interrupt()
+            elif command == "voice":
+                self._change_voice(arg)
+            elif command == "shutdown":
+                self._interrupt()
+                self._running = False
+            try:
+                command, arg = self._commands.get_nowait()
+            except queue.Empty:
+                return
+
+    def _advance(self) -> None:
+        """Start the next sentence once the previous one and its pause are over."""
+        if self._utterance_active or time.monotonic() < self._resume_at:
+            return
+        if self._current is None:
+            if not self._jobs:
+                return
+            self._current = self._jobs.pop(0)
+        job = self._current
+        if job.next_index >= len(job.segments):
+            self._finish_current()
+            return
+        sentence, rate, _ = job.segments[job.next_index]
+        self._engine.setProperty('rate', rate)
+        self._utterance_count += 1
+        self._engine.say(sentence, f"utterance-{self._utterance_count}")
+        self._utterance_active = True
+
+    def _on_started(self, name) -> None:
+        """Engine callback (on this thread) when an utterance begins to play."""
+        job = self._current
+        if name != f"utterance-{self._utterance_count}" or job is None or job.on_start is None:
+            return
+        on_start, job.on_start = job.on_start, None
+        try:
+            on_start()
+        except Exception as e:
+            print(f"Error in offline TTS start callback: {e}")
+
+    def _on_finished(self, name, completed) -> None:
+        """Engine callback (on this thread) when an utterance ends."""
+        # Ignore late callbacks for utterances cut off by a stop
+        if name != f"utterance-{self._utterance_count}" or not self._utterance_active:
+            return
+        self._utterance_active = False
+        job = self._current
+        if job is None:
+            return
+        _, _, pause = job.segments[job.next_index]
+        job.next_index += 1
+        if job.next_index < len(job.segments):
+            self._resume_at = time.monotonic() + pause
+
+    def _interrupt(self) -> None:
+        """Stop the driver mid-utterance and resolve every pending job as interrupted."""
+        try:
+            self._engine.stop()
+        except Exception as e:
+            print(f"Error stopping offline TTS: {e}")
+        self._utterance_active = False
+        self._resume_at = 0.0
+        jobs = ([self._current] if self._current else []) + self._jobs
+        self._current = None
+        self._jobs = []
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_result(False)
+        if jobs:
+            print("Speech interrupted")
+
+    def _finish_current(self, error: Optional[Exception] = None) -> None:
+        job, self._current = self._current, None
+        self._utterance_active = False
+        self._resume_at = 0.0
+        if job is None or job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(True)
+
+    def _change_voice(self, voice: str) -> None:
+        try:
+            for candidate in self._engine.getProperty('voices'):
+                if candidate.id == voice or voice.upper() in candidate.name.upper():
+                    self._engine.setProperty('voice', candidate.id)
+                    self.voice_name = candidate.name
+                    print(f"Offline voice changed to: {candidate.name}")
+                    return
+            print(f"Offline voice not found: {voice}")
+        except Exception as e:
+            print(f"Error changing offline voice: {e}")
+
+    def _select_voice(self) -> None:
+        """Pick the best available voice, preferring the premium English ones."""
+        voices = self._engine.getProperty('voices')
+        print(f"Found {len(voices)} available voices")
+
+        # Try to find premium voices first
+        for premium in PREMIUM_VOICES:
+            for voice in voices:
+                name = voice.name.upper()
+                if premium in name and "EN" in name:
+                    self._engine.setProperty('voice', voice.id)
+                    self.voice_name = voice.name
+                    print(f"Using premium voice: {voice.name} (high quality)")
+                    return
+
+        # If no premium voice found, use any English male voice
+        for voice in voices:
+            name = voice.name.upper()
+            if "MALE" in name and "EN" in name:
+                self._engine.setProperty('voice', voice.id)
+                self.voice_name = voice.name
+                print(f"Using voice: {voice.name}")
+                return
+
+        # Last resort - use any voice
+        if voices:
+            self._engine.setProperty('voice', voices[0].id)
+            self.voice_name = voices[0].name
+            print(f"Using default voice: {voices[0].name}")
@@ -0,0 +1,101 @@
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from core.speech_recognizers import RecognitionStream
+
+# Called in spoken order with (utterance, transcript, error); exactly one of transcript/error is set
+DeliverFunction = Callable[[object, Optional[str], Optional[Exception]], None]
+
+
+class _Segment:
+    def __init__(self, sequence: int, stream: RecognitionStream, utterance):
+        self.sequence = sequence
+        self.stream = stream
+        self.utterance = utterance
+        self.submitted = time.monotonic()
+        self.recognized: Optional[float] = None
+        self.text: Optional[str] = None
+        self.error: Optional[Exception] = None
+
+
+class RecognitionPool:
+    """Finishes recognition of several utterances at once, delivering results in spoken order.
+
+    Every submitted segment gets a sequence number. Workers transcribe in
+    parallel (network round trips overlap) and park results in a reorder
+    buffer; whichever worker completes the next expected sequence delivers it
+    and everything contiguous behind it.
+    """
+
+    def __init__(self, deliver: DeliverFunction, workers: int = 3):
+        self.deliver = deliver
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognizer")
+        self._lock = threading.Lock()
+        # Held while calling deliver so results never overtake each other
+        self._deliver_lock = threading.Lock()
+        self._next_submit = 0
+        self._next_deliver = 0
+        self._done: Dict[int, _Segment] = {}
+        self.max_depth = 0
+        self._recognition_times = collections.deque(maxlen=50)
+        self._reorder_waits = collections.deque(maxlen=50)
+
+    def submit(self, stream: RecognitionStream, utterance) -> int:
+        """Queue an ended utterance for its final transcript; returns its sequence number."""
+        with self._lock:
+            segment = _Segment(self._next_submit, stream, utterance)
+            self._next_submit += 1
+            self.max_depth = max(self.max_depth, self._next_submit - self._next_deliver)
+        self._executor.submit(self._recognize, segment)
+        return segment.sequence
+
+    def depth(self) -> int:
+        """Segments submitted but not yet delivered."""
+        with self._lock:
+            return self._next_submit - self._next_deliver
+
+    def _recognize(self, segment: _Segment) -> None:
+        try:
+            segment.text = segment.stream.finish()
+        except Exception as e:
+            segment.error = e
+        segment.recognized = time.monotonic()
+        with self._lock:
+            self._done[segment.sequence] = segment
+        self._drain()
+
+    def _drain(self) -> None:
+        """Deliver every result that is next in line."""
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    segment = self._done.pop(self._next_deliver, None)
+                if segment is None:
+                    return
+                now = time.monotonic()
+                self._recognition_times.append(segment.recognized - segment.submitted)
+                self._reorder_waits.append(now - segment.recognized)
+                try:
+                    self.deliver(segment.utterance, segment.text, segment.error)
+                except Exception as e:
+                    print(f"Error delivering transcript: {e}")
+                with self._lock:
+                    self._next_deliver += 1
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Queue depth and per-segment latency (recognition, and time held for ordering)."""
+        recognition = sorted(self._recognition_times)
+        waits = sorted(self._reorder_waits)
+        return {
+            "queue_depth": self.depth(),
+            "max_queue_depth": self.max_depth,
+            "recognition_p50": recognition[len(recognition) // 2] if recognition else None,
+            "recognition_p90": recognition[int(0.9 * (len(recognition) - 1))] if recognition else None,
+            "reorder_wait_p90": waits[int(0.9 * (len(waits) - 1))] if waits else None
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,229 @@
+import collections
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.cancellation import CancellationToken, OperationCancelled
+from core.tracing import Trace
+
+# What happens when a request arrives while others from the same source are still waiting
+QUEUE = "queue"  # Wait in line behind them
+COALESCE = "coalesce"  # Append the text to the newest waiting request (a continued sentence)
+SUPERSEDE = "supersede"  # Replace them and cancel the one already running
+POLICIES = (QUEUE, COALESCE, SUPERSEDE)
+
+# Lower runs first
+PRIORITY_TYPED = 0
+PRIORITY_VOICE = 1
+
+
+class Request:
+    def __init__(self, request_id: int, text: str, source: str, priority: int,
+                 trace: Optional[Trace] = None):
+        self.id = request_id
+        self.text = text
+        self.source = source
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.parts = 1
+        # Everything working on the request (LLM, search, speech) watches this
+        self.token = CancellationToken()
+        # Latency trace of the turn (the latest input's, when several were merged)
+        self.trace = trace
+
+    def __lt__(self, other: "Request") -> bool:
+        return (self.priority, self.id) < (other.priority, other.id)
+
+    def __repr__(self) -> str:
+        return f"Request(#{self.id}, {self.source}, '{self.text[:40]}')"
+
+
+class RequestPipeline:
+    """Runs user requests on a fixed pool of workers from a bounded priority queue.
+
+    submit() never blocks and never silently drops input: each request is
+    queued, merged into a waiting request of the same source (COALESCE, or
+    whenever the queue is full) or replaces the waiting ones (SUPERSEDE), and
+    every outcome is logged and counted. Text from different sources is never
+    merged; a queue full of the other source's requests evicts its newest. With one worker, requests are handled strictly one at
+    a time, highest priority first and in arrival order within a priority.
+    """
+
+    def __init__(self, handler: Callable[[Request], None], workers: int = 1, max_pending: int = 8):
+        self.handler = handler
+        self.max_pending = max(1, max_pending)
+        self._heap: List[Request] = []
+        self._running: Dict[int, Request] = {}
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.overflowed = 0
+        self.evicted = 0
+        self.max_depth = 0
+        self._wait_times = collections.deque(maxlen=50)
+        self._service_times = collections.deque(maxlen=50)
+
+        self._workers = [threading.Thread(target=self._work, name=f"request-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, text: str, source: str = "typed", priority: int = PRIORITY_TYPED,
+               policy: str = QUEUE, trace: Optional[Trace] = None) -> Optional[Request]:
+        """Hand a request to the workers; returns the request that will carry the text."""
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown request policy: {policy}")
+        text = text.strip()
+        if not text:
+            return None
+        interrupted: List[Request] = []
+        with self._condition:
+            if self._closed:
+                print(f"Request pipeline stopped, not handling: '{text}'")
+                return None
+            self.submitted += 1
+            waiting = [r for r in self._heap if r.source == source]
+
+            if policy == SUPERSEDE:
+                for request in waiting:
+                    print(f"Superseded waiting request: '{request.text}'")
+                    if request.trace is not None:
+                        request.trace.finish("superseded")
+                interrupted = [r for r in self._running.values()
+                               if r.source == source and not r.token.cancelled]
+                self.superseded += len(waiting) + len(interrupted)
+                if waiting:
+                    self._heap = [r for r in self._heap if r.source != source]
+                    heapq.heapify(self._heap)
+                    waiting = []
+
+            if policy == COALESCE and waiting:
+                request = self._merge(max(waiting, key=lambda r: r.id), text, trace)
+            elif len(self._heap) >= self.max_pending and waiting:
+                # Keep the words rather than dropping them; the newest waiting request of this source absorbs them
+                self.overflowed += 1
+                target = max(waiting, key=lambda r: r.id)
+                print(f"Request queue full ({len(self._heap)} waiting), merging input into #{target.id}")
+                request = self._merge(target, text, trace)
+            else:
+                if len(self._heap) >= self.max_pending:
+                    # Full of the other source's requests: never mix voice and typed text,
+                    # make room by evicting the newest of them instead
+                    self.overflowed += 1
+                    self._evict(max(self._heap, key=lambda r: r.id))
+                request = Request(next(self._ids), text, source, priority, trace)
+                heapq.heappush(self._heap, request)
+                self.max_depth = max(self.max_depth, len(self._heap))
+                if self._running or len(self._heap) > 1:
+                    print(f"Queued request #{request.id} behind {len(self._running) + len(self._heap) - 1} others")
+                self._condition.notify()
+        # Outside the lock: cancellation callbacks may stop playback
+        for running in interrupted:
+            running.token.cancel("superseded")
+        return request
+
+    def _merge(self, request: Request, text: str, trace: Optional[Trace] = None) -> Request:
+        request.text = f"{request.text} {text}"
+        if trace is not None:
+            # The turn now ends with the newer input; the older trace stops here
+            if request.trace is not None:
+                request.trace.finish("coalesced")
+            request.trace = trace
+        request.parts += 1
+        self.coalesced += 1
+        print(f"Coalesced input into waiting request #{request.id}: '{request.text}'")
+        return request
+
+    def _evict(self, request: Request) -> None:
+        """Drop a waiting request to make room (call with the lock held)."""
+        self._heap.remove(request)
+        heapq.heapify(self._heap)
+        self.evicted += 1
+        print(f"Request queue full, evicted waiting {request.source} request #{request.id}: '{request.text}'")
+        if request.trace is not None:
+            request.trace.finish("evicted")
+
+    def depth(self) -> int:
+        """Requests waiting for a worker."""
+        with self._condition:
+            return len(self._heap)
+
+    def busy(self) -> bool:
+        """True while any request is waiting or running."""
+        with self._condition:
+            return bool(self._heap or self._running)
+
+    def cancel_running(self, reason: str = "interrupted") -> int:
+        """Cancel every request a worker is handling; returns how many were cancelled."""
+        with self._condition:
+            running = [r for r in self._running.values() if not r.token.cancelled]
+        for request in running:
+            request.token.cancel(reason)
+        return len(running)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                request = heapq.heappop(self._heap)
+                request.started = time.monotonic()
+                self._running[request.id] = request
+                self._wait_times.append(request.started - request.enqueued)
+            try:
+                self.handler(request)
+            except OperationCancelled:
+                pass
+            except Exception as e:
+                print(f"Error handling request #{request.id}: {e}")
+            finally:
+                with self._condition:
+                    self._running.pop(request.id, None)
+                    if request.token.cancelled:
+                        self.cancelled += 1
+                        print(f"Request #{request.id} {request.token.reason}: '{request.text}'")
+                    else:
+                        self.completed += 1
+                    self._service_times.append(time.monotonic() - request.started)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Queue depth, outcome counts and wait/service times (seconds)."""
+        with self._condition:
+            waits = sorted(self._wait_times)
+            services = sorted(self._service_times)
+            return {
+                "queue_depth": len(self._heap),
+                "running": len(self._running),
+                "max_queue_depth": self.max_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "coalesced": self.coalesced,
+                "superseded": self.superseded,
+                "overflowed": self.overflowed,
+                "evicted": self.evicted,
+                "wait_p50": waits[int(0.5 * (len(waits) - 1))] if waits else None,
+                "wait_p90": waits[int(0.9 * (len(waits) - 1))] if waits else None,
+                "service_p50": services[int(0.5 * (len(services) - 1))] if services else None
+            }
+
+    def shutdown(self) -> None:
+        """Stop the workers; running requests are cancelled, waiting ones reported and discarded."""
+        self.cancel_running("cancelled on shutdown")
+        with self._condition:
+            self._closed = True
+            for request in self._heap:
+                print(f"Discarding request on shutdown: '{request.text}'")
+            self._heap = []
+            self._condition.notify_all()
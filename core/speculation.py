@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from core.cancellation import CancellationToken, OperationCancelled
+from core.command_handler import CommandHandler
+from core.speech_recognizers import PartialHypothesis
+
+
+class _Speculation:
+    def __init__(self, key: tuple, text: str, future: Future, token: CancellationToken):
+        self.key = key
+        self.text = text
+        self.future = future
+        self.token = token
+        self.started = time.monotonic()
+
+
+class SpeculativeDispatcher:
+    """Starts side-effect-free commands on the stable part of an interim transcript.
+
+    When the final transcript arrives, commit() hands back the speculative
+    result if the final text resolves to the same command and arguments;
+    otherwise the speculation is cancelled (or its result discarded) and the
+    caller handles the input normally.
+    """
+
+    def __init__(self, command_handler: CommandHandler, min_stability: float = 0.5, workers: int = 2):
+        self.command_handler = command_handler
+        self.min_stability = min_stability
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+        self._current: Optional[_Speculation] = None
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.head_start_seconds = 0.0
+
+    def on_partial(self, hypothesis: PartialHypothesis) -> None:
+        """Called with each interim transcript; may launch a speculative command."""
+        if hypothesis.stability < self.min_stability or not hypothesis.stable_text:
+            return
+        key = self.command_handler.speculative_key(hypothesis.stable_text)
+        if key is None:
+            return
+        with self._lock:
+            if self._current is not None and self._current.key == key:
+                return
+            self._drop_current()
+            token = CancellationToken()
+            future = self._executor.submit(self.command_handler.run_speculative, hypothesis.stable_text, token)
+            self._current = _Speculation(key, hypothesis.stable_text, future, token)
+            self.started += 1
+        print(f"Speculatively running command for: '{hypothesis.stable_text}'")
+
+    def commit(self, text: str, token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Result of the speculation if it matches the final transcript, else None.
+
+        Waiting for the result stops (OperationCancelled) if the request's token is cancelled.
+        """
+        with self._lock:
+            speculation, self._current = self._current, None
+        if speculation is None:
+            return None
+        if self.command_handler.speculative_key(text) != speculation.key:
+            speculation.token.cancel("speculation missed")
+            speculation.future.cancel()
+            self.misses += 1
+            return None
+        # Time the command had already been running when the final transcript arrived
+        head_start = time.monotonic() - speculation.started
+        try:
+            response = token.result(speculation.future) if token is not None else speculation.future.result()
+        except OperationCancelled:
+            speculation.token.cancel("request cancelled")
+            raise
+        except Exception as e:
+            print(f"Speculative command failed: {e}")
+            self.misses += 1
+            return None
+        self.head_start_seconds += head_start
+        self.hits += 1
+        if response:
+            self.command_handler.remember(text, response)
+        return response
+
+    def cancel(self) -> None:
+        """Abandon any running speculation (e.g. the utterance was dropped)."""
+        with self._lock:
+            self._drop_current()
+
+    def _drop_current(self) -> None:
+        if self._current is not None:
+            # Running handlers stop at their next network call
+            self._current.token.cancel("speculation dropped")
+            self._current.future.cancel()
+            self.misses += 1
+            self._current = None
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "head_start_seconds": round(self.head_start_seconds, 2)
+        }
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class SpeechPipeline:
+    """Producer/consumer pipeline that synthesizes upcoming sentences while the current one plays."""
+
+    def __init__(self,
+                 synthesize: Callable[[str], Awaitable[Any]],
+                 play: Callable[[str, Any], Awaitable[None]],
+                 should_stop: Callable[[], bool],
+                 discard: Optional[Callable[[Any], None]] = None,
+                 pause_for: Optional[Callable[[str], float]] = None,
+                 lookahead: int = 2):
+        self.synthesize = synthesize
+        self.play = play
+        self.should_stop = should_stop
+        self.discard = discard
+        self.pause_for = pause_for
+        # Number of rendered sentences allowed to wait for playback
+        self.lookahead = max(1, lookahead)
+        self.played = 0
+        self.errors: List[Exception] = []
+
+    async def run(self, sentences: List[str]) -> int:
+        """Speak the sentences in order and return how many were played."""
+        sentences = [s.strip() for s in sentences if s and s.strip()]
+        if not sentences:
+            return 0
+
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.lookahead)
+        producer = asyncio.create_task(self._produce(sentences, ready))
+        try:
+            await self._consume(len(sentences), ready)
+        finally:
+            if not producer.done():
+                producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+            self._drain(ready)
+        return self.played
+
+    async def _produce(self, sentences: List[str], ready: asyncio.Queue) -> None:
+        """Render sentences ahead of playback, bounded by the queue size."""
+        for index, sentence in enumerate(sentences):
+            if self.should_stop():
+                break
+            try:
+                item = await self.synthesize(sentence)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error synthesizing sentence {index+1}/{len(sentences)}: {e}")
+                self.errors.append(e)
+                item = None
+            try:
+                await ready.put((index, sentence, item))
+            except asyncio.CancelledError:
+                if item is not None:
+                    self._discard(item)
+                raise
+        # End-of-stream marker for the consumer
+        await ready.put(None)
+
+    async def _consume(self, total: int, ready: asyncio.Queue) -> None:
+        """Play rendered sentences as soon as they become available."""
+        while True:
+            if self.should_stop():
+                print("Speech interrupted")
+                return
+
+            try:
+                # Poll so a stop request is noticed even while synthesis is slow
+                entry = await asyncio.wait_for(ready.get(), timeout=0.1)
+            except asyncio.TimeoutError:
+                continue
+            if entry is None:
+                return
+
+            index, sentence, item = entry
+            if item is None:
+                continue
+            if self.should_stop():
+                self._discard(item)
+                print("Speech interrupted")
+                return
+
+            print(f"Speaking sentence {index+1}/{total}")
+            try:
+                await self.play(sentence, item)
+                self.played += 1
+            finally:
+                self._discard(item)
+
+            # Natural pause between sentences; synthesis keeps running meanwhile
+            if self.pause_for and index < total - 1 and not self.should_stop():
+                pause = self.pause_for(sentence)
+                if pause > 0:
+                    await asyncio.sleep(pause)
+
+    def _drain(self, ready: asyncio.Queue) -> None:
+        """Release anything rendered but never played."""
+        while True:
+            try:
+                entry = ready.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if entry is not None and entry[2] is not None:
+                self._discard(entry[2])
+
+    def _discard(self, item: Any) -> None:
+        if self.discard:
+            try:
+                self.discard(item)
+            except Exception:
+                pass
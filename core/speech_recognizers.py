@@ -0,0 +1,324 @@
+import collections
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from utils.config import Config
+
+# Local recognition (optional - heavy dependency)
+try:
+    import torch
+    import whisper
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+
+
+class PartialHypothesis:
+    """Interim transcript of an utterance that is still being spoken.
+
+    stable_text is the prefix that the last few decodes agreed on and is
+    unlikely to change; stability is the fraction of words inside it.
+    """
+
+    def __init__(self, text: str, stable_text: str, stability: float):
+        self.text = text
+        self.stable_text = stable_text
+        self.stability = stability
+
+    def __repr__(self) -> str:
+        return f"PartialHypothesis({self.text!r}, stable={self.stable_text!r}, {self.stability:.2f})"
+
+
+class HypothesisStabilizer:
+    """Local agreement: words count as stable once `agreement` consecutive decodes share them."""
+
+    def __init__(self, agreement: int = 2):
+        self.agreement = agreement
+        self._history = collections.deque(maxlen=agreement)
+
+    def update(self, text: str) -> PartialHypothesis:
+        words = text.split()
+        self._history.append([w.lower().strip(".,!?") for w in words])
+        stable = 0
+        if len(self._history) == self.agreement:
+            for column in zip(*self._history):
+                if any(w != column[0] for w in column):
+                    break
+                stable += 1
+        return PartialHypothesis(text, " ".join(words[:stable]), stable / len(words) if words else 0.0)
+
+
+class RecognitionStream:
+    """One utterance being transcribed; frames are 16-bit mono PCM at the capture rate.
+
+    The default stream just collects frames and transcribes them when the
+    utterance ends. Backends that can decode incrementally override it.
+    """
+
+    def __init__(self, backend: "SpeechRecognizerBackend", sample_rate: int, sample_width: int):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self._frames = bytearray()
+        # Called (from a decoder thread) with each PartialHypothesis, if the backend produces them
+        self.on_partial: Optional[Callable[[PartialHypothesis], None]] = None
+
+    def feed(self, frames: bytes) -> None:
+        """Append captured audio (bytes or a contiguous int16 array)."""
+        # Through a byte view: bytearray += ndarray would broadcast instead of appending
+        self._frames += memoryview(frames).cast("B")
+
+    def partial(self) -> str:
+        """Best transcript so far (empty if the backend only decodes at the end)."""
+        return ""
+
+    def duration(self) -> float:
+        return len(self._frames) / float(self.sample_rate * self.sample_width)
+
+    def finish(self) -> str:
+        """End the utterance and return the final transcript."""
+        return self.backend.transcribe(sr.AudioData(bytes(self._frames), self.sample_rate, self.sample_width))
+
+
+class SpeechRecognizerBackend:
+    """Interface for speech recognizers used by the voice engine."""
+
+    name = "base"
+    # True if start_stream() decodes while the user is still talking
+    streaming = False
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        """Transcribe a complete utterance; returns "" if nothing was understood."""
+        raise NotImplementedError
+
+    def start_stream(self, sample_rate: int, sample_width: int) -> RecognitionStream:
+        """Begin an utterance that is fed frame by frame."""
+        return RecognitionStream(self, sample_rate, sample_width)
+
+    def stats(self) -> Dict[str, float]:
+        """Backend-specific performance figures."""
+        return {}
+
+
+class GoogleRecognizer(SpeechRecognizerBackend):
+    """Google Web Speech API, with optional offline Sphinx fallback when the service fails."""
+
+    name = "google"
+
+    def __init__(self, recognizer: sr.Recognizer, sphinx_fallback: bool = True):
+        self.recognizer = recognizer
+        self.sphinx_fallback = sphinx_fallback
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        try:
+            return self.recognizer.recognize_google(audio) or ""
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            print(f"Speech service error: {e}")
+            if not self.sphinx_fallback:
+                raise
+            try:
+                return self.recognizer.recognize_sphinx(audio) or ""
+            except sr.UnknownValueError:
+                return ""
+            except Exception:
+                # Sphinx not installed - report the original service failure
+                raise e
+
+
+class StubRecognizer(SpeechRecognizerBackend):
+    """Returns a fixed transcript after a simulated delay - for benchmarks and headless tests."""
+
+    name = "stub"
+
+    def __init__(self, text: str = "This is a stub transcript.", latency: float = 0.0):
+        self.text = text
+        self.latency = latency
+        self.calls = 0
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.text
+
+    def stats(self) -> Dict[str, float]:
+        return {"calls": self.calls, "latency": self.latency}
+
+
+class _WhisperStream(RecognitionStream):
+    """Re-decodes the growing utterance in the background every step of new audio.
+
+    Partials cover at most the last partial_window_seconds, so each one costs
+    the same however long the utterance gets, and they never wait behind
+    another decode (a busy model skips the step). Partials of a truncated
+    window are shown but carry no stable text to act on.
+    """
+
+    def __init__(self, backend: "WhisperRecognizer", sample_rate: int, sample_width: int):
+        super().__init__(backend, sample_rate, sample_width)
+        self._step_bytes = int(backend.step_seconds * sample_rate * sample_width)
+        self._window_bytes = int(backend.partial_window_seconds * sample_rate) * sample_width
+        self._text = ""
+        self._decoded_bytes = 0
+        # Whether the last partial decoded the whole utterance (and can serve as the final text)
+        self._text_is_whole = False
+        self._worker: Optional[threading.Thread] = None
+        self._stabilizer = HypothesisStabilizer()
+
+    def feed(self, frames: bytes) -> None:
+        super().feed(frames)
+        if len(self._frames) - self._decoded_bytes < self._step_bytes:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            # Still decoding the previous step; the next feed will catch up
+            return
+        end = len(self._frames)
+        snapshot = bytes(self._frames[-self._window_bytes:])
+        self._worker = threading.Thread(target=self._decode_snapshot, args=(snapshot, end), daemon=True)
+        self._worker.start()
+
+    def _decode_snapshot(self, snapshot: bytes, end: int) -> None:
+        # Skipped or not, this step is done; the next one comes after another step of audio
+        self._decoded_bytes = end
+        try:
+            text = self.backend.decode_pcm(snapshot, self.sample_rate, self.sample_width, wait=False)
+        except Exception as e:
+            print(f"Whisper partial decode error: {e}")
+            return
+        if text is None:
+            return
+        self._text = text
+        self._text_is_whole = len(snapshot) == end
+        if self._text_is_whole:
+            hypothesis = self._stabilizer.update(text)
+        else:
+            hypothesis = PartialHypothesis(text, "", 0.0)
+        if self.on_partial and hypothesis.text:
+            try:
+                self.on_partial(hypothesis)
+            except Exception as e:
+                print(f"Error handling partial transcript: {e}")
+
+    def partial(self) -> str:
+        return self._text
+
+    def finish(self) -> str:
+        if self._worker is not None:
+            self._worker.join()
+        # The last partial is final if it covered the whole utterance and no audio arrived after it
+        if self._text_is_whole and self._decoded_bytes == len(self._frames):
+            return self._text
+        return self.backend.decode_pcm(bytes(self._frames), self.sample_rate, self.sample_width)
+
+
+class WhisperRecognizer(SpeechRecognizerBackend):
+    """Local openai-whisper model, loaded once and decoded on the CPU."""
+
+    name = "whisper"
+    streaming = True
+    SAMPLE_RATE = 16000  # Whisper's native input rate
+
+    def __init__(self, model_size: str = "base.en", threads: int = 4, step_seconds: float = 1.0,
+                 language: str = "en", partial_window_seconds: float = 8.0):
+        if not WHISPER_AVAILABLE:
+            raise RuntimeError("openai-whisper is not installed")
+        self.model_size = model_size
+        self.threads = threads
+        self.step_seconds = step_seconds
+        self.language = language
+        self.partial_window_seconds = partial_window_seconds
+
+        torch.set_num_threads(threads)
+        print(f"Loading Whisper model '{model_size}' on CPU ({threads} threads)...")
+        self.model = whisper.load_model(model_size, device="cpu")
+        # The model is not safe to run from two threads at once
+        self._decode_lock = threading.Lock()
+        self._recent_rtf = collections.deque(maxlen=50)
+        self.decodes = 0
+        self.skipped_partials = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        return self.decode_pcm(audio.get_raw_data(convert_width=2), audio.sample_rate, 2)
+
+    def start_stream(self, sample_rate: int, sample_width: int) -> RecognitionStream:
+        return _WhisperStream(self, sample_rate, sample_width)
+
+    def decode_pcm(self, pcm: bytes, sample_rate: int, sample_width: int, wait: bool = True) -> Optional[str]:
+        """Decode 16-bit PCM and record the real-time factor.
+
+        With wait=False, returns None instead of queueing behind a decode
+        that is already running.
+        """
+        samples = self._to_model_input(pcm, sample_rate, sample_width)
+        if not len(samples):
+            return ""
+        duration = len(samples) / float(self.SAMPLE_RATE)
+        if not self._decode_lock.acquire(blocking=wait):
+            self.skipped_partials += 1
+            return None
+        start = time.perf_counter()
+        try:
+            result = self.model.transcribe(
+                samples,
+                language=self.language,
+                fp16=False,  # CPU only
+                temperature=0.0,
+                condition_on_previous_text=False,
+                without_timestamps=True
+            )
+        finally:
+            self._decode_lock.release()
+        elapsed = time.perf_counter() - start
+        self.decodes += 1
+        self.audio_seconds += duration
+        self.decode_seconds += elapsed
+        self._recent_rtf.append(elapsed / duration)
+        return result.get("text", "").strip()
+
+    def _to_model_input(self, pcm: bytes, sample_rate: int, sample_width: int) -> np.ndarray:
+        """16-bit PCM at any rate -> float32 in [-1, 1] at 16 kHz."""
+        if sample_width != 2:
+            raise ValueError("Whisper backend expects 16-bit audio")
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if sample_rate != self.SAMPLE_RATE and len(samples):
+            count = int(len(samples) * self.SAMPLE_RATE / sample_rate)
+            positions = np.linspace(0, len(samples) - 1, count)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        return samples
+
+    def stats(self) -> Dict[str, float]:
+        """Real-time factor (decode time / audio time); below 1.0 keeps up with speech."""
+        recent = sorted(self._recent_rtf)
+        return {
+            "model": self.model_size,
+            "threads": self.threads,
+            "decodes": self.decodes,
+            "skipped_partials": self.skipped_partials,
+            "audio_seconds": round(self.audio_seconds, 2),
+            "decode_seconds": round(self.decode_seconds, 2),
+            "rtf": self.decode_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+            "rtf_p90": recent[int(0.9 * (len(recent) - 1))] if recent else 0.0
+        }
+
+
+def create_speech_recognizer(name: str, recognizer: sr.Recognizer) -> SpeechRecognizerBackend:
+    """Build the configured recognizer, falling back to Google if it cannot be loaded."""
+    if name == "whisper":
+        try:
+            return WhisperRecognizer(Config.WHISPER_MODEL, Config.WHISPER_THREADS, Config.WHISPER_STEP_SECONDS,
+                                     partial_window_seconds=Config.WHISPER_PARTIAL_WINDOW_SECONDS)
+        except Exception as e:
+            print(f"Could not load Whisper recognizer, using Google instead: {e}")
+    elif name == "stub":
+        return StubRecognizer()
+    elif name != "google":
+        print(f"Unknown speech recognizer '{name}', using Google")
+    return GoogleRecognizer(recognizer)
@@ -0,0 +1,285 @@
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# A replacement is a template string or a function of the rule's groups (index 0 is the whole match)
+Replacement = Union[str, Callable[[Tuple[str, ...]], str]]
+
+
+class TextNormalizer:
+    """Lexicon-driven text rewriter that applies every rule in a single regex scan.
+
+    Rules are (pattern, replacement) pairs tried in order at each position, so an
+    earlier rule wins when two could match at the same place. Replacement strings
+    may use \\1-style references to the rule's own groups; replacement functions
+    get a tuple of the rule's groups numbered the same way. Phrases (plain substrings) and
+    lexicon entries (whole words) are tried before the rules.
+
+    Each alternative ends in an empty marker group instead of being wrapped in a
+    named group, so alternatives that begin with a literal or a character class
+    are rejected by the regex engine without backtracking at positions where they
+    cannot start. Rules should begin with one where possible.
+    """
+
+    def __init__(self, rules: Optional[List[Tuple[str, Replacement]]] = None,
+                 lexicon: Optional[Dict[str, str]] = None,
+                 phrases: Optional[Dict[str, str]] = None,
+                 squeeze_whitespace: bool = False):
+        self.rules = list(rules or [])
+        self.lexicon: Dict[str, str] = dict(lexicon or {})
+        self.phrases: Dict[str, str] = dict(phrases or {})
+        self.squeeze_whitespace = squeeze_whitespace
+        self._pattern = None
+        # Marker group name -> constant string or callable taking the match
+        self._handlers: Dict[str, Union[str, Callable[[re.Match], str]]] = {}
+        self.compile()
+
+    def add_lexicon(self, entries: Dict[str, str]) -> None:
+        """Add or override whole-word substitutions and recompile."""
+        self.lexicon.update(entries)
+        self.compile()
+
+    def load_lexicon(self, path: str) -> int:
+        """Load a JSON pronunciation dictionary ({"term": "spoken form"}); returns entries loaded."""
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading pronunciation dictionary {path}: {e}")
+            return 0
+        entries = {str(k): str(v) for k, v in entries.items() if k}
+        self.add_lexicon(entries)
+        return len(entries)
+
+    def compile(self) -> None:
+        """Compile phrases, lexicon and every rule into one alternation."""
+        alternatives = []
+        self._handlers = {}
+        group_offset = 0
+
+        def add(pattern: str, replacement: Replacement = None, handler=None) -> None:
+            nonlocal group_offset
+            name = f"r{len(alternatives)}"
+            inner_groups = re.compile(pattern).groups
+            alternatives.append(f"(?:{pattern})(?P<{name}>)")
+            self._handlers[name] = handler or self._make_handler(replacement, group_offset, inner_groups)
+            group_offset += inner_groups + 1
+
+        phrases, lexicon = self.phrases, self.lexicon
+        for pattern in self._literal_alternatives(phrases, whole_word=False):
+            add(pattern, handler=lambda m: phrases[m.group(0)])
+        for pattern in self._literal_alternatives(lexicon, whole_word=True):
+            add(pattern, handler=lambda m: lexicon[m.group(0)])
+        for pattern, replacement in self.rules:
+            add(pattern, replacement)
+
+        self._pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def normalize(self, text: str) -> str:
+        """Rewrite text in one scan."""
+        if not text:
+            return text
+        if self._pattern is not None:
+            text = self._pattern.sub(self._dispatch, text)
+        if self.squeeze_whitespace:
+            text = ' '.join(text.split())
+        return text
+
+    __call__ = normalize
+
+    def _dispatch(self, match: re.Match) -> str:
+        # The marker group closes last, so it names the alternative that matched
+        handler = self._handlers[match.lastgroup]
+        return handler if handler.__class__ is str else handler(match)
+
+    @staticmethod
+    def _literal_alternatives(terms: Dict[str, str], whole_word: bool) -> List[str]:
+        """One alternative per leading character, longest terms first."""
+        by_first: Dict[str, List[str]] = {}
+        for term in sorted(terms, key=len, reverse=True):
+            by_first.setdefault(term[0], []).append(term)
+        patterns = []
+        for first, group in by_first.items():
+            rests = '|'.join(re.escape(t[1:]) for t in group)
+            if whole_word:
+                # Lookbehind sits after the first character so the literal still leads
+                patterns.append(f"{re.escape(first)}(?<!\\w.)(?:{rests})(?!\\w)")
+            else:
+                patterns.append(f"{re.escape(first)}(?:{rests})")
+        return patterns
+
+    @staticmethod
+    def _make_handler(replacement, offset: int, inner_groups: int):
+        if callable(replacement):
+            indices = (0,) + tuple(range(offset + 1, offset + inner_groups + 1))
+            if len(indices) == 1:
+                return lambda m: replacement((m.group(0),))
+            return lambda m: replacement(m.group(*indices))
+        if '\\' not in replacement:
+            return replacement
+        # Renumber \1-style references to absolute groups in the combined pattern
+        template = re.sub(r'\\(\d+)', lambda g: f"\\g<{int(g.group(1)) + offset}>", replacement)
+        return lambda m: m.expand(template)
+
+
+# Markdown emphasis wrappers whose content is kept
+_MARKDOWN_UNWRAP = [
+    r'\*\*(.+?)\*\*',   # **bold**
+    r'\*(.+?)\*',       # *italic*
+    r'\_(.+?)\_',       # _underline_
+    r'\`(.+?)\`',       # `code`
+    r'\~\~(.+?)\~\~',   # ~~strikethrough~~
+]
+
+# Pronunciation fixes for the offline voice
+TECH_TERMS = {
+    "AI": "A.I.",
+    "API": "A.P.I.",
+    "UI": "U.I.",
+    "JSON": "Jason",
+    "vs.": "versus",
+    "etc.": "etcetera",
+    "i.e.": "that is",
+    "e.g.": "for example",
+    "ML": "machine learning",
+    "DL": "deep learning",
+    "NLP": "natural language processing",
+    "CV": "computer vision",
+    "DB": "database",
+    "OS": "operating system",
+    "IDE": "integrated development environment",
+    "VM": "virtual machine",
+    "OOP": "object oriented programming",
+    "HTTP": "H.T.T.P.",
+    "HTML": "H.T.M.L.",
+    "CSS": "C.S.S.",
+    "URL": "U.R.L.",
+    "SEO": "S.E.O.",
+    "CPU": "C.P.U.",
+    "GPU": "G.P.U.",
+    "RAM": "ram",
+    "SSD": "S.S.D.",
+    "HDD": "H.D.D.",
+    "USB": "U.S.B.",
+    "WiFi": "Wi-Fi",
+    "IP": "I.P.",
+    "GUI": "G.U.I.",
+    "CLI": "C.L.I.",
+    "SDK": "S.D.K.",
+    "JDK": "J.D.K.",
+    "JVM": "J.V.M.",
+    "JIT": "J.I.T.",
+    "JAR": "jar",
+    "WAR": "war",
+    "EAR": "ear",
+    "JSP": "J.S.P.",
+    "JSF": "J.S.F.",
+    "JPA": "J.P.A.",
+    "JMS": "J.M.S.",
+    "JNDI": "J.N.D.I.",
+    "JMX": "J.M.X.",
+    "JNI": "J.N.I.",
+    "JAAS": "J.A.A.S.",
+    "JAWS": "jaws",
+}
+
+# Literal phrase rewrites that make AI output sound less formal
+RESPONSE_PHRASES = {
+    "I apologize, but ": "",
+    "I'm sorry, but ": "",
+    "As an AI, I ": "I ",
+    "As an AI assistant, I ": "I ",
+    "I'm an AI assistant": "I'm Jarvis",
+    "I am ": "I'm ",
+    "You are ": "You're ",
+    "It is ": "It's ",
+    "That is ": "That's ",
+    "cannot": "can't",
+    "Cannot": "Can't",
+    "Is there anything else you would like to know?": "",
+    "Is there anything else I can help you with?": "",
+    "Is there anything else you'd like to know?": "",
+    "Is there anything else you need?": "",
+    "Let me know if you need anything else.": "",
+}
+
+
+def _speak_number(groups: Tuple[str, ...]) -> str:
+    """Spell out the symbol in "50%", "4+" or "1920x1080"."""
+    text = groups[0]
+    if text.endswith('%'):
+        return text[:-1] + ' percent'
+    if text.endswith('+'):
+        return text[:-1] + ' plus'
+    width, height = text.split('x', 1)
+    return f"{width} by {height}"
+
+
+def _unwrap_rules(normalizer_ref: List["TextNormalizer"]) -> List[Tuple[str, Replacement]]:
+    """Markdown wrappers replaced by their (recursively normalized) content."""
+    return [(pattern, lambda groups: normalizer_ref[0].normalize(groups[1]))
+            for pattern in _MARKDOWN_UNWRAP]
+
+
+def create_pronunciation_normalizer() -> TextNormalizer:
+    """Normalizer for offline TTS: acronyms, units and pause hints."""
+    rules = [
+        # Percentages, "4+" and dimensions like "1920x1080"
+        (r'\d\d*(?:%|\+|x\d+)', _speak_number),
+        # Slight pauses with commas before discourse markers
+        (r'\s(?<=\w\s)\s*(?=(?:however|therefore|moreover|furthermore|nevertheless|consequently)\b)', ', '),
+        # Ensure proper spacing after punctuation
+        (r'([.!?;:])\s*(?=[A-Za-z])', r'\1 '),
+    ]
+    return TextNormalizer(rules, TECH_TERMS)
+
+
+def create_speech_cleaner(dictionary_path: Optional[str] = None) -> TextNormalizer:
+    """Normalizer that strips markdown and normalizes punctuation before any TTS backend."""
+    ref: List[TextNormalizer] = []
+    rules = [
+        # Markdown code blocks are hard to read aloud
+        (r'```[a-zA-Z]*\n(?s:.*?)\n```', 'code example'),
+    ] + _unwrap_rules(ref) + [
+        # Replace URLs with something more speakable
+        (r'https?://[^\s]+', 'a link'),
+        # Normalize spacing around punctuation; ellipsis becomes a comma, decimals are left alone
+        (r'\s\s*(?=\.\.\.|\.(?!\d)|[!?,])', ''),
+        (r'\.\.\.+\s*', ', '),
+        (r'\.(?!\d)\s*', '. '),
+        (r'\!\s*', '! '),
+        (r'\?\s*', '? '),
+        (r'\,\s*', ', '),
+    ]
+    normalizer = TextNormalizer(rules)
+    ref.append(normalizer)
+    if dictionary_path:
+        normalizer.load_lexicon(dictionary_path)
+    return normalizer
+
+
+def create_response_cleaner() -> TextNormalizer:
+    """Normalizer that makes AI responses conversational and speech-ready."""
+    ref: List[TextNormalizer] = []
+    rules = [
+        # Remove code blocks entirely, replace with simple mention
+        (r'```[\s\S]*?```', 'code example'),
+        # Convert list markers to natural speech patterns
+        (r'(?m:^)[ \t]*[\-\*\+][ \t]+', 'Here is a point: '),
+        (r'(?m:^)[ \t]*\d+\.[ \t]+', 'Point number: '),
+    ] + _unwrap_rules(ref) + [
+        # Replace URLs with something more speakable
+        (r'https?://[^\s]+', 'a link'),
+        # Add space after sentence punctuation
+        (r'[.!?](?=[A-Z])', lambda groups: groups[0] + ' '),
+        # Remove or simplify other special characters
+        (r'[#\~\^\{\}\[\]\|\<\>\(\)]', ' '),
+        (r'&', ' and '),
+        (r'/', ' or '),
+    ]
+    normalizer = TextNormalizer(rules, phrases=RESPONSE_PHRASES, squeeze_whitespace=True)
+    ref.append(normalizer)
+    return normalizer
@@ -0,0 +1,190 @@
+import contextlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+class Trace:
+    """Timeline of one turn: point events (marks) and timed spans, in ms from the origin.
+
+    The origin is the end of the user's speech for voice turns and the moment
+    the text was entered for typed ones. Marks and spans may be added from any
+    thread; finish() writes the turn once.
+    """
+
+    def __init__(self, tracer: "Tracer", trace_id: int, kind: str, origin: Optional[float] = None):
+        self.tracer = tracer
+        self.id = trace_id
+        self.kind = kind
+        self.origin = origin if origin is not None else time.monotonic()
+        self.wall_time = time.time() - (time.monotonic() - self.origin)
+        self.attrs: Dict[str, object] = {}
+        self.marks: List[dict] = []
+        self.spans: List[dict] = []
+        self._lock = threading.Lock()
+        self.finished = False
+
+    def _ms(self, at: Optional[float] = None) -> float:
+        return round(1000.0 * ((at if at is not None else time.monotonic()) - self.origin), 1)
+
+    def mark(self, name: str, at: Optional[float] = None, **attrs) -> None:
+        """Record that something happened now (or at the given monotonic time)."""
+        with self._lock:
+            self.marks.append({"name": name, "ms": self._ms(at), **attrs})
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs) -> Iterator[dict]:
+        """Time a block; the yielded dict takes extra attributes."""
+        start = time.monotonic()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            with self._lock:
+                self.spans.append({"name": name, "start_ms": self._ms(start),
+                                   "ms": round(1000.0 * (time.monotonic() - start), 1), **attrs})
+
+    def set(self, **attrs) -> None:
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def finish(self, status: str = "ok") -> None:
+        """Write the trace (only the first call counts)."""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            record = {
+                "trace": self.id,
+                "kind": self.kind,
+                "time": round(self.wall_time, 3),
+                "status": status,
+                "attrs": self.attrs,
+                "marks": sorted(self.marks, key=lambda m: m["ms"]),
+                "spans": self.spans
+            }
+        self.tracer.write(record)
+
+
+class Tracer:
+    """Appends finished turn traces to a JSONL file."""
+
+    def __init__(self, path: str = "traces.jsonl"):
+        self.path = path
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def start(self, kind: str, origin: Optional[float] = None) -> Trace:
+        """Begin a turn; origin is a time.monotonic() value (default now)."""
+        return Trace(self, next(self._ids), kind, origin)
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        try:
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self.written += 1
+        except OSError as e:
+            print(f"Could not write trace: {e}")
+
+
+# Helpers that accept None, so call sites need no "if trace" checks when tracing is off
+
+def mark(trace: Optional[Trace], name: str, **attrs) -> None:
+    if trace is not None:
+        trace.mark(name, **attrs)
+
+
+@contextlib.contextmanager
+def span(trace: Optional[Trace], name: str, **attrs) -> Iterator[dict]:
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, **attrs) as extra:
+        yield extra
+
+
+def load(path: str) -> List[dict]:
+    """Read a trace file, skipping lines that are not valid JSON."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(records: List[dict]) -> Dict[str, Dict[str, float]]:
+    """Per-stage latency percentiles (ms).
+
+    Stages are the gaps between consecutive marks of a turn ("a -> b"), the
+    spans by name, and "total", the time from the origin to the first audio.
+    """
+    samples: Dict[str, List[float]] = {}
+    order: Dict[str, float] = {}
+    for record in records:
+        marks = record.get("marks", [])
+        for previous, current in zip(marks, marks[1:]):
+            stage = f"{previous['name']} -> {current['name']}"
+            samples.setdefault(stage, []).append(current["ms"] - previous["ms"])
+            order[stage] = min(order.get(stage, float("inf")), current["ms"])
+        for item in record.get("spans", []):
+            name = f"[{item['name']}]"
+            samples.setdefault(name, []).append(item["ms"])
+            order[name] = min(order.get(name, float("inf")), item["start_ms"] + item["ms"])
+        first_audio = next((m["ms"] for m in marks if m["name"] == "first_audio"), None)
+        if first_audio is not None:
+            samples.setdefault("total (to first audio)", []).append(first_audio)
+            order["total (to first audio)"] = float("inf")
+
+    summary = {}
+    for stage in sorted(samples, key=lambda s: order[s]):
+        values = sorted(samples[stage])
+        summary[stage] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99)
+        }
+    return summary
+
+
+def print_summary(path: str, kind: Optional[str] = None) -> None:
+    records = [r for r in load(path) if kind is None or r.get("kind") == kind]
+    if not records:
+        print(f"No traces in {path}")
+        return
+    statuses: Dict[str, int] = {}
+    for record in records:
+        statuses[record.get("status", "?")] = statuses.get(record.get("status", "?"), 0) + 1
+    print(f"{len(records)} turns from {path} ({', '.join(f'{n} {s}' for s, n in sorted(statuses.items()))})")
+    print(f"{'stage':<40}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in summarize(records).items():
+        print(f"{stage:<40}{row['count']:>7}{row['p50']:>10.0f}{row['p95']:>10.0f}{row['p99']:>10.0f}")
+
+
+if __name__ == "__main__":
+    # python -m core.tracing summary [traces.jsonl] [voice|typed]
+    if len(sys.argv) >= 2 and sys.argv[1] == "summary":
+        from utils.config import Config
+        trace_path = sys.argv[2] if len(sys.argv) > 2 else Config.TRACE_FILE
+        if not os.path.exists(trace_path):
+            print(f"No trace file at {trace_path}")
+        else:
+            print_summary(trace_path, sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        print("Usage: python -m core.tracing summary [file] [voice|typed]")
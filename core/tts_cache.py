@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of rendered speech with LRU eviction."""
+
+    def __init__(self, directory: str = "tts_cache", max_bytes: int = 100 * 1024 * 1024,
+                 extension: str = ".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        # key -> size in bytes, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def make_key(backend: str, voice: str, text: str, rate: str = "", pitch: str = "",
+                 volume: str = "", **settings) -> str:
+        """Build the cache key for an utterance rendered with the given voice settings."""
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        parts = [backend, voice, rate, pitch, volume]
+        parts.extend(f"{name}={settings[name]}" for name in sorted(settings))
+        parts.append(normalized)
+        return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for a key, or None on a miss."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Persist recency so the LRU order survives restarts
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store rendered audio and evict the least recently used entries if needed."""
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            # Atomic rename so readers never see a partial file
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"TTS cache write error: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            # Never evict the entry just written
+            victims = self._take_victims(keep=1)
+        self._remove_files(victims)
+
+    def contains(self, key: str) -> bool:
+        """Check for a key without touching the hit/miss counters."""
+        with self._lock:
+            return key in self._index
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self.total_bytes = 0
+        self._remove_files(keys)
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _take_victims(self, keep: int = 0) -> List[str]:
+        """Drop least recently used entries from the index until it fits (call with the lock held)."""
+        victims = []
+        while self.total_bytes > self.max_bytes and len(self._index) > keep:
+            victim, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            victims.append(victim)
+        return victims
+
+    def _remove_files(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.extension)
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from the files already on disk."""
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # Leftover from an interrupted write
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(self.extension):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self.total_bytes += size
+            # The limit may have been lowered since these were written
+            victims = self._take_victims()
+        if victims:
+            print(f"TTS cache over its {self.max_bytes} byte limit, evicted {len(victims)} entries")
+        self._remove_files(victims)
@@ -0,0 +1,275 @@
+import asyncio
+import collections
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.tracing import Trace, mark
+
+# A backend speaks the text and calls on_audio() right before its first audio
+# reaches the speaker; a False return means another backend won and it must stop
+SpeakFunction = Callable[[str, Callable[[], bool]], Awaitable[None]]
+
+
+class BackendStats:
+    """Rolling time-to-first-audio samples and health for one TTS backend."""
+
+    def __init__(self, window: int = 20, max_failures: int = 3, cooldown: float = 30.0):
+        self.samples = collections.deque(maxlen=window)
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.wins = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+
+    def record_ttfa(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.wins += 1
+        self.consecutive_failures = 0
+
+    def record_lost(self, seconds: float) -> None:
+        """Lost a hedge race without audio; the elapsed time bounds its latency from below."""
+        self.samples.append(seconds)
+
+    def record_failure(self, timeout: bool = False, penalty: Optional[float] = None) -> None:
+        self.failures += 1
+        self.timeouts += int(timeout)
+        self.consecutive_failures += 1
+        self.last_failure = time.monotonic()
+        # A timeout is also a (lower bound) latency sample
+        if penalty is not None:
+            self.samples.append(penalty)
+
+    def healthy(self) -> bool:
+        """Unhealthy after repeated failures, until the cooldown has passed."""
+        if self.consecutive_failures < self.max_failures:
+            return True
+        return time.monotonic() - self.last_failure >= self.cooldown
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "samples": len(self.samples),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "wins": self.wins,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "healthy": self.healthy()
+        }
+
+
+class _Backend:
+    def __init__(self, name: str, speak: SpeakFunction, deadline: float,
+                 enabled: Callable[[], bool], cancel: Optional[Callable[[], None]], priority: int):
+        self.name = name
+        self.speak = speak
+        self.deadline = deadline
+        self.enabled = enabled
+        self.cancel = cancel
+        self.priority = priority
+        self.stats = BackendStats()
+
+
+class _Attempt:
+    """One backend speaking one text inside a race."""
+
+    def __init__(self, race: "_Race", backend: _Backend):
+        self.race = race
+        self.backend = backend
+        self.started = race.loop.time()
+        self.deadline = self.started + backend.deadline
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+
+    def on_audio(self) -> bool:
+        """Claim the speaker; safe to call from worker threads."""
+        return self.race.claim(self)
+
+    def cancel(self) -> None:
+        with self.race.lock:
+            self.cancelled = True
+        if self.task and not self.task.done():
+            self.task.cancel()
+        if self.backend.cancel:
+            try:
+                self.backend.cancel()
+            except Exception:
+                pass
+
+
+class _Race:
+    """Attempts competing to produce the first audio for one utterance."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, trace: Optional[Trace] = None):
+        self.loop = loop
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.winner: Optional[_Attempt] = None
+        self.first_audio = asyncio.Event()
+        self.attempts: List[_Attempt] = []
+
+    def start(self, backend: _Backend, text: str) -> _Attempt:
+        attempt = _Attempt(self, backend)
+        attempt.task = asyncio.ensure_future(backend.speak(text, attempt.on_audio))
+        self.attempts.append(attempt)
+        return attempt
+
+    def claim(self, attempt: _Attempt) -> bool:
+        with self.lock:
+            if attempt.cancelled:
+                return False
+            if self.winner is None:
+                self.winner = attempt
+                attempt.backend.stats.record_ttfa(self.loop.time() - attempt.started)
+                mark(self.trace, "first_audio", backend=attempt.backend.name)
+                self.loop.call_soon_threadsafe(self.first_audio.set)
+            return self.winner is attempt
+
+    def running(self) -> List[_Attempt]:
+        return [a for a in self.attempts if not a.task.done()]
+
+
+class TTSRouter:
+    """Picks a TTS backend by measured time-to-first-audio and hedges slow starts.
+
+    Backends are ranked by priority among those whose median time-to-first-audio
+    is within the target, then by latency. Each attempt has a deadline for its
+    first audio; if the chosen backend is silent past the hedge budget the hedge
+    backend (normally the offline voice) is started in parallel and whichever
+    speaks first keeps the speaker.
+    """
+
+    def __init__(self, should_stop: Callable[[], bool], hedge_backend: Optional[str] = None,
+                 hedge_budget: float = 1.5, ttfa_target: float = 2.0):
+        self.should_stop = should_stop
+        self.hedge_backend = hedge_backend
+        self.hedge_budget = hedge_budget
+        self.ttfa_target = ttfa_target
+        self.backends: Dict[str, _Backend] = {}
+
+    def register(self, name: str, speak: SpeakFunction, deadline: float,
+                 enabled: Optional[Callable[[], bool]] = None,
+                 cancel: Optional[Callable[[], None]] = None) -> None:
+        """Add a backend; earlier registrations are preferred when latency allows."""
+        self.backends[name] = _Backend(name, speak, deadline, enabled or (lambda: True),
+                                       cancel, priority=len(self.backends))
+
+    def rank(self) -> List[str]:
+        """Usable backends in the order they should be tried."""
+        usable = [b for b in self.backends.values() if self._usable(b)]
+        healthy = [b for b in usable if b.stats.healthy()]
+        # Fall back to unhealthy backends only when nothing else is left
+        candidates = healthy or usable
+
+        def key(backend: _Backend):
+            p50 = backend.stats.percentile(0.5)
+            fast_enough = p50 is None or p50 <= self.ttfa_target
+            return (not fast_enough, backend.priority if fast_enough else p50)
+
+        return [b.name for b in sorted(candidates, key=key)]
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-backend latency and health figures."""
+        return {name: backend.stats.summary() for name, backend in self.backends.items()}
+
+    async def speak(self, text: str, trace: Optional[Trace] = None) -> Optional[str]:
+        """Speak text with the best backend; returns the name of the one that spoke."""
+        tried = set()
+        for name in self.rank():
+            if name in tried:
+                continue
+            if self.should_stop():
+                return None
+            winner, attempted = await self._race(name, text, trace)
+            tried.update(attempted)
+            if winner:
+                return winner
+        raise RuntimeError("All TTS backends failed")
+
+    def _usable(self, backend: _Backend) -> bool:
+        try:
+            return bool(backend.enabled())
+        except Exception:
+            return False
+
+    async def _race(self, name: str, text: str, trace: Optional[Trace] = None):
+        """Run one backend (plus the hedge if it is slow); returns (winner, attempted names)."""
+        loop = asyncio.get_running_loop()
+        race = _Race(loop, trace)
+        primary = race.start(self.backends[name], text)
+
+        hedge = self.backends.get(self.hedge_backend)
+        if hedge is None or hedge.name == name or not self._usable(hedge):
+            hedge = None
+        hedge_at = primary.started + self.hedge_budget if hedge else None
+        audio_waiter = asyncio.ensure_future(race.first_audio.wait())
+
+        try:
+            while race.winner is None and not self.should_stop():
+                now = loop.time()
+                for attempt in race.running():
+                    if now >= attempt.deadline:
+                        print(f"{attempt.backend.name} TTS produced no audio within "
+                              f"{attempt.backend.deadline:.1f}s")
+                        attempt.cancel()
+                        attempt.backend.stats.record_failure(timeout=True, penalty=attempt.backend.deadline)
+
+                if hedge_at is not None and now >= hedge_at and not primary.task.done():
+                    print(f"{name} TTS is slow, starting {hedge.name} in parallel")
+                    race.start(hedge, text)
+                    hedge_at = None
+
+                running = race.running()
+                if not running:
+                    break
+                wake = min(a.deadline for a in running)
+                if hedge_at is not None:
+                    wake = min(wake, hedge_at)
+                await asyncio.wait([a.task for a in running] + [audio_waiter],
+                                   timeout=max(0.0, wake - loop.time()),
+                                   return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            audio_waiter.cancel()
+
+        attempted = [a.backend.name for a in race.attempts]
+        if race.winner is not None:
+            for attempt in race.attempts:
+                if attempt is not race.winner and not attempt.task.done():
+                    attempt.cancel()
+                    attempt.backend.stats.record_lost(loop.time() - attempt.started)
+            await self._finish(race.winner)
+            return race.winner.backend.name, attempted
+
+        # Nobody spoke: a clean finish means there was nothing to say (or we were stopped)
+        for attempt in race.attempts:
+            if attempt.task.done() and not attempt.task.cancelled() and not attempt.cancelled:
+                error = attempt.task.exception()
+                if error is None:
+                    return attempt.backend.name, attempted
+                print(f"{attempt.backend.name} TTS failed: {error}")
+                attempt.backend.stats.record_failure()
+        for attempt in race.running():
+            attempt.cancel()
+        if self.should_stop():
+            return name, attempted
+        return None, attempted
+
+    async def _finish(self, attempt: _Attempt) -> None:
+        """Let the winning backend finish speaking."""
+        try:
+            await attempt.task
+        except asyncio.CancelledError:
+            if not attempt.cancelled:
+                raise
+        except Exception as e:
+            # Audio was already heard, so repeating the text elsewhere would be worse
+            print(f"{attempt.backend.name} TTS failed after audio started: {e}")
+            attempt.backend.stats.record_failure()
@@ -0,0 +1,249 @@
+import collections
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# A transcript ending in one of these is almost never a finished thought
+TRAILING_WORDS = {
+    "a", "an", "the", "and", "or", "but", "so", "to", "of", "in", "on", "at", "for", "with",
+    "about", "from", "by", "into", "onto", "than", "my", "your", "our", "their", "its", "some",
+    "is", "are", "was", "what", "whats", "what's", "how", "can", "could", "would", "will",
+    "um", "uh", "if", "because", "then"
+}
+# A free-form command argument ("search for (.+)") could always go on
+OPEN_ARGUMENT = re.compile(r"\(\.[+*]\)")
+QUESTION_WORDS = {"what", "what's", "who", "where", "when", "why", "how", "is", "are", "can", "could",
+                  "would", "should", "do", "does", "will", "tell", "show", "open", "play", "set", "turn"}
+
+
+class _Turn:
+    """Fragments of one user turn that have not been handed on yet."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.trace = None
+        self.speech_ended_at = 0.0
+        self.due_at = 0.0
+        self.completeness = 0.0
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.parts)
+
+
+class TurnDetector:
+    """Decides when the user has finished speaking, merging fragments of one turn.
+
+    Each recognized fragment is scored for how complete it looks: trailing
+    conjunctions or prepositions and command prefixes still waiting for an
+    argument ("search for") score low, fixed command phrases from the pattern
+    table ("what time is it") and sentence-final punctuation score high, and
+    commands ending in a free-form argument ("who is the best") in between,
+    since the argument may go on. The turn is committed
+    once the user has been silent for a wait derived from their own pause
+    habits (a high percentile of the pauses they make inside a turn), scaled
+    down as completeness rises - confident transcripts commit at once. Speech
+    starting again holds the commit until that fragment is recognized.
+    """
+
+    def __init__(self, commit: Callable[[str, object], None], min_wait: float = 0.3, max_wait: float = 2.5,
+                 prior_pause: float = 0.8, confident: float = 0.8, pause_percentile: float = 90.0,
+                 profile_path: Optional[str] = None):
+        self.commit = commit
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.prior_pause = prior_pause
+        self.confident = confident
+        self.pause_percentile = pause_percentile
+        self.profile_path = profile_path
+        self.patterns: List[re.Pattern] = []
+        # Patterns anchored at the end of the text, with whether they end in a free-form argument
+        self._complete_patterns: List[Tuple[re.Pattern, bool]] = []
+
+        self._lock = threading.Lock()
+        self._pending: Optional[_Turn] = None
+        # Utterances that started but whose transcript has not arrived yet
+        self._in_flight = 0
+        self._last_speech_end: Optional[float] = None
+        self._pauses = collections.deque(maxlen=200)
+
+        self.turns = 0
+        self.fragments = 0
+        self.immediate = 0
+        self._waits = collections.deque(maxlen=100)
+        self.load()
+
+    def set_command_patterns(self, command_patterns: Dict[str, List[str]]) -> None:
+        """Use the command handler's pattern table to recognize complete and half-said commands."""
+        compiled, complete = [], []
+        for patterns in command_patterns.values():
+            for pattern in patterns:
+                try:
+                    compiled.append(re.compile(pattern))
+                    complete.append((re.compile(f"(?:{pattern})$"), bool(OPEN_ARGUMENT.search(pattern))))
+                except re.error:
+                    continue
+        self.patterns = compiled
+        self._complete_patterns = complete
+
+    def completeness(self, text: str) -> float:
+        """0..1 estimate that text is a whole request rather than the start of one."""
+        text = text.strip().lower()
+        words = text.split()
+        if not words:
+            return 0.0
+        if text.endswith((",", "...", "-")):
+            return 0.1
+        if words[-1].rstrip(".") in TRAILING_WORDS and not text.endswith(("?", "!")):
+            return 0.1
+        bare = text.rstrip(".!?")
+        if self._awaits_argument(bare):
+            return 0.15
+        if text.endswith(("?", "!", ".")):
+            return 0.85
+        command = self._command_match(bare)
+        if command == "closed":
+            return 0.9
+        if command == "open":
+            # Ends on a content word (trailing function words were caught above), but
+            # "who is the best" may still become "who is the best player in ..."
+            return 0.6
+        if words[0] in QUESTION_WORDS and len(words) >= 3:
+            return 0.65
+        return 0.3 + 0.05 * min(len(words), 6)
+
+    def _command_match(self, text: str) -> Optional[str]:
+        """'closed' for a fixed command phrase ending the text, 'open' if it ends in a free-form argument."""
+        found = None
+        for pattern, open_ended in self._complete_patterns:
+            if pattern.search(text) is not None:
+                if not open_ended:
+                    return "closed"
+                found = "open"
+        return found
+
+    def _awaits_argument(self, text: str) -> bool:
+        """A command prefix whose argument has not been said yet, e.g. 'remind me to'."""
+        return any(p.search(text) is None and p.search(text + " x") is not None for p in self.patterns)
+
+    def wait_for(self, completeness: float) -> float:
+        """Silence (from the end of speech) to allow before committing a turn this complete."""
+        if completeness >= self.confident:
+            return 0.0
+        base = min(self.max_wait, max(self.min_wait, self.typical_pause() + 0.15))
+        return base * (self.confident - completeness) / self.confident
+
+    def typical_pause(self) -> float:
+        """The user's long within-turn pause: a high percentile of the ones observed."""
+        if len(self._pauses) < 10:
+            return self.prior_pause
+        ordered = sorted(self._pauses)
+        return ordered[min(len(ordered) - 1, int(self.pause_percentile / 100.0 * len(ordered)))]
+
+    def speech_started(self, started_at: float) -> None:
+        """The VAD found a new utterance; hold any pending turn until it is recognized."""
+        with self._lock:
+            self._in_flight += 1
+            if self._last_speech_end is not None:
+                pause = started_at - self._last_speech_end
+                # Longer gaps are the user waiting for an answer, not pausing mid-turn
+                if 0.0 < pause <= self.max_wait * 1.5:
+                    self._pauses.append(pause)
+
+    def speech_ended(self, ended_at: float, recognized: bool = True) -> None:
+        """The VAD closed the utterance; unrecognized ones (e.g. no wake word) stop holding the turn."""
+        with self._lock:
+            self._last_speech_end = ended_at
+            if not recognized:
+                self._in_flight = max(0, self._in_flight - 1)
+
+    def add_fragment(self, text: str, speech_ended_at: Optional[float], trace=None) -> None:
+        """A recognized utterance (text may be empty); commits at once when the turn looks finished."""
+        ready = None
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if text.strip():
+                turn = self._pending or _Turn()
+                if turn.trace is not None and trace is not None:
+                    turn.trace.finish("merged")
+                turn.parts.append(text.strip())
+                turn.trace = trace or turn.trace
+                turn.speech_ended_at = speech_ended_at or time.monotonic()
+                turn.completeness = self.completeness(turn.text)
+                turn.due_at = turn.speech_ended_at + self.wait_for(turn.completeness)
+                self._pending = turn
+                self.fragments += 1
+            ready = self._take_due(time.monotonic())
+        if ready is not None:
+            self._commit(ready)
+
+    def poll(self) -> Optional[float]:
+        """Commit the pending turn if its wait is over; returns seconds until it is due, if any."""
+        with self._lock:
+            now = time.monotonic()
+            ready = self._take_due(now)
+            remaining = None
+            if ready is None and self._pending is not None and not self._in_flight:
+                remaining = max(0.0, self._pending.due_at - now)
+        if ready is not None:
+            self._commit(ready)
+        return remaining
+
+    def flush(self) -> None:
+        """Commit whatever is pending (listening stopped)."""
+        with self._lock:
+            ready, self._pending = self._pending, None
+            self._in_flight = 0
+            if ready is not None:
+                self.turns += 1
+        if ready is not None:
+            self._commit(ready)
+
+    def _take_due(self, now: float) -> Optional[_Turn]:
+        turn = self._pending
+        if turn is None or self._in_flight or now < turn.due_at:
+            return None
+        self._pending = None
+        self.turns += 1
+        self._waits.append(max(0.0, now - turn.speech_ended_at))
+        if turn.due_at <= turn.speech_ended_at:
+            self.immediate += 1
+        return turn
+
+    def _commit(self, turn: _Turn) -> None:
+        if turn.trace is not None:
+            turn.trace.mark("turn_end", completeness=round(turn.completeness, 2), fragments=len(turn.parts))
+        self.commit(turn.text, turn.trace)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        waits = sorted(self._waits)
+        return {
+            "turns": self.turns,
+            "fragments": self.fragments,
+            "immediate_fraction": self.immediate / self.turns if self.turns else 0.0,
+            "typical_pause": round(self.typical_pause(), 3),
+            "pause_samples": len(self._pauses),
+            "end_of_turn_wait_p50": waits[int(0.5 * (len(waits) - 1))] if waits else None
+        }
+
+    def load(self) -> None:
+        """Restore the pause samples learned in earlier sessions."""
+        if not self.profile_path or not os.path.exists(self.profile_path):
+            return
+        try:
+            with open(self.profile_path, "r") as f:
+                self._pauses.extend(float(p) for p in json.load(f).get("pauses", []))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Could not load turn profile: {e}")
+
+    def save(self) -> None:
+        if not self.profile_path:
+            return
+        try:
+            with open(self.profile_path, "w") as f:
+                json.dump({"pauses": [round(p, 3) for p in self._pauses]}, f)
+        except OSError as e:
+            print(f"Could not save turn profile: {e}")
@@ -0,0 +1,222 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class Utterance:
+    """Timing and sample range of one detected utterance (time.monotonic() clock)."""
+
+    def __init__(self, started_at: float, start_sample: int, onset_end_sample: int):
+        self.started_at = started_at
+        # Absolute sample positions; start_sample already includes the pre-roll
+        self.start_sample = start_sample
+        self.onset_end_sample = onset_end_sample
+        self.end_sample: Optional[int] = None
+        self.speech_ended_at: Optional[float] = None
+        self.closed_at: Optional[float] = None
+        self.truncated = False
+        # Wake phrase that opened the recognizer for this utterance, if one was required
+        self.wake_word: Optional[str] = None
+
+    def duration(self) -> float:
+        end = self.speech_ended_at if self.speech_ended_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class NoiseFloorEstimator:
+    """Running noise floor: a low percentile of frame energies over a sliding window.
+
+    Speech rarely fills a whole window, so the pauses between words keep a low
+    percentile near the background level, while sustained noise (a fan, a
+    car) pulls it up within one window. Updated from the capture stream, so no
+    blocking calibration is needed before listening.
+    """
+
+    def __init__(self, frame_seconds: float, window_s: float = 5.0, percentile: float = 10.0,
+                 update_every_s: float = 0.2):
+        self.percentile = percentile
+        self._window = np.zeros(max(1, int(window_s / frame_seconds)), dtype=np.float32)
+        self._update_every = max(1, int(update_every_s / frame_seconds))
+        self._count = 0
+        self._since_update = 0
+        self.floor_db: Optional[float] = None
+
+    def update(self, energy_db: np.ndarray) -> Optional[float]:
+        """Add per-frame energies (dBFS) and return the current floor."""
+        size = len(self._window)
+        # A block longer than the window only leaves its newest values, written
+        # where they would have landed had the whole block been written
+        values = energy_db[-size:]
+        start = (self._count + len(energy_db) - len(values)) % size
+        first = min(len(values), size - start)
+        self._window[start:start + first] = values[:first]
+        self._window[:len(values) - first] = values[first:]
+        self._count += len(energy_db)
+        self._since_update += len(energy_db)
+        # np.percentile partitions the window; doing it every few frames is plenty
+        if self.floor_db is None or self._since_update >= self._update_every:
+            filled = self._window[:min(self._count, size)]
+            self.floor_db = float(np.percentile(filled, self.percentile))
+            self._since_update = 0
+        return self.floor_db
+
+
+class VoiceActivityDetector:
+    """Frame-level voice activity detection and endpointing over raw 16-bit PCM.
+
+    Each frame is scored on energy above a running noise floor and on its
+    zero-crossing rate (broadband hiss crosses zero far more often than voiced
+    speech). Onsets need a few consecutive speech frames; an utterance closes
+    after hangover_ms without speech. feed() returns events:
+
+        ("start", Utterance, None)   - onset; the audio from utterance.start_sample
+                                       (pre-roll included) to onset_end_sample is
+                                       read from the capture ring buffer
+        ("audio", Utterance, frame)  - next frame inside the utterance (a view)
+        ("end", Utterance, None)     - speech has ended
+
+    Positions are absolute sample counts, matching the capture ring buffer.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = 20, margin_db: float = 10.0,
+                 max_zcr: float = 0.35, min_speech_ms: int = 60, hangover_ms: int = 300,
+                 pre_roll_ms: int = 300, max_utterance_s: float = 30.0,
+                 noise_floor: Optional[NoiseFloorEstimator] = None):
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_seconds = self.frame_samples / float(sample_rate)
+        self.margin_db = margin_db
+        self.max_zcr = max_zcr
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.max_utterance_frames = int(max_utterance_s / self.frame_seconds)
+        # Shared estimators keep their calibration across listening sessions
+        self.noise_floor = noise_floor or NoiseFloorEstimator(self.frame_seconds)
+        # Wall-clock seconds per second of audio; below 1 when replaying recordings faster than real time
+        self.time_scale = 1.0
+
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+
+        self.position = 0
+        self._first_position: Optional[int] = None
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._utterance: Optional[Utterance] = None
+        self._utterance_frames = 0
+        self._silent_frames = 0
+        self._speech_run = 0
+
+    def feed(self, samples: np.ndarray, position: Optional[int] = None,
+             end_time: Optional[float] = None) -> List[Tuple[str, Utterance, Optional[np.ndarray]]]:
+        """Process int16 samples and return the endpointing events they trigger.
+
+        position is the absolute index of the first sample and end_time the
+        capture time just after the last one; both default to continuing the
+        previous call. Feeding whole frames avoids any copying.
+        """
+        if end_time is None:
+            end_time = time.monotonic()
+        if position is not None and not len(self._remainder):
+            self.position = position
+        if self._first_position is None:
+            self._first_position = self.position
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        count = len(samples) // self.frame_samples
+        self._remainder = samples[count * self.frame_samples:].copy()
+        if not count:
+            return []
+
+        frames = samples[:count * self.frame_samples].reshape(count, self.frame_samples)
+        energy_db, zcr = self.frame_features(frames)
+        self.noise_floor.update(energy_db)
+        # Time at which the last whole frame of this block was captured
+        block_end = end_time - self.time_scale * len(self._remainder) / float(self.sample_rate)
+
+        events = []
+        for i in range(count):
+            frame_time = block_end - (count - 1 - i) * self._frame_wall_seconds()
+            self._step(frames[i], float(energy_db[i]), float(zcr[i]), frame_time, events)
+            self.position += self.frame_samples
+        return events
+
+    @staticmethod
+    def frame_features(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame energy (dBFS) and zero-crossing rate for a (frames, samples) int16 block."""
+        x = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(x * x, axis=1)) / 32768.0
+        energy_db = 20.0 * np.log10(np.maximum(rms, 1e-6))
+        signs = np.signbit(x)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frames.shape[1] - 1)
+        return energy_db, zcr
+
+    def is_speech(self, energy_db: float, zcr: float) -> bool:
+        """Frame decision against the current noise floor."""
+        above = energy_db - self.noise_floor_db
+        if above < self.margin_db:
+            return False
+        # Loud frames count even when noisy (fricatives), quieter ones must look voiced
+        return zcr <= self.max_zcr or above >= 2 * self.margin_db
+
+    def _step(self, frame: np.ndarray, energy_db: float, zcr: float, frame_time: float, events: list) -> None:
+        speech = self.is_speech(energy_db, zcr)
+
+        if self._utterance is None:
+            if not speech:
+                self._speech_run = 0
+                return
+            self._speech_run += 1
+            if self._speech_run < self.min_speech_frames:
+                return
+            # Onset confirmed; include the pre-roll so the first syllable is kept
+            onset_end = self.position + self.frame_samples
+            onset_start = onset_end - self._speech_run * self.frame_samples
+            start_sample = max(self._first_position, onset_start - self.pre_roll_samples)
+            utterance = Utterance(frame_time - self._speech_run * self._frame_wall_seconds(), start_sample, onset_end)
+            self._utterance = utterance
+            self._utterance_frames = (onset_end - start_sample) // self.frame_samples
+            self._silent_frames = 0
+            events.append(("start", utterance, None))
+            return
+
+        utterance = self._utterance
+        self._utterance_frames += 1
+        events.append(("audio", utterance, frame))
+        if speech:
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+
+        if self._silent_frames >= self.hangover_frames:
+            utterance.speech_ended_at = frame_time - self._silent_frames * self._frame_wall_seconds()
+            self._close(frame_time, events)
+        elif self._utterance_frames >= self.max_utterance_frames:
+            utterance.speech_ended_at = frame_time
+            utterance.truncated = True
+            self._close(frame_time, events)
+
+    def _frame_wall_seconds(self) -> float:
+        return self.frame_seconds * self.time_scale
+
+    def _close(self, frame_time: float, events: list) -> None:
+        utterance = self._utterance
+        utterance.closed_at = frame_time
+        utterance.end_sample = self.position + self.frame_samples
+        events.append(("end", utterance, None))
+        self._utterance = None
+        self._speech_run = 0
+        self._silent_frames = 0
+
+    @property
+    def noise_floor_db(self) -> Optional[float]:
+        return self.noise_floor.floor_db
+
+    def in_utterance(self) -> bool:
+        return self._utterance is not None
+
+    def reset(self) -> None:
+        """Drop any partial utterance (the noise floor is kept)."""
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._utterance = None
+        self._speech_run = 0
+        self._silent_frames = 0
@@ -1,6 +1,6 @@
 import speech_recognition as sr
-import pyttsx3
 import asyncio
+import collections
 import numpy as np
 import queue
 import threading
@@ -11,76 +11,61 @@ import json
 import re
 import subprocess
 import tempfile
-from typing import Optional, Callable
+from typing import Optional, Callable, List
 # Import edge-tts for better quality free voice
 import edge_tts
+from core.audio_capture import AudioCapture
+from core.audio_player import AudioPlayer
+from core.cancellation import CancellationToken
+from core.echo_canceller import EchoCanceller
+from core.event_loop import shared_loop
+from core.offline_tts import OfflineTTSWorker
+from core.speech_pipeline import SpeechPipeline
+from core.recognition_pool import RecognitionPool
+from core.speech_recognizers import (PartialHypothesis, RecognitionStream, SpeechRecognizerBackend,
+                                     create_speech_recognizer)
+from core.tracing import Trace, Tracer, mark
+from core.text_normalizer import create_pronunciation_normalizer, create_speech_cleaner
+from core.tts_cache import TTSCache
+from core.tts_router import TTSRouter
+from core.turn_detector import TurnDetector
+from core.vad import NoiseFloorEstimator, VoiceActivityDetector
+from core.wake_word import WakeWordDetector
+from utils.config import Config
 
 class VoiceEngine:
-    def __init__(self):
+    def __init__(self, audio_source: Optional[AudioCapture] = None,
+                 speech_recognizer: Optional[SpeechRecognizerBackend] = None):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
         self.audio_queue = queue.Queue()
         self.is_listening = False
         self.is_speaking = False
         self.silence_threshold = 1.5  # Increased from 0.8 to 1.5 seconds of silence to consider speech ended
         self.last_speech_time = 0
-        self.tts_lock = threading.Lock()
+
+        # Sentences rendered ahead of playback by the speech pipeline
+        self.tts_lookahead = Config.TTS_LOOKAHEAD
+
+        # Text normalizers compiled once; the user pronunciation dictionary applies to every voice
+        self.speech_cleaner = create_speech_cleaner(Config.PRONUNCIATION_DICT)
+        self.pronunciation_normalizer = create_pronunciation_normalizer()
         
         # Flag to request stopping current speech
         self.stop_current_speech = False
+
+        # Persistent in-process audio output (falls back to system players if unavailable)
+        self.audio_player = AudioPlayer(sample_rate=Config.AUDIO_OUTPUT_SAMPLE_RATE,
+                                        block_ms=Config.AUDIO_OUTPUT_BLOCK_MS)
+        self.audio_player.start()
+
+        # On-disk cache of rendered phrases, shared by the cloud voices
+        self.tts_cache = None
+        if Config.ENABLE_TTS_CACHE:
+            self.tts_cache = TTSCache(Config.TTS_CACHE_DIR, int(Config.TTS_CACHE_MAX_MB * 1024 * 1024))
         
-        # Initialize offline TTS engine (primary for reliability)
-        try:
-            self.offline_engine = pyttsx3.init()
-            
-            # Enhance voice settings for more premium sound quality
-            self.offline_engine.setProperty('rate', 175)  # Faster rate for natural speech
-            self.offline_engine.setProperty('volume', 1.0)  # Maximum volume
-            
-            # Get available voices and find the best quality ones
-            voices = self.offline_engine.getProperty('voices')
-            print(f"Found {len(voices)} available voices")
-            
-            # Premium voices to look for (in order of preference)
-            premium_voices = [
-                "DAVID",      # Premium US male voice (best quality)
-                "MARK",       # Another good US male voice
-                "JAMES",      # British male voice with excellent quality
-                "RICHARD",    # Good male voice
-                "GEORGE"      # Another good male voice
-            ]
-            
-            # Try to find premium voices first
-            voice_found = False
-            for premium in premium_voices:
-                for voice in voices:
-                    name = voice.name.upper()
-                    if premium in name and "EN" in name.upper():
-                        self.offline_engine.setProperty('voice', voice.id)
-                        print(f"Using premium voice: {voice.name} (high quality)")
-                        voice_found = True
-                        break
-                if voice_found:
-                    break
-            
-            # If no premium voice found, use any English male voice
-            if not voice_found:
-                for voice in voices:
-                    if "MALE" in voice.name.upper() and "EN" in voice.name.upper():
-                        self.offline_engine.setProperty('voice', voice.id)
-                        print(f"Using voice: {voice.name}")
-                        voice_found = True
-                        break
-            
-            # Last resort - use any voice
-            if not voice_found and voices:
-                self.offline_engine.setProperty('voice', voices[0].id)
-                print(f"Using default voice: {voices[0].name}")
-                
-            print("Offline TTS engine initialized with premium voice settings")
-        except Exception as e:
-            print(f"Error initializing pyttsx3: {e}")
-            self.offline_engine = None
+        # Offline TTS engine lives on its own thread for the whole session (primary for reliability)
+        self.offline_tts = OfflineTTSWorker(rate=180, volume=1.0)
+        self.offline_tts.start_engine()
         
         # Edge TTS as backup (requires internet)
         self.use_edge_tts = True  # Set to True to use Edge TTS
@@ -100,61 +85,119 @@ class VoiceEngine:
         # Get from environment variable or use default premium voice
         voice_key = os.getenv("EDGE_VOICE", "jason").lower()
         self.edge_voice = edge_voices.get(voice_key, "en-US-JasonNeural")
+        self.edge_rate = "+2%"
+        self.edge_volume = "+10%"
+        self.edge_pitch = "+2Hz"
+        # Speak each response through one Edge session instead of one per sentence
+        self.edge_batched = Config.EDGE_TTS_BATCHED
         
         # ElevenLabs settings - premium option if API key available
         self.use_elevenlabs = False
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY", "")
         self.elevenlabs_voice_id = "pNInz6obpgDQGcFmaJgB"  # Josh (highly realistic)
+
+        # Pooled HTTP session so every chunk after the first reuses the TLS connection
+        self.http_session = requests.Session()
+        self.http_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4))
+
+        # Latency-aware backend selection; the offline voice hedges slow cloud starts
+        self.tts_router = TTSRouter(should_stop=lambda: self.stop_current_speech,
+                                    hedge_backend="offline",
+                                    hedge_budget=Config.TTS_HEDGE_BUDGET,
+                                    ttfa_target=Config.TTS_TTFA_TARGET)
+        self.tts_router.register("elevenlabs", self._speak_with_elevenlabs, Config.ELEVENLABS_TTFA_DEADLINE,
+                                 enabled=lambda: self.use_elevenlabs and bool(self.elevenlabs_api_key))
+        self.tts_router.register("edge", self._speak_with_edge_tts, Config.EDGE_TTFA_DEADLINE,
+                                 enabled=lambda: self.use_edge_tts)
+        self.tts_router.register("offline", self._speak_with_pyttsx3_async, Config.OFFLINE_TTFA_DEADLINE,
+                                 enabled=lambda: self.offline_tts.available, cancel=self.offline_tts.stop)
         
-        # Adjust for ambient noise
-        try:
-            with self.microphone as source:
-                print("Adjusting for ambient noise... (please be quiet)")
-                self.recognizer.adjust_for_ambient_noise(source, duration=2.0)
-                print("Microphone adjusted for ambient noise")
-        except Exception as e:
-            print(f"Warning: Could not adjust for ambient noise: {e}")
-            
-        # Speech recognition settings - Modified for less sensitivity
-        self.recognizer.energy_threshold = 3500  # Increased from 3000 to require louder speech
-        self.recognizer.dynamic_energy_threshold = True  # Adjust threshold automatically
-        self.recognizer.dynamic_energy_adjustment_damping = 0.25  # Increased from 0.15 - slower adjustment to environment
-        self.recognizer.dynamic_energy_adjustment_ratio = 1.2  # Reduced from 1.5 - less sensitive
-        self.recognizer.pause_threshold = 0.8  # Reduced from 1.2 to improve responsiveness
+        # Raw microphone capture into a ring buffer shared by the VAD, recognizer and visualizer
+        # (audio_source replaces the microphone, e.g. a WavFileSource for headless runs)
+        self.audio_capture = audio_source or AudioCapture(sample_rate=Config.CAPTURE_SAMPLE_RATE,
+                                                          block_ms=Config.CAPTURE_BLOCK_MS,
+                                                          buffer_seconds=Config.CAPTURE_BUFFER_SECONDS,
+                                                          spectrum_bands=Config.SPECTRUM_BANDS,
+                                                          spectrum_rate_hz=Config.SPECTRUM_RATE_HZ)
+
+        # Frame-level endpointing replaces Recognizer.listen timeouts; the noise floor is
+        # estimated continuously from captured audio instead of a blocking calibration
+        self.vad = None
+        self.partial_callback = None
+        self.recognition_pool = None
+        self.noise_floor = NoiseFloorEstimator(Config.VAD_FRAME_MS / 1000.0,
+                                               window_s=Config.NOISE_FLOOR_WINDOW_SECONDS,
+                                               percentile=Config.NOISE_FLOOR_PERCENTILE)
+        self.listen_latencies = collections.deque(maxlen=50)
+        # Per-turn latency traces (set by the app when tracing is enabled)
+        self.tracer: Optional[Tracer] = None
+        # Merges transcript fragments into turns and decides when the user is done
+        self.turn_callback: Optional[Callable[[str, Optional[Trace]], None]] = None
+        self.turn_detector = TurnDetector(self._commit_turn,
+                                          min_wait=Config.TURN_MIN_WAIT,
+                                          max_wait=Config.TURN_MAX_WAIT,
+                                          prior_pause=Config.TURN_PRIOR_PAUSE,
+                                          profile_path=Config.TURN_PROFILE_FILE)
+
+        # Pluggable recognizer: Google by default, or a local CPU Whisper model
+        self.speech_recognizer = speech_recognizer or create_speech_recognizer(Config.SPEECH_RECOGNIZER,
+                                                                               self.recognizer)
+
+        # Subtract our own voice (the player output) from the microphone so listening
+        # can continue while speaking; needs the in-process player for the reference
+        self.echo_canceller = None
+        if Config.ECHO_CANCELLATION and self.audio_player.available:
+            self.echo_canceller = EchoCanceller(self.audio_capture.sample_rate, self.audio_capture.block_frames,
+                                                self.audio_player.sample_rate,
+                                                filter_ms=Config.ECHO_FILTER_MS)
+            self.audio_player.output_tap = self.echo_canceller.push_reference
+            self.audio_capture.echo_canceller = self.echo_canceller
+
+        # Keyword spotting in front of the recognizer; inactive until phrases are enrolled
+        self.wake_word = None
+        if Config.WAKE_WORD_ENABLED:
+            self.wake_word = WakeWordDetector(self.audio_capture.sample_rate, Config.WAKE_WORDS,
+                                              template_dir=Config.WAKE_WORD_DIR,
+                                              sensitivity=Config.WAKE_WORD_SENSITIVITY)
+        self.awake_until = 0.0
 
     def stop_speaking(self):
         """Stop current speech immediately."""
         self.stop_current_speech = True
+        # Cut the audio itself, not just the sentence loop
+        self.audio_player.stop()
+        self.offline_tts.stop()
         print("Stopping current speech")
 
-    async def speak(self, text: str) -> None:
-        """Convert text to speech using available TTS engine."""
-        if not text:
+    async def speak(self, text: str, token: Optional[CancellationToken] = None,
+                    trace: Optional[Trace] = None) -> None:
+        """Convert text to speech using available TTS engine; cancelling token stops it."""
+        if not text or (token is not None and token.cancelled):
             return
 
         # Clear any previous stop flag
         self.stop_current_speech = False
         self.is_speaking = True
+        # Synthesis requests and playback end as soon as the request is cancelled
+        unregister = token.on_cancel(self.stop_speaking) if token is not None else None
         try:
             # Clean the text to make speech more natural
             cleaned_text = self._clean_text_for_speech(text)
             print(f"Speaking text (length: {len(cleaned_text.split())} words)")
             
-            if self.use_elevenlabs and self.elevenlabs_api_key:
-                # Use ElevenLabs for premium voice
-                await self._speak_with_elevenlabs(cleaned_text)
-            elif self.use_edge_tts:
-                # Use Edge TTS for better free voice quality
-                await self._speak_with_edge_tts(cleaned_text)
-            else:
-                # Use offline pyttsx3
-                await self._speak_with_pyttsx3_async(cleaned_text)
+            # Best backend by measured latency, with the offline voice as a hedge
+            backend = await self.tts_router.speak(cleaned_text, trace)
+            mark(trace, "last_audio", backend=backend, stopped=self.stop_current_speech)
         except Exception as e:
             print(f"TTS error: {e}")
             print(f"Fallback: Text that would have been spoken: {text}")
         finally:
+            if unregister:
+                unregister()
             self.is_speaking = False
             self.stop_current_speech = False
+            # The user can answer without repeating the wake word
+            self.awake_until = time.monotonic() + Config.WAKE_WORD_FOLLOWUP_SECONDS
             print("Finished speaking")
     
     def _clean_text_for_speech(self, text: str) -> str:
@@ -162,488 +205,742 @@ class VoiceEngine:
         # Make sure text ends with a period to ensure proper completion
         if text and not text.rstrip().endswith(('.', '!', '?')):
             text = text.rstrip() + '.'
-            
-        # Remove special characters that may make speech sound unnatural
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)  # Replace **text** with text
-        text = re.sub(r'\*(.+?)\*', r'\1', text)      # Replace *text* with text
-        text = re.sub(r'\_(.+?)\_', r'\1', text)      # Replace _text_ with text
-        text = re.sub(r'\`(.+?)\`', r'\1', text)      # Replace `text` with text
-        text = re.sub(r'\~\~(.+?)\~\~', r'\1', text)  # Replace ~~text~~ with text
-        
-        # Remove Markdown code blocks which are hard to read aloud
-        text = re.sub(r'```[a-zA-Z]*\n(.*?)\n```', r'code example', text, flags=re.DOTALL)
-        
-        # Replace URLs with something more speakable
-        text = re.sub(r'https?://[^\s]+', 'a link', text)
-        
-        # Fix ellipsis for better pause handling
-        text = re.sub(r'\.\.\.+', ', ', text)  # Replace ellipsis with comma for cleaner pauses
-        
-        # Fix spacing after periods for better flow - ensure sentence boundaries are clear
-        text = re.sub(r'\.([A-Z])', r'. \1', text)  # Ensure space after period before capital
-        text = re.sub(r'\!([A-Z])', r'! \1', text)
-        text = re.sub(r'\?([A-Z])', r'? \1', text)
-        
-        # Ensure proper spacing around punctuation
-        text = re.sub(r'\s*\.\s*', '. ', text)  # Normalize period spacing
-        text = re.sub(r'\s*\!\s*', '! ', text)  # Normalize exclamation spacing
-        text = re.sub(r'\s*\?\s*', '? ', text)  # Normalize question mark spacing
-        text = re.sub(r'\s*\,\s*', ', ', text)  # Normalize comma spacing
-        
-        # Make sure sentence boundaries are respected
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        for i, sentence in enumerate(sentences):
-            if i < len(sentences)-1 and not sentence.rstrip().endswith(('.', '!', '?')):
-                sentences[i] = sentence.rstrip() + '.'
-        
-        # Rejoin with proper spacing
-        return ' '.join(sentences).strip()
+
+        # Markdown, URLs, ellipses and punctuation spacing in a single scan
+        return self.speech_cleaner.normalize(text).strip()
     
-    async def _speak_with_pyttsx3_async(self, text: str) -> None:
+    async def _speak_with_pyttsx3_async(self, text: str, on_audio: Optional[Callable[[], bool]] = None) -> None:
         """Use pyttsx3 for offline TTS in an async-friendly way."""
-        # Create a new engine instance each time to avoid run loop issues
+        # Clean up text for better speech synthesis
+        text = self._preprocess_text_for_speech(text)
+        print(f"Speaking offline (length: {len(text.split())} words)")
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def on_start():
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+
+        # The worker thread owns the engine; we only wait for its result
+        done = asyncio.wrap_future(self.offline_tts.speak(text, on_start=on_start))
         try:
-            # Run the TTS in a separate thread to not block the event loop
-            await asyncio.get_event_loop().run_in_executor(
-                None, 
-                self._speak_with_pyttsx3_sync, 
-                text
-            )
-        except Exception as e:
-            print(f"Async TTS error: {e}")
-    
-    def _speak_with_pyttsx3_sync(self, text: str) -> None:
-        """Synchronous TTS function to be run in a thread."""
-        with self.tts_lock:  # Use a lock to prevent multiple simultaneous TTS operations
-            try:
-                # Create a new engine each time for better pitch control
-                engine = pyttsx3.init()
-                
-                # Use enhanced voice settings for premium quality
-                engine.setProperty('rate', 180)  # Slightly faster for more natural speech
-                engine.setProperty('volume', 1.0)  # Full volume
-                
-                # Copy voice from main engine
-                if self.offline_engine:
-                    if self.offline_engine.getProperty('voice'):
-                        engine.setProperty('voice', self.offline_engine.getProperty('voice'))
-                
-                # Clean up text for better speech synthesis
-                text = self._preprocess_text_for_speech(text)
-                
-                # Check if the text is very short
-                if len(text.split()) <= 15:
-                    print(f"Speaking short text directly: {text}")
-                    engine.say(text)
-                    engine.runAndWait()
-                    return
-                
-                # For longer text, use a sentence-by-sentence approach for more natural pauses
-                print(f"Speaking text (length: {len(text.split())} words)")
-                
-                # Split text into sentences for better control
-                sentences = re.split(r'(?<=[.!?])\s+', text)
-                
-                for i, sentence in enumerate(sentences):
-                    if self.stop_current_speech:
-                        print("Speech interrupted")
-                        break
-                        
-                    if not sentence.strip():
-                        continue
-                        
-                    # Enhanced sentence-specific rate/pitch for more natural-sounding speech
-                    # Questions slightly higher pitch, exclamations more emphasis
-                    if sentence.strip().endswith('?'):
-                        engine.setProperty('rate', 175)  # Slightly slower for questions
-                    elif sentence.strip().endswith('!'):
-                        engine.setProperty('rate', 185)  # Slightly faster for exclamations
-                    else:
-                        engine.setProperty('rate', 180)  # Normal rate for statements
-                    
-                    # Speak this sentence
-                    engine.say(sentence.strip())
-                    engine.runAndWait()
-                    
-                    # Add natural pauses between sentences
-                    if i < len(sentences) - 1:  # Not the last sentence
-                        if sentence.endswith('!'):
-                            time.sleep(0.2)  # Exclamation
-                        elif sentence.endswith('?'):
-                            time.sleep(0.15)  # Question
-                        else:
-                            time.sleep(0.1)  # Normal pause
-                    
-                    # Check again for stop signal
-                    if self.stop_current_speech:
-                        print("Speech interrupted")
-                        break
-                        
-                print("Finished speaking")
-            except Exception as e:
-                print(f"TTS error: {e}")
-            finally:
-                self.is_speaking = False
-                self.stop_current_speech = False
+            # Claim the speaker only once the driver is really talking
+            await asyncio.wait([started, done], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            started.cancel()
+        if not done.done():
+            if on_audio and not on_audio():
+                # Another voice got there first
+                self.offline_tts.stop()
+                await done
+                return
+            completed = await done
+        else:
+            completed = await done
+            # Drivers that never report a start: claim once the speech is over
+            if completed and on_audio:
+                on_audio()
+        if completed:
+            print("Finished speaking")
+
+    def set_offline_voice(self, voice: str) -> None:
+        """Change the offline voice by id or name."""
+        self.offline_tts.set_voice(voice)
 
     def _preprocess_text_for_speech(self, text: str) -> str:
         """Preprocess text for better speech quality."""
-        # Fix common TTS pronunciation issues
-        text = text.replace("AI", "A.I.")
-        text = text.replace("API", "A.P.I.")
-        text = text.replace("UI", "U.I.")
-        text = text.replace("JSON", "Jason")
-        text = text.replace("vs.", "versus")
-        text = text.replace("etc.", "etcetera")
-        text = text.replace("i.e.", "that is")
-        text = text.replace("e.g.", "for example")
-        
-        # Fix numbers and special characters for better speech
-        text = re.sub(r'(\d+)%', r'\1 percent', text)
-        text = re.sub(r'(\d+)\+', r'\1 plus', text)
-        text = re.sub(r'(\d+)x(\d+)', r'\1 by \2', text)
-        
-        # Improve pronunciation of technical terms
-        tech_terms = {
-            r'\bML\b': 'machine learning',
-            r'\bDL\b': 'deep learning',
-            r'\bNLP\b': 'natural language processing',
-            r'\bCV\b': 'computer vision',
-            r'\bDB\b': 'database',
-            r'\bOS\b': 'operating system',
-            r'\bIDE\b': 'integrated development environment',
-            r'\bVM\b': 'virtual machine',
-            r'\bOOP\b': 'object oriented programming',
-            r'\bHTTP\b': 'H.T.T.P.',
-            r'\bHTML\b': 'H.T.M.L.',
-            r'\bCSS\b': 'C.S.S.',
-            r'\bURL\b': 'U.R.L.',
-            r'\bSEO\b': 'S.E.O.',
-            r'\bCPU\b': 'C.P.U.',
-            r'\bGPU\b': 'G.P.U.',
-            r'\bRAM\b': 'ram',
-            r'\bSSD\b': 'S.S.D.',
-            r'\bHDD\b': 'H.D.D.',
-            r'\bUSB\b': 'U.S.B.',
-            r'\bWiFi\b': 'Wi-Fi',
-            r'\bIP\b': 'I.P.',
-            r'\bGUI\b': 'G.U.I.',
-            r'\bCLI\b': 'C.L.I.',
-            r'\bSDK\b': 'S.D.K.',
-            r'\bAPI\b': 'A.P.I.',
-            r'\bJDK\b': 'J.D.K.',
-            r'\bJVM\b': 'J.V.M.',
-            r'\bJIT\b': 'J.I.T.',
-            r'\bJAR\b': 'jar',
-            r'\bWAR\b': 'war',
-            r'\bEAR\b': 'ear',
-            r'\bJSP\b': 'J.S.P.',
-            r'\bJSF\b': 'J.S.F.',
-            r'\bJPA\b': 'J.P.A.',
-            r'\bJMS\b': 'J.M.S.',
-            r'\bJNDI\b': 'J.N.D.I.',
-            r'\bJMX\b': 'J.M.X.',
-            r'\bJNI\b': 'J.N.I.',
-            r'\bJAAS\b': 'J.A.A.S.',
-            r'\bJAWS\b': 'jaws',
-        }
-        
-        # Apply technical term replacements
-        for pattern, replacement in tech_terms.items():
-            text = re.sub(pattern, replacement, text)
-        
-        # Add slight pauses with commas where beneficial
-        text = re.sub(r'(\w+)\s+(however|therefore|moreover|furthermore|nevertheless|consequently)', r'\1, \2', text)
-        
-        # Ensure proper spacing after punctuation
-        text = re.sub(r'([.!?;:])\s*([A-Za-z])', r'\1 \2', text)
-        
-        return text
+        # Acronyms, numbers and pause hints, compiled into one pass at startup
+        return self.pronunciation_normalizer.normalize(text)
     
-    async def _speak_with_elevenlabs(self, text: str) -> None:
+    async def _speak_with_elevenlabs(self, text: str, on_audio: Optional[Callable[[], bool]] = None) -> None:
         """Use ElevenLabs API for premium quality voice."""
-        try:
-            # For very long text, break it into chunks to ensure complete delivery
-            max_chunk_length = 300  # Characters per chunk
-            
-            if len(text) > max_chunk_length:
-                print(f"Text is long ({len(text)} chars), breaking into chunks for better delivery")
-                # Split into sentences first
-                sentences = re.split(r'(?<=[.!?])\s+', text)
-                chunks = []
-                current_chunk = ""
-                
-                for sentence in sentences:
-                    # If adding this sentence would exceed chunk size, finalize current chunk
-                    if len(current_chunk) + len(sentence) > max_chunk_length:
-                        if current_chunk:  # Only add non-empty chunks
-                            chunks.append(current_chunk)
-                        current_chunk = sentence
-                    else:
-                        # Add to current chunk
-                        if current_chunk:
-                            current_chunk += " " + sentence
-                        else:
-                            current_chunk = sentence
-                
-                # Add the last chunk if it's not empty
-                if current_chunk:
+        chunks = self._elevenlabs_chunks(text)
+        if len(chunks) == 1:
+            # Short text, process directly
+            await self._process_elevenlabs_chunk(chunks[0], on_audio)
+            return
+
+        print(f"Broken into {len(chunks)} chunks for ElevenLabs delivery")
+
+        # Process each chunk
+        for i, chunk in enumerate(chunks):
+            if self.stop_current_speech:
+                print("Speech interrupted")
+                break
+
+            print(f"Speaking chunk {i+1}/{len(chunks)}")
+            try:
+                await self._process_elevenlabs_chunk(chunk, on_audio)
+            except Exception as e:
+                if i == 0:
+                    raise
+                # Part of the response was already heard; finish it with the offline voice
+                print(f"ElevenLabs failed mid-response, finishing offline: {e}")
+                await self._speak_with_pyttsx3_async(" ".join(chunks[i:]))
+                return
+
+            # Brief pause between chunks for natural flow
+            if i < len(chunks) - 1 and not self.stop_current_speech:
+                await asyncio.sleep(0.5)
+
+    def _elevenlabs_chunks(self, text: str) -> list:
+        """Split long text into sentence-aligned chunks for ElevenLabs."""
+        # For very long text, break it into chunks to ensure complete delivery
+        max_chunk_length = 300  # Characters per chunk
+        if len(text) <= max_chunk_length:
+            return [text]
+
+        print(f"Text is long ({len(text)} chars), breaking into chunks for better delivery")
+        # Split into sentences first
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+        chunks = []
+        current_chunk = ""
+
+        for sentence in sentences:
+            # If adding this sentence would exceed chunk size, finalize current chunk
+            if len(current_chunk) + len(sentence) > max_chunk_length:
+                if current_chunk:  # Only add non-empty chunks
                     chunks.append(current_chunk)
-                
-                print(f"Broken into {len(chunks)} chunks for ElevenLabs delivery")
-                
-                # Process each chunk
-                for i, chunk in enumerate(chunks):
-                    if self.stop_current_speech:
-                        print("Speech interrupted")
-                        break
-                    
-                    print(f"Speaking chunk {i+1}/{len(chunks)}")
-                    await self._process_elevenlabs_chunk(chunk)
-                    
-                    # Brief pause between chunks for natural flow
-                    if i < len(chunks) - 1 and not self.stop_current_speech:
-                        await asyncio.sleep(0.5)
+                current_chunk = sentence
             else:
-                # Short text, process directly
-                await self._process_elevenlabs_chunk(text)
-        except Exception as e:
-            print(f"ElevenLabs error: {e}")
-            # Fallback to offline TTS
-            await self._speak_with_pyttsx3_async(text)
-            
-    async def _process_elevenlabs_chunk(self, text: str) -> None:
-        """Process a single chunk of text with ElevenLabs."""
-        try:
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.elevenlabs_voice_id}/stream"
-            
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.elevenlabs_api_key
-            }
-            
-            data = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.75,  # Increased stability for more consistent, authoritative tone
-                    "similarity_boost": 0.5   # Lower similarity to allow for more expressive delivery
-                }
+                # Add to current chunk
+                if current_chunk:
+                    current_chunk += " " + sentence
+                else:
+                    current_chunk = sentence
+
+        # Add the last chunk if it's not empty
+        if current_chunk:
+            chunks.append(current_chunk)
+        return chunks
+
+    def _elevenlabs_request_parts(self, text: str):
+        """Build the URL, headers, payload and cache key for one ElevenLabs chunk."""
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.elevenlabs_voice_id}/stream"
+
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_api_key
+        }
+
+        data = {
+            "text": text,
+            "model_id": "eleven_monolingual_v1",
+            "voice_settings": {
+                "stability": 0.75,  # Increased stability for more consistent, authoritative tone
+                "similarity_boost": 0.5   # Lower similarity to allow for more expressive delivery
             }
-            
-            # Make the API call asynchronously
-            response_content = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self._make_elevenlabs_request(url, headers, data)
-            )
-            
-            if response_content and not self.stop_current_speech:
-                # Save the audio to a file
-                with open("temp_audio.mp3", "wb") as f:
-                    f.write(response_content)
-                
-                # Play using a system command
-                if os.name == "nt":  # Windows
-                    os.system("start temp_audio.mp3")
-                    # More accurate wait calculation - allow more time for longer text
-                    word_count = len(text.split())
-                    # Calculate time in seconds (approx 0.3s per word, with minimum 2s)
-                    wait_time = max(2, int(word_count * 0.3))
-                    print(f"Waiting approximately {wait_time} seconds for {word_count} words")
-                    
-                    for i in range(wait_time):
-                        if i > 0 and i % 5 == 0:
-                            print(f"Still playing... ({i}/{wait_time}s)")
-                        await asyncio.sleep(1)
-                        if self.stop_current_speech:
-                            # Try to stop audio playback on Windows
-                            os.system("taskkill /F /IM wmplayer.exe >nul 2>&1")
-                            break
-                else:  # macOS or Linux
-                    os.system("mpg123 temp_audio.mp3")
+        }
+        cache_key = TTSCache.make_key("elevenlabs", self.elevenlabs_voice_id, text,
+                                      model=data["model_id"], **data["voice_settings"])
+        return url, headers, data, cache_key
+
+    async def _process_elevenlabs_chunk(self, text: str, on_audio: Optional[Callable[[], bool]] = None) -> None:
+        """Process a single chunk of text with ElevenLabs; raises if no audio could be produced."""
+        url, headers, data, cache_key = self._elevenlabs_request_parts(text)
+
+        # Repeated phrases are served from the cache instead of the network
+        response_content = None
+        if self.tts_cache:
+            response_content = self.tts_cache.get(cache_key)
+
+        if self.stop_current_speech:
+            return
+
+        if response_content:
+            if on_audio and not on_audio():
+                return
+            if self.audio_player.available:
+                await self._play_mp3_bytes(response_content)
             else:
-                # Fallback to offline TTS
-                await self._speak_with_pyttsx3_async(text)
-        except Exception as e:
-            print(f"ElevenLabs chunk processing error: {e}")
-            # Fallback to offline TTS
-            await self._speak_with_pyttsx3_async(text)
-    
-    def _make_elevenlabs_request(self, url, headers, data):
-        """Make the HTTP request to ElevenLabs API synchronously."""
+                await self._play_elevenlabs_with_system_player(text, response_content)
+            return
+
+        if self.audio_player.available:
+            # Stream: decode and play while the response is still downloading
+            response_content, stream = await self._run_blocking(
+                self._stream_elevenlabs_request, url, headers, data, on_audio)
+            if stream is None:
+                return
+            # Wait for the real end of playback
+            await stream.handle.wait_async()
+        else:
+            # Make the API call asynchronously
+            response_content = await self._run_blocking(self._make_elevenlabs_request, url, headers, data)
+            if self.stop_current_speech or (on_audio and not on_audio()):
+                return
+            await self._play_elevenlabs_with_system_player(text, response_content)
+
+        # Only complete downloads are worth caching
+        if response_content and self.tts_cache and not self.stop_current_speech:
+            self.tts_cache.put(cache_key, response_content)
+
+    async def _play_elevenlabs_with_system_player(self, text: str, response_content: bytes) -> None:
+        """Play ElevenLabs audio with a system command when in-process playback is unavailable."""
+        if os.name != "nt":  # macOS or Linux
+            await self._play_with_system_player(response_content)
+            return
+
+        # Windows: the default player needs a file, so each chunk gets its own
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+            temp_file.write(response_content)
+            temp_filename = temp_file.name
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=10)
-            if response.status_code == 200:
-                return response.content
-            else:
-                print(f"ElevenLabs API error: {response.status_code} - {response.text}")
-                return None
-        except Exception as e:
-            print(f"ElevenLabs request error: {e}")
-            return None
+            os.system(f'start "" "{temp_filename}"')
+            # More accurate wait calculation - allow more time for longer text
+            word_count = len(text.split())
+            # Calculate time in seconds (approx 0.3s per word, with minimum 2s)
+            wait_time = max(2, int(word_count * 0.3))
+            print(f"Waiting approximately {wait_time} seconds for {word_count} words")
 
-    async def _speak_with_edge_tts(self, text: str) -> None:
-        """Use Edge TTS for high-quality free voice output."""
+            for i in range(wait_time):
+                if i > 0 and i % 5 == 0:
+                    print(f"Still playing... ({i}/{wait_time}s)")
+                await asyncio.sleep(1)
+                if self.stop_current_speech:
+                    # Try to stop audio playback on Windows
+                    os.system("taskkill /F /IM wmplayer.exe >nul 2>&1")
+                    break
+        finally:
+            self._remove_temp_audio(temp_filename)
+
+    def _stream_elevenlabs_request(self, url, headers, data, on_audio=None):
+        """Feed the ElevenLabs response into a playback stream as it arrives.
+
+        Returns the full audio and the stream, or (None, None) if playback never started.
+        """
+        received = bytearray()
+        stream = None
         try:
-            print(f"Using Edge TTS with voice: {self.edge_voice}")
-            
-            # Create a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_filename = temp_file.name
-            
-            # Direct approach with simpler Edge TTS usage
-            # Instead of SSML, use direct voice-text method which is more reliable
-            if len(text.split()) > 15:
-                sentences = re.split(r'(?<=[.!?])\s+', text)
-                
-                for i, sentence in enumerate(sentences):
+            with self.http_session.post(url, json=data, headers=headers, timeout=(5, 10), stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"ElevenLabs API error: {response.status_code} - {response.text}")
+                for chunk in response.iter_content(chunk_size=4096):
                     if self.stop_current_speech:
-                        print("Speech interrupted")
                         break
-                    
-                    if not sentence.strip():
+                    if not chunk:
                         continue
-                    
-                    print(f"Speaking sentence {i+1}/{len(sentences)}")
-                    
-                    # Use direct text method (more reliable than SSML)
-                    try:
-                        # Use async with better error handling
-                        tts = edge_tts.Communicate(text=sentence.strip(), voice=self.edge_voice, rate="+2%", volume="+10%", pitch="+2Hz")
-                        await tts.save(temp_filename)
-                        
-                        # Play the audio
-                        if os.name == "nt":  # Windows
-                            # Use a simpler method for Windows that is more reliable
-                            os.system(f'powershell -c "(New-Object Media.SoundPlayer \'{temp_filename}\').PlaySync()"')
-                        else:
-                            os.system(f"mpg123 {temp_filename}")
-                        
-                        # Add natural pauses between sentences
-                        if i < len(sentences) - 1 and not self.stop_current_speech:
-                            if sentence.endswith('!'):
-                                await asyncio.sleep(0.2)  # Exclamation
-                            elif sentence.endswith('?'):
-                                await asyncio.sleep(0.15)  # Question
-                            else:
-                                await asyncio.sleep(0.1)  # Normal pause
-                    except Exception as inner_e:
-                        print(f"Error with Edge TTS for sentence: {inner_e}")
-                        continue
-            else:
-                # For shorter text, use direct approach
-                try:
-                    tts = edge_tts.Communicate(text=text.strip(), voice=self.edge_voice, rate="+2%", volume="+10%", pitch="+2Hz")
-                    await tts.save(temp_filename)
-                    
-                    # Play the audio
-                    if os.name == "nt":  # Windows
-                        os.system(f'powershell -c "(New-Object Media.SoundPlayer \'{temp_filename}\').PlaySync()"')
-                    else:
-                        os.system(f"mpg123 {temp_filename}")
-                except Exception as inner_e:
-                    print(f"Error with Edge TTS for short text: {inner_e}")
-                    raise  # Re-raise to fall back to pyttsx3
-            
-            # Clean up temporary file
-            try:
-                os.unlink(temp_filename)
-            except:
-                pass
-                
+                    if stream is None:
+                        # Claim the speaker only once there is audio to play
+                        if on_audio and not on_audio():
+                            return None, None
+                        stream = self.audio_player.open_stream()
+                    received += chunk
+                    stream.feed_mp3(chunk)
+        except Exception:
+            if stream is not None:
+                stream.abort()
+            raise
+        if stream is None:
+            if self.stop_current_speech:
+                return None, None
+            raise RuntimeError("ElevenLabs returned no audio")
+        if self.stop_current_speech:
+            stream.abort()
+            return None, stream
+        stream.close()
+        return bytes(received), stream
+
+    def _make_elevenlabs_request(self, url, headers, data) -> bytes:
+        """Make the HTTP request to ElevenLabs API synchronously."""
+        response = self.http_session.post(url, json=data, headers=headers, timeout=10)
+        if response.status_code != 200:
+            raise RuntimeError(f"ElevenLabs API error: {response.status_code} - {response.text}")
+        return response.content
+
+    async def _speak_with_edge_tts(self, text: str, on_audio: Optional[Callable[[], bool]] = None) -> None:
+        """Use Edge TTS for high-quality free voice output; raises if nothing could be spoken."""
+        print(f"Using Edge TTS with voice: {self.edge_voice}")
+
+        # One session for the whole response, streamed straight into the player
+        if self._edge_streams_whole_response():
+            await self._stream_edge_response(text, on_audio)
+            return
+
+        sentences = self._edge_units(text)
+        lost = False
+
+        async def play(sentence: str, audio: bytes) -> None:
+            nonlocal lost
+            if on_audio and not on_audio():
+                lost = True
+                return
+            await self._play_edge_sentence(sentence, audio)
+
+        # Synthesize upcoming sentences while the current one is playing
+        pipeline = SpeechPipeline(
+            synthesize=self._synthesize_edge_sentence,
+            play=play,
+            should_stop=lambda: self.stop_current_speech or lost,
+            pause_for=self._sentence_pause,
+            lookahead=self.tts_lookahead
+        )
+        played = await pipeline.run(sentences)
+
+        # Nothing could be synthesized at all - let the router try another voice
+        if not played and pipeline.errors and not self.stop_current_speech:
+            raise pipeline.errors[0]
+
+    def _edge_streams_whole_response(self) -> bool:
+        return self.edge_batched and self.audio_player.available
+
+    def _edge_units(self, text: str) -> list:
+        """Pieces of text Edge TTS renders (and caches) separately."""
+        if self._edge_streams_whole_response() or len(text.split()) <= 15:
+            return [text]
+        # Instead of SSML, use direct voice-text method which is more reliable
+        return re.split(r'(?<=[.!?])\s+', text)
+
+    async def _stream_edge_response(self, text: str, on_audio: Optional[Callable[[], bool]] = None) -> None:
+        """Speak a whole response through a single Edge TTS session, playing audio as it arrives."""
+        cache_key = None
+        if self.tts_cache:
+            cache_key = TTSCache.make_key("edge", self.edge_voice, text,
+                                          self.edge_rate, self.edge_pitch, self.edge_volume)
+            cached = self.tts_cache.get(cache_key)
+            if cached:
+                if on_audio and not on_audio():
+                    return
+                await self._play_mp3_bytes(cached)
+                return
+
+        # The service builds the SSML itself, so voice and prosody apply to the
+        # whole response and sentence pauses come from its own punctuation handling
+        tts = edge_tts.Communicate(text=text, voice=self.edge_voice, rate=self.edge_rate,
+                                   volume=self.edge_volume, pitch=self.edge_pitch)
+        stream = None
+        audio = bytearray()
+        try:
+            async for chunk in tts.stream():
+                if self.stop_current_speech:
+                    break
+                if chunk["type"] != "audio":
+                    continue
+                if stream is None:
+                    # Claim the speaker only once there is audio to play
+                    if on_audio and not on_audio():
+                        return
+                    stream = self.audio_player.open_stream()
+                audio += chunk["data"]
+                stream.feed_mp3(chunk["data"])
+        except Exception:
+            if stream is None:
+                raise
+            # Audio already heard must not be repeated by another voice; play out what arrived
+            print("Edge TTS stream ended early")
+            stream.close()
+            await stream.handle.wait_async()
+            return
+        except BaseException:
+            # Cancelled (lost the race, request abandoned): silence it and let the caller know
+            if stream is not None:
+                stream.abort(interrupted=True)
+            raise
+
+        if stream is None:
+            if self.stop_current_speech:
+                return
+            raise RuntimeError("Edge TTS returned no audio")
+        if self.stop_current_speech:
+            stream.abort()
+        stream.close()
+        try:
+            await stream.handle.wait_async()
+        except BaseException:
+            stream.abort(interrupted=True)
+            raise
+
+        if cache_key and not stream.handle.interrupted and not self.stop_current_speech:
+            self.tts_cache.put(cache_key, bytes(audio))
+
+    async def _synthesize_edge_sentence(self, sentence: str) -> bytes:
+        """Render one sentence with Edge TTS into memory, using the cache when possible."""
+        cache_key = None
+        if self.tts_cache:
+            cache_key = TTSCache.make_key("edge", self.edge_voice, sentence,
+                                          self.edge_rate, self.edge_pitch, self.edge_volume)
+            cached = self.tts_cache.get(cache_key)
+            if cached:
+                return cached
+
+        # Each sentence collects its own chunks, so overlapping renders never share a file
+        tts = edge_tts.Communicate(text=sentence, voice=self.edge_voice, rate=self.edge_rate,
+                                   volume=self.edge_volume, pitch=self.edge_pitch)
+        audio = bytearray()
+        async for chunk in tts.stream():
+            if chunk["type"] == "audio":
+                audio += chunk["data"]
+        audio = bytes(audio)
+
+        if cache_key and audio:
+            self.tts_cache.put(cache_key, audio)
+        return audio
+
+    async def _play_edge_sentence(self, sentence: str, audio: bytes) -> None:
+        """Play a rendered sentence without blocking the event loop."""
+        if self.audio_player.available:
+            await self._play_mp3_bytes(audio)
+        else:
+            await self._play_with_system_player(audio)
+
+    @staticmethod
+    async def _run_blocking(function, *args):
+        """Await a blocking call on the shared I/O pool (IO_WORKERS threads)."""
+        return await asyncio.wrap_future(shared_loop().run_blocking(function, *args),
+                                         loop=asyncio.get_running_loop())
+
+    async def _play_mp3_bytes(self, data: bytes) -> None:
+        """Decode MP3 audio in-process and wait until it has been played."""
+        handle = self.audio_player.play_mp3(data)
+        await handle.wait_async()
+
+    async def _play_with_system_player(self, audio: bytes) -> None:
+        """Play MP3 bytes with an external player when in-process playback is unavailable."""
+        if os.name != "nt":
+            # mpg123 reads the audio from stdin, nothing is written to disk
+            await self._run_blocking(self._pipe_to_player, audio)
+            return
+
+        # Windows players need a file; give each utterance its own
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+            temp_file.write(audio)
+            temp_filename = temp_file.name
+        try:
+            await self._run_blocking(self._play_audio_file, temp_filename)
+        finally:
+            self._remove_temp_audio(temp_filename)
+
+    def _pipe_to_player(self, audio: bytes) -> None:
+        """Stream MP3 bytes into mpg123 over stdin, killing it if speech is stopped."""
+        try:
+            player = subprocess.Popen(["mpg123", "-q", "-"], stdin=subprocess.PIPE,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except Exception as e:
-            print(f"Edge TTS error, falling back to offline voice: {e}")
-            # Fall back to offline TTS
-            await self._speak_with_pyttsx3_async(text)
+            print(f"Audio playback error: {e}")
+            return
+        view = memoryview(audio)
+        try:
+            # Write in slices so a stop is noticed while the pipe is full
+            for offset in range(0, len(view), 16384):
+                if self.stop_current_speech:
+                    break
+                player.stdin.write(view[offset:offset + 16384])
+            player.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        while player.poll() is None:
+            if self.stop_current_speech:
+                player.kill()
+                break
+            time.sleep(0.05)
 
-    def listen(self, callback: Callable[[str], None]) -> None:
-        """Continuously listen to microphone input."""
+    def _play_audio_file(self, filename: str) -> None:
+        """Play an audio file with the system player, killing it if speech is stopped."""
+        if os.name == "nt":  # Windows
+            # Use a simpler method for Windows that is more reliable
+            command = ["powershell", "-c", f"(New-Object Media.SoundPlayer '{filename}').PlaySync()"]
+        else:
+            command = ["mpg123", "-q", filename]
+        try:
+            player = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            print(f"Audio playback error: {e}")
+            return
+        while player.poll() is None:
+            if self.stop_current_speech:
+                player.kill()
+                break
+            time.sleep(0.05)
+
+    def _remove_temp_audio(self, filename: str) -> None:
+        """Delete a temporary audio file, ignoring errors."""
+        try:
+            os.unlink(filename)
+        except OSError:
+            pass
+
+    def _sentence_pause(self, sentence: str) -> float:
+        """Natural pause length after a sentence, based on its punctuation."""
+        if sentence.endswith('!'):
+            return 0.2  # Exclamation
+        elif sentence.endswith('?'):
+            return 0.15  # Question
+        return 0.1  # Normal pause
+
+    def listen(self, callback: Callable[[str, Optional[Trace]], None],
+               partial_callback: Optional[Callable[[PartialHypothesis], None]] = None) -> None:
+        """Continuously listen to microphone input.
+
+        callback receives each finished turn (one or more transcripts, see
+        TurnDetector) with its trace (None when tracing is off or for
+        generated messages). partial_callback receives
+        interim transcripts while the user is still speaking (streaming
+        recognizers only).
+        """
         self.is_listening = True
+        self.partial_callback = partial_callback
+        self.turn_callback = callback
         
-        def audio_callback(recognizer, audio):
+        def audio_callback(utterance, text, error):
+            # Runs on a recognition worker, in the order the utterances were spoken
             try:
-                # If we're currently speaking, stop talking to listen to the user
-                if self.is_speaking:
-                    self.stop_speaking()
-                    time.sleep(0.2)  # Small pause to let speech stop
-                
-                # Try using Google's speech recognition (more accurate but requires internet)
-                text = recognizer.recognize_google(audio)
+                if error is not None:
+                    self.turn_detector.add_fragment("", utterance.speech_ended_at)
+                    raise error
+                if utterance.speech_ended_at is not None:
+                    self.listen_latencies.append(time.monotonic() - utterance.speech_ended_at)
+                if utterance.wake_word and not text.strip():
+                    # The gate opened but there was nothing to recognize
+                    self.wake_word.record_false_accept()
                 if text:
                     self.last_speech_time = time.time()
-                    # Only process if the text seems complete (has proper ending or is long enough)
-                    # This helps prevent processing incomplete sentences
-                    if len(text.split()) > 3 or text.rstrip().endswith(('.', '!', '?')):
-                        callback(text)
-                    else:
-                        print(f"Short phrase detected, waiting for more: '{text}'")
-            except sr.UnknownValueError:
-                # Nothing recognized
-                pass
-            except sr.RequestError as e:
-                print(f"Speech service error: {e}")
-                # Try using offline Sphinx recognition as fallback
-                try:
-                    from speech_recognition import Recognizer, AudioFile
-                    text = recognizer.recognize_sphinx(audio)
-                    if text:
-                        self.last_speech_time = time.time()
-                        callback(text)
-                except:
-                    # Only use simulated input for significant errors, not for UnknownValueError
-                    print("Speech recognition services failed")
-                    if time.time() - self.last_speech_time > 5:  # Only simulate if it's been a while
-                        callback("I didn't catch that. Could you please repeat?")
+                    trace = None
+                    if self.tracer is not None and utterance.speech_ended_at is not None:
+                        # The turn's clock starts when the user stopped talking
+                        trace = self.tracer.start("voice", origin=utterance.speech_ended_at)
+                        trace.mark("speech_end", at=utterance.speech_ended_at)
+                        if utterance.closed_at is not None:
+                            # Hangover elapsed; recognition is finishing from here
+                            trace.mark("endpoint", at=utterance.closed_at)
+                        trace.mark("transcript", words=len(text.split()),
+                                   recognizer=self.speech_recognizer.name)
+                # Commits now if the turn looks finished, otherwise after the user's usual pause
+                self.turn_detector.add_fragment(text or "", utterance.speech_ended_at, trace)
+                # Wake the listen loop so it can time the end of turn
+                self.audio_queue.put(None)
+            except Exception as e:
+                # Only use simulated input for significant errors, not for silence
+                print(f"Speech recognition failed: {e}")
+                if time.time() - self.last_speech_time > 5:  # Only simulate if it's been a while
+                    callback("I didn't catch that. Could you please repeat?", None)
 
         def listen_in_background():
+            if not self.audio_capture.start():
+                # Use a simulated input if real microphone fails
+                callback("I'm having trouble with the microphone. Please check your audio settings.", None)
+                return
             try:
-                with self.microphone as source:
-                    print("Listening for voice input...")
-                    
-                    # More dynamic energy threshold for better recognition in various environments
-                    self.recognizer.dynamic_energy_threshold = True
-                    
-                    while self.is_listening:
-                        try:
-                            # Listen with longer timeout and phrase_time_limit for more complete sentences
-                            audio = self.recognizer.listen(
-                                source, 
-                                timeout=1.5,  # Increased from 1.0
-                                phrase_time_limit=10.0  # Increased from 7.5 to allow longer phrases
-                            )
-                            self.audio_queue.put(audio)
-                        except sr.WaitTimeoutError:
-                            # Check if we've been silent for a while - use silence_threshold
-                            if time.time() - self.last_speech_time > self.silence_threshold:
-                                continue
-                        except Exception as e:
-                            print(f"Error in background listening: {e}")
-                            time.sleep(0.1)  # Small sleep to prevent CPU spin
+                print("Listening for voice input...")
+                self._capture_utterances()
             except Exception as e:
                 print(f"Critical error in microphone listening: {e}")
-                # Use a simulated input if real microphone fails
-                callback("I'm having trouble with the microphone. Please check your audio settings.")
+                callback("I'm having trouble with the microphone. Please check your audio settings.", None)
+            finally:
+                self.audio_capture.stop()
 
         # Start background listening
         listening_thread = threading.Thread(target=listen_in_background, daemon=True)
         listening_thread.start()
-        
-        # Process audio queue
+
+        # Final transcripts are produced in parallel so network round trips overlap
+        self.recognition_pool = RecognitionPool(audio_callback, workers=Config.RECOGNITION_WORKERS)
+        try:
+            while self.is_listening:
+                # Commits a pending turn whose wait is over
+                remaining = self.turn_detector.poll()
+                try:
+                    item = self.audio_queue.get(timeout=0.5 if remaining is None else min(0.5, remaining))
+                    if item is None:
+                        continue
+                    stream, utterance = item
+                    self.recognition_pool.submit(stream, utterance)
+                except queue.Empty:
+                    continue
+                except Exception as e:
+                    print(f"Error processing audio: {e}")
+        finally:
+            self.recognition_pool.shutdown()
+            self.turn_detector.flush()
+            self.turn_detector.save()
+
+    def _capture_utterances(self) -> None:
+        """Endpoint captured audio with the VAD and queue each utterance for recognition."""
+        capture = self.audio_capture
+        vad = VoiceActivityDetector(
+            capture.sample_rate,
+            frame_ms=Config.VAD_FRAME_MS,
+            margin_db=Config.VAD_MARGIN_DB,
+            max_zcr=Config.VAD_MAX_ZCR,
+            min_speech_ms=Config.VAD_MIN_SPEECH_MS,
+            hangover_ms=Config.VAD_HANGOVER_MS,
+            pre_roll_ms=Config.VAD_PRE_ROLL_MS,
+            max_utterance_s=Config.MAX_UTTERANCE_SECONDS,
+            noise_floor=self.noise_floor
+        )
+        vad.time_scale = capture.ring.time_scale
+        self.vad = vad
+        reader = capture.reader()
+        stream = None
+        # Utterance waiting for the wake word decision, and how much of it has been captured
+        gated, gated_end = None, 0
+        barge_in = None
+        # Utterance that started over our own voice with no working echo cancellation
+        muted = None
+
         while self.is_listening:
-            try:
-                # Get audio with a shorter timeout for more responsive experience
-                audio = self.audio_queue.get(timeout=0.5)
-                audio_callback(self.recognizer, audio)
-            except queue.Empty:
+            # Whole VAD frames straight out of the ring buffer, no copies
+            samples = reader.read(capture.sample_rate // 10, multiple=vad.frame_samples, timeout=0.5)
+            if samples is None:
                 continue
-            except Exception as e:
-                print(f"Error processing audio: {e}")
+
+            position = reader.position - len(samples)
+            for event, utterance, frame in vad.feed(samples, position=position, end_time=reader.time()):
+                if event == "start":
+                    if self.is_speaking and not self._echo_cancelled():
+                        # Most likely the assistant hearing itself; ignore it as before AEC
+                        muted = utterance
+                        continue
+                    self.turn_detector.speech_started(utterance.started_at)
+                    if self._wake_word_required():
+                        gated, gated_end = utterance, utterance.onset_end_sample
+                        continue
+                    stream = self._start_recognition(utterance, utterance.onset_end_sample)
+                    continue
+
+                if utterance is muted:
+                    if event == "end":
+                        muted = None
+                    continue
+
+                if utterance is gated:
+                    gated_end = utterance.end_sample if event == "end" else gated_end + len(frame)
+                    if event == "end" or gated_end - utterance.start_sample >= self.wake_word.window_samples:
+                        gated = None
+                        stream = self._check_wake_word(utterance, gated_end)
+                    if event != "end":
+                        continue
+
+                if event == "audio" and stream is not None:
+                    stream.feed(frame)
+                    # Genuine speech over our own (echo-cancelled) voice interrupts it
+                    if (self.is_speaking and barge_in is not utterance and self._echo_cancelled()
+                            and utterance.duration() >= Config.BARGE_IN_MS / 1000.0 * vad.time_scale):
+                        barge_in = utterance
+                        print("User started speaking, stopping speech")
+                        self.stop_speaking()
+                elif event == "end":
+                    # Unrecognized speech (no wake word) must not hold up the end of turn
+                    self.turn_detector.speech_ended(utterance.speech_ended_at, recognized=stream is not None)
+                    if stream is None:
+                        continue
+                    if utterance.truncated:
+                        print(f"Utterance reached {Config.MAX_UTTERANCE_SECONDS}s limit, splitting")
+                    self.audio_queue.put((stream, utterance))
+                    stream = None
+
+    def _echo_cancelled(self) -> bool:
+        """Whether the microphone can be trusted while speaking: AEC is on and has converged."""
+        return (self.echo_canceller is not None
+                and self.echo_canceller.erle_db() >= Config.BARGE_IN_MIN_ERLE_DB)
+
+    def _commit_turn(self, text: str, trace: Optional[Trace]) -> None:
+        if self.turn_callback is not None:
+            self.turn_callback(text, trace)
+
+    def _start_recognition(self, utterance, end_sample: int) -> RecognitionStream:
+        """Open a recognizer stream and feed it the utterance captured so far."""
+        capture = self.audio_capture
+        # Streaming recognizers start decoding while the user is still talking
+        stream = self.speech_recognizer.start_stream(capture.sample_rate, capture.sample_width)
+        stream.on_partial = self.partial_callback
+        stream.feed(capture.ring.view(utterance.start_sample, end_sample - utterance.start_sample))
+        return stream
+
+    def _wake_word_required(self) -> bool:
+        """Utterances must start with a wake word unless the conversation is already open."""
+        return (self.wake_word is not None and self.wake_word.active
+                and time.monotonic() >= self.awake_until)
+
+    def _check_wake_word(self, utterance, end_sample: int) -> Optional[RecognitionStream]:
+        """Score the utterance head; only accepted audio reaches the recognizer."""
+        head = self.audio_capture.ring.view(utterance.start_sample, end_sample - utterance.start_sample)
+        phrase, score = self.wake_word.detect(head)
+        if phrase is None:
+            return None
+        print(f"Wake word '{phrase}' detected (score {score:.2f})")
+        utterance.wake_word = phrase
+        self.awake_until = time.monotonic() + Config.WAKE_WORD_FOLLOWUP_SECONDS
+        return self._start_recognition(utterance, end_sample)
+
+    def get_recognizer_stats(self) -> dict:
+        """Get performance figures of the speech recognizer (e.g. Whisper real-time factor)."""
+        latencies = sorted(self.listen_latencies)
+        stats = {"backend": self.speech_recognizer.name, **self.speech_recognizer.stats()}
+        # End of speech (as seen by the VAD) to transcript ready; includes the hangover
+        stats["speech_end_to_text_p50"] = latencies[len(latencies) // 2] if latencies else None
+        stats["speech_end_to_text_p90"] = latencies[int(0.9 * (len(latencies) - 1))] if latencies else None
+        stats["vad_hangover_ms"] = Config.VAD_HANGOVER_MS
+        if self.recognition_pool is not None:
+            stats.update(self.recognition_pool.stats())
+        if self.vad is not None and self.vad.noise_floor_db is not None:
+            stats["noise_floor_db"] = round(self.vad.noise_floor_db, 1)
+        if self.wake_word is not None:
+            stats["wake_word"] = self.wake_word.stats()
+        if self.echo_canceller is not None:
+            stats["echo_canceller"] = self.echo_canceller.stats()
+        stats["turns"] = self.turn_detector.stats()
+        return stats
 
     def stop_listening(self) -> None:
         """Stop the continuous listening process."""
         self.is_listening = False
 
+    def prerender_phrases(self, phrases: List[str], should_continue: Callable[[], bool] = lambda: True) -> int:
+        """Blocking prerender() on the shared event loop; returns how many phrases were rendered."""
+        return shared_loop().run(self.prerender(phrases, should_continue))
+
+    async def prerender(self, phrases: List[str], should_continue: Callable[[], bool] = lambda: True) -> int:
+        """Render fixed phrases for the current voice into the TTS cache; returns how many were rendered.
+
+        Yields to live speech and stops as soon as should_continue() returns False.
+        """
+        if not self.tts_cache:
+            return 0
+        ranked = self.tts_router.rank()
+        backend = ranked[0] if ranked else None
+        if backend == "edge":
+            units = lambda text: [(u, self._prerender_edge) for u in self._edge_units(text) if u.strip()]
+        elif backend == "elevenlabs":
+            units = lambda text: [(c, self._prerender_elevenlabs) for c in self._elevenlabs_chunks(text)]
+        else:
+            # The offline voice renders instantly and is not cached
+            return 0
+
+        rendered = 0
+        for phrase in phrases:
+            # Same cleanup as speak(), so the cache keys match what will be spoken
+            for unit, render in units(self._clean_text_for_speech(phrase)):
+                # Live speech always goes first
+                while self.is_speaking and should_continue():
+                    await asyncio.sleep(0.2)
+                if not should_continue():
+                    return rendered
+                try:
+                    if await render(unit.strip()):
+                        rendered += 1
+                except Exception as e:
+                    print(f"Pre-render failed for '{unit[:40]}': {e}")
+        return rendered
+
+    async def _prerender_edge(self, text: str) -> bool:
+        key = TTSCache.make_key("edge", self.edge_voice, text,
+                                self.edge_rate, self.edge_pitch, self.edge_volume)
+        if self.tts_cache.contains(key):
+            return False
+        return bool(await self._synthesize_edge_sentence(text))
+
+    async def _prerender_elevenlabs(self, text: str) -> bool:
+        url, headers, data, key = self._elevenlabs_request_parts(text)
+        if self.tts_cache.contains(key):
+            return False
+        audio = await self._run_blocking(self._make_elevenlabs_request, url, headers, data)
+        self.tts_cache.put(key, audio)
+        return True
+
+    def get_tts_stats(self) -> dict:
+        """Get per-backend time-to-first-audio and health figures."""
+        return self.tts_router.stats()
+
     def is_speaking_now(self) -> bool:
         """Check if the assistant is currently speaking."""
         return self.is_speaking
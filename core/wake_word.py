@@ -0,0 +1,283 @@
+import os
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """Triangular mel filters as a (n_mels, n_fft // 2 + 1) matrix."""
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(to_mel(60.0), to_mel(sample_rate / 2.0), n_mels + 2)
+    bins = np.floor((n_fft + 1) * to_hz(mel_points) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / float(center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / float(right - center)
+    return bank
+
+
+class MFCCExtractor:
+    """Mel-frequency cepstral coefficients with precomputed window, filters and DCT."""
+
+    def __init__(self, sample_rate: int, frame_ms: float = 25.0, hop_ms: float = 10.0,
+                 n_mels: int = 26, n_coeffs: int = 13):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.hop_samples = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.frame_samples - 1).bit_length()
+        self.window = np.hamming(self.frame_samples).astype(np.float32)
+        self.filters = _mel_filterbank(sample_rate, self.n_fft, n_mels)
+        # DCT-II basis; c0 (overall loudness) is dropped
+        k = np.arange(1, n_coeffs + 1)[:, None]
+        n = np.arange(n_mels)[None, :]
+        self.dct = np.cos(np.pi * k * (2 * n + 1) / (2.0 * n_mels)).astype(np.float32)
+
+    def hop_seconds(self) -> float:
+        return self.hop_samples / float(self.sample_rate)
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        """(frames, n_coeffs) features of int16 audio."""
+        x = samples.astype(np.float32) / 32768.0
+        if len(x) < self.frame_samples:
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        # Pre-emphasis lifts the high frequencies that separate consonants
+        x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+        count = 1 + (len(x) - self.frame_samples) // self.hop_samples
+        frames = np.lib.stride_tricks.as_strided(
+            x, shape=(count, self.frame_samples),
+            strides=(x.strides[0] * self.hop_samples, x.strides[0]))
+        power = np.abs(np.fft.rfft(frames * self.window, self.n_fft)) ** 2
+        log_mel = np.log(np.maximum(power @ self.filters.T, 1e-10))
+        return log_mel @ self.dct.T
+
+
+def subsequence_dtw(template: np.ndarray, query: np.ndarray) -> float:
+    """Mean per-frame distance of the best match of template anywhere inside query.
+
+    Each template frame consumes zero, one or two query frames, so the
+    recurrence only looks at the previous row and vectorizes over the query.
+    """
+    m, n = len(template), len(query)
+    if not m or not n:
+        return float("inf")
+    # Pairwise Euclidean distances, (m, n)
+    cost = np.sqrt(np.maximum(
+        (template ** 2).sum(axis=1)[:, None] + (query ** 2).sum(axis=1)[None, :] - 2.0 * template @ query.T,
+        0.0))
+    row = cost[0].copy()  # The match may start at any query frame
+    for i in range(1, m):
+        diag = np.full(n, np.inf)
+        diag[1:] = row[:-1]
+        skip = np.full(n, np.inf)
+        skip[2:] = row[:-2]
+        row = cost[i] + np.minimum(np.minimum(row, diag), skip)
+    return float(row.min() / m)
+
+
+class WakeWordDetector:
+    """Keyword spotting by template matching: MFCCs + subsequence DTW against enrolled examples.
+
+    Each wake phrase is a folder of short WAV recordings of it. Only the head
+    of an utterance (as long as the longest template plus some slack) is
+    scored, and only when the VAD has found speech, so the gate costs a few
+    milliseconds per utterance. The accept threshold comes from how far apart
+    the examples of a phrase are; sensitivity (0..1) widens it.
+    """
+
+    def __init__(self, sample_rate: int, phrases: List[str], template_dir: str = "wake_words",
+                 sensitivity: float = 0.5, default_threshold: float = 12.0):
+        self.sample_rate = sample_rate
+        self.phrases = [p.lower() for p in phrases]
+        self.template_dir = template_dir
+        self.sensitivity = sensitivity
+        self.default_threshold = default_threshold
+        self.features = MFCCExtractor(sample_rate)
+        self.templates: Dict[str, List[np.ndarray]] = {p: [] for p in self.phrases}
+        self.thresholds: Dict[str, float] = {}
+
+        self.accepts = 0
+        self.rejects = 0
+        self.false_accepts = 0
+        self.false_rejects = 0
+        self.audio_seconds = 0.0
+        self.compute_seconds = 0.0
+        self._near_miss_at = 0.0
+
+        self.load()
+
+    @property
+    def active(self) -> bool:
+        """The gate only applies once at least one phrase has templates."""
+        return any(self.templates.values())
+
+    @property
+    def window_samples(self) -> int:
+        """Utterance head needed for a decision: the longest template plus 50% slack."""
+        longest = max((len(t) for ts in self.templates.values() for t in ts), default=0)
+        return int(1.5 * longest * self.features.hop_samples) + self.features.frame_samples
+
+    def load(self) -> None:
+        """Read every phrase's WAV examples from the template directory."""
+        for phrase in self.phrases:
+            folder = os.path.join(self.template_dir, phrase)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.lower().endswith(".wav"):
+                    try:
+                        samples, rate = read_wav(os.path.join(folder, name))
+                        if rate != self.sample_rate:
+                            print(f"Skipping wake word example {name}: {rate} Hz, expected {self.sample_rate} Hz")
+                            continue
+                        self.add_template(phrase, samples)
+                    except Exception as e:
+                        print(f"Could not load wake word example {name}: {e}")
+        loaded = {p: len(t) for p, t in self.templates.items() if t}
+        if loaded:
+            print(f"Wake word templates loaded: {loaded}")
+        else:
+            print(f"No wake word examples in '{self.template_dir}' - wake word gate disabled")
+
+    def add_template(self, phrase: str, samples: np.ndarray) -> None:
+        """Enroll one example of a phrase and recalibrate its threshold."""
+        phrase = phrase.lower()
+        features = self.features(self._trim_silence(samples))
+        if len(features) < 10:
+            raise ValueError("Wake word example is too short")
+        self.templates.setdefault(phrase, []).append(features)
+        self.thresholds[phrase] = self._calibrate(self.templates[phrase])
+
+    def _trim_silence(self, samples: np.ndarray) -> np.ndarray:
+        """Cut the background before and after the phrase so templates hold only speech."""
+        hop = self.features.hop_samples
+        count = len(samples) // hop
+        if not count:
+            return samples
+        x = samples[:count * hop].astype(np.float32).reshape(count, hop)
+        energy_db = 10.0 * np.log10(np.maximum((x * x).mean(axis=1), 1e-3))
+        floor = np.percentile(energy_db, 10)
+        loud = np.flatnonzero(energy_db >= floor + 0.25 * (energy_db.max() - floor))
+        return samples[loud[0] * hop:(loud[-1] + 1) * hop]
+
+    def _calibrate(self, templates: List[np.ndarray]) -> float:
+        if len(templates) < 2:
+            return self.default_threshold * (0.75 + self.sensitivity / 2)
+        distances = [subsequence_dtw(a, b) for i, a in enumerate(templates)
+                     for j, b in enumerate(templates) if i != j]
+        # Same-phrase examples rarely match each other perfectly; new utterances
+        # get the same spread plus a sensitivity-dependent allowance
+        return float(np.max(distances)) * (1.0 + self.sensitivity)
+
+    def detect(self, samples: np.ndarray) -> Tuple[Optional[str], float]:
+        """Score an utterance head; returns (phrase or None, best distance / threshold)."""
+        start = time.perf_counter()
+        query = self.features(samples[:self.window_samples])
+        best_phrase, best_ratio = None, float("inf")
+        for phrase, templates in self.templates.items():
+            for template in templates:
+                ratio = subsequence_dtw(template, query) / self.thresholds[phrase]
+                if ratio < best_ratio:
+                    best_phrase, best_ratio = phrase, ratio
+        self.compute_seconds += time.perf_counter() - start
+        self.audio_seconds += min(len(samples), self.window_samples) / float(self.sample_rate)
+
+        now = time.monotonic()
+        if best_ratio <= 1.0:
+            self.accepts += 1
+            # A near miss shortly before an accept is most likely the user repeating themselves
+            if now - self._near_miss_at < 5.0:
+                self.false_rejects += 1
+                self._near_miss_at = 0.0
+            return best_phrase, best_ratio
+        self.rejects += 1
+        if best_ratio <= 1.25:
+            self._near_miss_at = now
+        return None, best_ratio
+
+    def record_false_accept(self) -> None:
+        """Called when gated audio turned out to contain no request."""
+        self.false_accepts += 1
+
+    def record_false_reject(self) -> None:
+        self.false_rejects += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "accepts": self.accepts,
+            "rejects": self.rejects,
+            "false_accepts": self.false_accepts,
+            "false_rejects": self.false_rejects,
+            # Share of one core spent per second of scored audio
+            "cpu_fraction": self.compute_seconds / self.audio_seconds if self.audio_seconds else 0.0
+        }
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Mono 16-bit WAV file -> (int16 samples, sample rate)."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Expected 16-bit PCM")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if wav.getnchannels() > 1:
+            samples = samples.reshape(-1, wav.getnchannels())[:, 0].copy()
+        return samples, wav.getframerate()
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int) -> None:
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+
+
+def enroll(phrase: str, count: int = 3) -> None:
+    """Record a few examples of a wake phrase from the microphone."""
+    from core.audio_capture import AudioCapture
+    from core.vad import VoiceActivityDetector
+    from utils.config import Config
+
+    capture = AudioCapture(sample_rate=Config.CAPTURE_SAMPLE_RATE)
+    if not capture.start():
+        return
+    vad = VoiceActivityDetector(capture.sample_rate, pre_roll_ms=100, hangover_ms=250)
+    folder = os.path.join(Config.WAKE_WORD_DIR, phrase.lower())
+    os.makedirs(folder, exist_ok=True)
+    reader = capture.reader()
+    saved = 0
+    print(f"Say '{phrase}' {count} times, pausing in between...")
+    try:
+        while saved < count:
+            samples = reader.read(capture.sample_rate // 10, multiple=vad.frame_samples, timeout=0.5)
+            if samples is None:
+                continue
+            position = reader.position - len(samples)
+            for event, utterance, _ in vad.feed(samples, position=position, end_time=reader.time()):
+                if event != "end":
+                    continue
+                audio = capture.ring.view(utterance.start_sample, utterance.end_sample - utterance.start_sample)
+                path = os.path.join(folder, f"example_{int(time.time() * 1000)}.wav")
+                write_wav(path, audio, capture.sample_rate)
+                saved += 1
+                print(f"Saved {path} ({saved}/{count})")
+    finally:
+        capture.stop()
+
+
+if __name__ == "__main__":
+    # python -m core.wake_word enroll jarvis [count]
+    if len(sys.argv) >= 3 and sys.argv[1] == "enroll":
+        enroll(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 3)
+    else:
+        print("Usage: python -m core.wake_word enroll <phrase> [count]")
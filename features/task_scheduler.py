@@ -1,5 +1,4 @@
-import threading
-import time
+import asyncio
 from typing import Dict, List, Callable, Optional
 from datetime import datetime, timedelta
 import json
@@ -8,6 +7,7 @@ from dataclasses import dataclass
 from enum import Enum
 import uuid
 import re
+from core.event_loop import shared_loop
 
 class TaskType(Enum):
     REMINDER = "reminder"
@@ -89,50 +89,55 @@ class TaskScheduler:
     def __init__(self):
         self.tasks: List[Task] = []
         self.running = False
-        self.thread = None
+        self.future = None
         self.check_interval = 10  # seconds
         self.task_file = "tasks.json"
         self.notification_callback = None
         self.load_tasks()
 
     def start(self) -> None:
-        """Start the task scheduler thread."""
-        if self.thread is not None and self.thread.is_alive():
+        """Start checking for due tasks on the shared event loop."""
+        if self.future is not None and not self.future.done():
             return  # Already running
             
         self.running = True
-        self.thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self.thread.start()
+        self.future = shared_loop().submit(self._scheduler_loop())
         print("Task scheduler started")
         
     def stop(self) -> None:
-        """Stop the task scheduler thread."""
+        """Stop the task scheduler."""
         self.running = False
-        if self.thread is not None:
-            self.thread.join(timeout=1.0)
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
         print("Task scheduler stopped")
         
-    def _scheduler_loop(self):
+    async def _scheduler_loop(self):
         """Main scheduler loop to check for due tasks."""
+        loop = asyncio.get_running_loop()
         while self.running:
-            now = datetime.now()
-            
-            for task in self.tasks:
-                if not task.completed and task.next_run_time <= now:
-                    self._trigger_task(task)
-                    
-                    # Handle recurrence
-                    if task.recurrence:
-                        task.completed = False
-                        task.update_next_run_time()
-                    else:
-                        task.completed = True
-                        
-            # Save tasks after processing
-            self.save_tasks()
-                    
+            # Callbacks and the task file write run on the I/O pool, not the loop
+            await loop.run_in_executor(None, self._check_due_tasks)
             # Sleep until next check
-            time.sleep(self.check_interval)
+            await asyncio.sleep(self.check_interval)
+
+    def _check_due_tasks(self):
+        """Trigger every task that is due and save the updated schedule."""
+        now = datetime.now()
+        
+        for task in self.tasks:
+            if not task.completed and task.next_run_time <= now:
+                self._trigger_task(task)
+                
+                # Handle recurrence
+                if task.recurrence:
+                    task.completed = False
+                    task.update_next_run_time()
+                else:
+                    task.completed = True
+                    
+        # Save tasks after processing
+        self.save_tasks()
             
     def _trigger_task(self, task: Task):
         """Trigger a task notification."""
@@ -92,7 +92,7 @@ class WebSearch:
                 'num': min(num_results, 10)  # API limits to 10 results max
             }
             
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -162,7 +162,7 @@ class WebSearch:
             if category:
                 params['category'] = category
                 
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -217,7 +217,7 @@ class WebSearch:
                 'units': 'metric'  # Use metric units
             }
             
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -260,7 +260,7 @@ class WebSearch:
                 'maxResults': max_results
             }
             
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -377,7 +377,7 @@ class WebSearch:
                 'target': target_language
             }
             
-            response = requests.post(url, params=params)
+            response = requests.post(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -406,7 +406,7 @@ class WebSearch:
                 'apikey': 'your_alphavantage_api_key'
             }
             
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=Config.WEB_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -5,6 +5,7 @@ import time
 import math
 import random
 from typing import Optional, Callable
+import numpy as np
 import os
 from PIL import Image, ImageTk, ImageDraw, ImageFilter
 
@@ -43,8 +44,12 @@ class IronManJarvisInterface(tk.Tk):
         self.energy_level = 0
         
         # Audio visualization variables
-        self.frequency_data = [random.randint(2, 10) for _ in range(32)]  # Simulated frequency data
-        self.spectrum_history = [[0] * 32 for _ in range(10)]  # Store last 10 frames of spectrum data
+        self.frequency_data = np.random.uniform(2, 10, 32)  # Band magnitudes on a 0-20 scale
+        self.spectrum_history = np.zeros((10, 32))  # Last 10 frames of spectrum data
+        # Live microphone spectrum (SpectrumAnalyzer), read into preallocated arrays each tick
+        self.spectrum_source = None
+        self._spectrum_levels = np.zeros(32, dtype=np.float32)
+        self._bar_bands = np.linspace(0, 31, 20).astype(int)
         self.voice_intensity = 0  # Overall voice intensity
         self.last_update = time.time()
         self.wave_offset = 0
@@ -518,7 +523,9 @@ class IronManJarvisInterface(tk.Tk):
         """Update voice activity visualization."""
         if self.is_listening:
             for i, bar in enumerate(self.bars):
-                if i % 2 == 0:
+                if self.spectrum_source is not None:
+                    height = 1 + 14 * self._spectrum_levels[self._bar_bands[i]]
+                elif i % 2 == 0:
                     height = random.randint(2, 15)
                 else:
                     height = random.randint(1, 10)
@@ -802,15 +809,24 @@ class IronManJarvisInterface(tk.Tk):
         else:
             self.destroy()
 
+    def set_spectrum_source(self, spectrum) -> None:
+        """Drive the visualizer from the microphone spectrum instead of simulated data."""
+        self.spectrum_source = spectrum
+        self._spectrum_levels = np.zeros(spectrum.bands, dtype=np.float32)
+        self.frequency_data = np.zeros(spectrum.bands)
+        self.spectrum_history = np.zeros((10, spectrum.bands))
+        self._bar_bands = np.linspace(0, spectrum.bands - 1, 20).astype(int)
+
     def update_frequency_data(self):
-        """Simulate and update frequency data based on voice activity."""
-        # In a real implementation, this would read from microphone data
-        # For now, we'll simulate frequencies based on listening/processing state
-        
-        if self.is_listening:
+        """Update frequency data from the microphone, or simulate it based on voice activity."""
+        if self.is_listening and self.spectrum_source is not None:
+            self.spectrum_source.read_into(self._spectrum_levels)
+            np.multiply(self._spectrum_levels, 20.0, out=self.frequency_data)
+            self.voice_intensity = float(self._spectrum_levels.mean()) * 100.0
+        elif self.is_listening:
             # Generate dynamic frequency data when listening
             # More variation in higher frequencies and stronger bass
-            for i in range(32):
+            for i in range(len(self.frequency_data)):
                 if i < 8:  # Bass frequencies (stronger when speaking)
                     self.frequency_data[i] = min(20, max(5, 
                         self.frequency_data[i] + random.uniform(-2, 3)))
@@ -826,7 +842,7 @@ class IronManJarvisInterface(tk.Tk):
             
         elif self.is_processing:
             # When processing, frequencies should be more stable but still active
-            for i in range(32):
+            for i in range(len(self.frequency_data)):
                 # Less variation during processing, more organized pattern
                 self.frequency_data[i] = min(18, max(3, 
                     self.frequency_data[i] + random.uniform(-1, 1.2)))
@@ -836,7 +852,7 @@ class IronManJarvisInterface(tk.Tk):
                 self.voice_intensity + random.uniform(-2, 3)))
         else:
             # In standby mode, minimal frequency activity
-            for i in range(32):
+            for i in range(len(self.frequency_data)):
                 # Tendency toward lower values when inactive
                 self.frequency_data[i] = max(1, 
                     self.frequency_data[i] * 0.95 + random.uniform(0, 0.8))
@@ -845,8 +861,8 @@ class IronManJarvisInterface(tk.Tk):
             self.voice_intensity = max(10, self.voice_intensity * 0.98)
         
         # Update the spectrum history (shift and add new data)
-        self.spectrum_history.pop(0)  # Remove oldest frame
-        self.spectrum_history.append(self.frequency_data.copy())  # Add current frame
+        self.spectrum_history[:-1] = self.spectrum_history[1:]
+        self.spectrum_history[-1] = self.frequency_data
         
         # Update wave offset for flowing animations
         self.wave_offset = (self.wave_offset + 0.05) % (2 * math.pi)
@@ -1,17 +1,20 @@
-import asyncio
 import os
 import sys
 from dotenv import load_dotenv
 from core.voice_engine import VoiceEngine
-from core.conversation_manager import ConversationManager
-from core.command_handler import CommandHandler
+from core.conversation_manager import ConversationManager, CHAT_REPLIES
+from core.command_handler import CommandHandler, COMMAND_REPLIES
+from core.speculation import SpeculativeDispatcher
+from core.request_pipeline import RequestPipeline, PRIORITY_TYPED, PRIORITY_VOICE
+from core.cancellation import OperationCancelled
+from core.tracing import Tracer, mark
+from core.event_loop import shared_loop
 from gui.main_window import ModernCircularInterface
 import threading
 import queue
 from utils.config import Config
 import tkinter as tk
 from tkinter import messagebox
-import time
 from datetime import datetime
 
 # Set premium voice - choose from jason, guy, tony, davis, ryan, aria, jenny, sara
@@ -31,9 +34,15 @@ class JarvisAssistant:
         # Check for ElevenLabs API key
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY", "")
         
+        # One asyncio loop thread runs all speech and blocking network I/O
+        self.event_loop = shared_loop()
+        
         # Initialize components
         print("Initializing voice engine...")
         self.voice_engine = VoiceEngine()
+        # Per-turn latency traces; summarize with: python -m core.tracing summary
+        self.tracer = Tracer(Config.TRACE_FILE) if Config.ENABLE_TRACING else None
+        self.voice_engine.tracer = self.tracer
         
         # Enable ElevenLabs if API key exists
         if self.elevenlabs_api_key:
@@ -47,11 +56,21 @@ class JarvisAssistant:
         self.conversation_manager = ConversationManager(Config.OPENAI_API_KEY)
         print("Initializing command handler...")
         self.command_handler = CommandHandler()
+        # Read-only commands start on interim transcripts before the user finishes
+        self.speculation = None
+        if Config.ENABLE_SPECULATIVE_COMMANDS:
+            self.speculation = SpeculativeDispatcher(self.command_handler,
+                                                     min_stability=Config.SPECULATION_MIN_STABILITY)
+        # Full command phrases end a voice turn at once; half-said ones ("search for") wait
+        self.voice_engine.turn_detector.set_command_patterns(self.command_handler.command_patterns)
         
         # Initialize GUI
         print("Creating GUI interface...")
         self.gui = ModernCircularInterface()
         self.gui.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Visualizer shows the real microphone spectrum
+        if self.voice_engine.audio_capture.spectrum is not None:
+            self.gui.set_spectrum_source(self.voice_engine.audio_capture.spectrum)
         
         # Set all callbacks including test input
         print("Setting up GUI callbacks...")
@@ -64,17 +83,9 @@ class JarvisAssistant:
         # Message queue for thread-safe communication
         self.message_queue = queue.Queue()
         
-        # Processing lock to prevent overlapping requests
-        self.processing_lock = threading.Lock()
-        
-        # Flag for when new input arrives during speech
-        self.new_input_during_speech = False
-        
-        # Input buffer for combining multiple quick inputs
-        self.input_buffer = ""
-        self.last_input_time = 0
-        self.input_timeout = 2.0  # Seconds to wait for additional input before processing
-        self.buffer_timer = None  # Timer for processing buffered input
+        # Requests run one at a time on a worker; input arriving meanwhile waits or is merged
+        self.pipeline = RequestPipeline(self._process_request, workers=Config.REQUEST_WORKERS,
+                                        max_pending=Config.REQUEST_QUEUE_SIZE)
         
         # Show time-based greeting startup message
         greeting = self._get_time_based_greeting()
@@ -88,7 +99,12 @@ class JarvisAssistant:
         self.start_listening()
         
         # Speak the greeting
-        threading.Thread(target=self._speak_response, args=(greeting_message,), daemon=True).start()
+        self.event_loop.submit(self._speak_async(greeting_message))
+
+        # Warm the TTS cache with the fixed phrases once the GUI is up
+        if Config.ENABLE_TTS_PRERENDER:
+            phrases = [greeting_message] + COMMAND_REPLIES + CHAT_REPLIES + list(Config.PRERENDER_PHRASES)
+            self.gui.after(Config.PRERENDER_DELAY_MS, self._start_prerender, phrases)
         
         # Start the main application loop
         self.start_assistant()
@@ -104,7 +120,8 @@ class JarvisAssistant:
         """Start listening for voice input."""
         self.gui.set_listening_state(True)
         self.gui.update_status("Listening for your voice...")
-        threading.Thread(target=self.voice_engine.listen, args=(self.handle_voice_input,), daemon=True).start()
+        threading.Thread(target=self.voice_engine.listen,
+                         args=(self.handle_voice_input, self.handle_partial_transcript), daemon=True).start()
 
     def stop_listening(self):
         """Stop listening for voice input."""
@@ -117,67 +134,51 @@ class JarvisAssistant:
         if not text.strip():
             return
         
-        # If currently speaking, stop it
-        if self.voice_engine.is_speaking:
-            self.voice_engine.stop_speaking()
-            self.new_input_during_speech = True
-        
-        # Process in a separate thread to keep UI responsive
-        threading.Thread(target=self.process_input, args=(text,), daemon=True).start()
+        self._interrupt_response()
+        self.process_input(text)
     
-    def handle_voice_input(self, text: str):
-        """Handle voice input by calling the process_input method."""
+    def handle_partial_transcript(self, hypothesis):
+        """Show what is being heard and let the dispatcher start read-only commands early."""
+        self.gui.update_status(f"Hearing: {hypothesis.text}")
+        if self.speculation:
+            self.speculation.on_partial(hypothesis)
+
+    def handle_voice_input(self, text: str, trace=None):
+        """Handle a finished voice turn (the voice engine's turn detector decides when it ends)."""
         if not text.strip():
             return
-        
-        # If speaking, set flag to indicate interruption
+        self._interrupt_response()
+        self.process_input(text, source="voice", trace=trace)
+    
+    def _interrupt_response(self):
+        """New input while Jarvis is talking cancels the request being answered."""
         if self.voice_engine.is_speaking:
-            self.new_input_during_speech = True
+            self.pipeline.cancel_running("interrupted")
             self.voice_engine.stop_speaking()
-            
-        current_time = time.time()
-        
-        # Cancel any existing buffer timer
-        if self.buffer_timer:
-            self.gui.after_cancel(self.buffer_timer)
-            self.buffer_timer = None
-            
-        # Check if this might be a continuation of previous input
-        if current_time - self.last_input_time < self.input_timeout:
-            # Add to buffer with a space
-            self.input_buffer += " " + text
-            self.last_input_time = current_time
-            
-            # Only process if the text seems complete (ends with punctuation)
-            if text.rstrip().endswith(('.', '!', '?')):
-                buffered_text = self.input_buffer.strip()
-                self.input_buffer = ""  # Clear buffer
-                # Process in a separate thread
-                threading.Thread(target=self.process_input, args=(buffered_text,), daemon=True).start()
-            else:
-                # Set a timer to process after timeout
-                self.buffer_timer = self.gui.after(int(self.input_timeout * 1000), self._process_buffered_input)
+
+    def process_input(self, text: str, source: str = "typed", trace=None):
+        """Queue input text for a response; returns immediately."""
+        if trace is None and self.tracer is not None:
+            trace = self.tracer.start(source)
+        mark(trace, "submitted")
+        if source == "voice":
+            self.pipeline.submit(text, source, priority=PRIORITY_VOICE, policy=Config.REQUEST_POLICY_VOICE,
+                                 trace=trace)
         else:
-            # This is new input, start fresh
-            self.input_buffer = text
-            self.last_input_time = current_time
-            
-            # If it seems like a complete sentence, process immediately
-            if len(text.split()) > 5 or text.rstrip().endswith(('.', '!', '?')):
-                self.input_buffer = ""  # Clear buffer
-                # Process in a separate thread
-                threading.Thread(target=self.process_input, args=(text,), daemon=True).start()
-            else:
-                # Set a timer to process after timeout
-                self.buffer_timer = self.gui.after(int(self.input_timeout * 1000), self._process_buffered_input)
-    
-    def process_input(self, text: str):
-        """Process input text and generate a response."""
-        # Use a lock to prevent multiple requests from processing simultaneously
-        if not self.processing_lock.acquire(blocking=False):
-            print("Already processing a request, ignoring new input")
-            return
-        
+            self.pipeline.submit(text, source, priority=PRIORITY_TYPED, policy=Config.REQUEST_POLICY_TYPED,
+                                 trace=trace)
+
+    def _process_request(self, request):
+        """Generate and speak the response to one request (runs on a pipeline worker).
+
+        Every stage watches request.token; cancelling it (new input, a superseding
+        request) abandons the lookup, LLM call or speech in progress.
+        """
+        text = request.text
+        token = request.token
+        trace = request.trace
+        mark(trace, "started", queued=request.id)
+        status = "error"
         try:
             # Update GUI with user input
             self.gui.add_conversation_text("You", text)
@@ -188,46 +189,55 @@ class JarvisAssistant:
             
             # Check if this is a direct command first
             command_response = None
-            if any(cmd in text.lower() for cmd in ["weather", "time", "date", "news", "wiki", "play", "search", "find"]):
-                command_response = self.command_handler.process_command(text)
+            if self.speculation:
+                # Already running (or finished) if an interim transcript matched the same command
+                command_response = self.speculation.commit(text, token)
+                if command_response:
+                    mark(trace, "routed", route="speculation")
+            if not command_response and any(cmd in text.lower() for cmd in ["weather", "time", "date", "news", "wiki", "play", "search", "find"]):
+                mark(trace, "routed", route="command")
+                command_response = self.command_handler.process_command(text, token, trace)
             
             # If it's not a direct command or command processing failed, use AI
             if not command_response:
                 # Get AI response
+                mark(trace, "routed", route="llm")
                 self.gui.update_status("Getting response...")
-                ai_response = self.conversation_manager.get_response(text)
+                ai_response = self.conversation_manager.get_response(text, token, trace)
                 final_response = ai_response
             else:
                 final_response = command_response
+            mark(trace, "response_ready", words=len(final_response.split()))
             
+            token.check()
             # Update GUI with AI response
             self.gui.add_conversation_text("Jarvis", final_response)
             
-            # Speak the response unless we're interrupted
-            if not self.new_input_during_speech:
-                self.gui.update_status("Speaking...")
-                threading.Thread(
-                    target=self._speak_response, 
-                    args=(final_response,), 
-                    daemon=True
-                ).start()
-            else:
-                # Reset the interruption flag
-                self.new_input_during_speech = False
-                self.gui.update_status("Ready")
+            # Speak on this worker so the request stays cancellable until it has been heard
+            self.gui.update_status("Speaking...")
+            self._speak_response(final_response, token, trace)
+            status = "cancelled" if token.cancelled else "ok"
             
+        except OperationCancelled:
+            status = "cancelled"
+            self.gui.update_status("Ready")
+            raise
         except Exception as e:
             print(f"Error handling input: {e}")
             self.gui.update_status("Error processing input")
             self.gui.add_conversation_text("Jarvis", f"I'm sorry, I encountered an error: {str(e)}")
         finally:
-            # Release the lock
-            self.processing_lock.release()
+            if trace is not None:
+                trace.finish(status)
     
-    def _speak_response(self, text):
-        """Speak the response in a separate thread."""
+    def _speak_response(self, text, token=None, trace=None):
+        """Speak the response (blocks until done, stopped or token cancelled)."""
+        self.event_loop.run(self._speak_async(text, token, trace))
+
+    async def _speak_async(self, text, token=None, trace=None):
+        """Speak on the shared event loop and report the outcome in the status bar."""
         try:
-            asyncio.run(self.voice_engine.speak(text))
+            await self.voice_engine.speak(text, token, trace)
             # Update status when done speaking
             if self.running:  # Only update if the app is still running
                 self.gui.update_status("Ready")
@@ -236,6 +246,17 @@ class JarvisAssistant:
             if self.running:
                 self.gui.update_status("Error with voice output")
             
+    def _start_prerender(self, phrases):
+        """Render canned phrases into the TTS cache in the background."""
+        def done(future):
+            try:
+                print(f"Pre-rendered {future.result()} phrases into the TTS cache")
+            except Exception as e:
+                print(f"Error pre-rendering phrases: {e}")
+
+        future = self.event_loop.submit(self.voice_engine.prerender(phrases, should_continue=lambda: self.running))
+        future.add_done_callback(done)
+
     def on_closing(self):
         """Handle window closing."""
         print("Shutting down Jarvis...")
@@ -244,6 +265,12 @@ class JarvisAssistant:
         if self.voice_engine.is_speaking:
             self.voice_engine.stop_speaking()
         self.stop_listening()
+        if self.speculation:
+            self.speculation.shutdown()
+        print(f"Request pipeline: {self.pipeline.stats()}")
+        self.pipeline.shutdown()
+        self.command_handler.task_scheduler.stop()
+        self.event_loop.stop()
         self.gui.destroy()
 
     def start_assistant(self):
@@ -255,16 +282,6 @@ class JarvisAssistant:
             print(f"Critical error in main loop: {e}")
             sys.exit(1)
 
-    def _process_buffered_input(self):
-        """Process buffered input after timeout."""
-        if self.input_buffer:
-            buffered_text = self.input_buffer.strip()
-            if buffered_text:
-                print(f"Processing buffered input after timeout: '{buffered_text}'")
-                self.input_buffer = ""  # Clear buffer
-                self.process_input(buffered_text)
-            self.buffer_timer = None
-
     def _get_time_based_greeting(self):
         """Return a greeting based on time of day."""
         hour = datetime.now().hour
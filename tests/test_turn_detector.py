@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from core.turn_detector import TurnDetector
+
+# A slice of CommandHandler's default pattern table
+COMMAND_PATTERNS = {
+    "time": [r"what time is it", r"current time"],
+    "search": [r"search for (.+)", r"who is (.+)", r"tell me about (.+)"],
+    "youtube": [r"play (.+) on youtube", r"play songs by (.+)"],
+    "task": [r"remind me to (.+)", r"set alarm for (.+)"],
+}
+
+
+@pytest.fixture
+def detector():
+    turns = []
+    detector = TurnDetector(lambda text, trace: turns.append(text))
+    detector.set_command_patterns(COMMAND_PATTERNS)
+    detector.turns_committed = turns
+    return detector
+
+
+@pytest.mark.parametrize("text", [
+    "search for the",
+    "search for a",
+    "play songs by",
+    "tell me about the",
+    "who is the",
+    "remind me to",
+    "set alarm for",
+    "search for",
+    "what is the weather like in",
+])
+def test_unfinished_phrases_wait(detector, text):
+    assert detector.completeness(text) <= 0.15
+    assert detector.wait_for(detector.completeness(text)) > 0
+
+
+@pytest.mark.parametrize("text", [
+    "who is the best",
+    "search for the new",
+    "play songs by queen",
+])
+def test_free_form_arguments_are_not_committed_at_once(detector, text):
+    # The argument may go on ("who is the best player in ..."), so a short wait applies
+    assert 0.15 < detector.completeness(text) < detector.confident
+    assert detector.wait_for(detector.completeness(text)) > 0
+
+
+@pytest.mark.parametrize("text", ["what time is it", "current time", "who is the best?"])
+def test_complete_requests_commit_at_once(detector, text):
+    assert detector.wait_for(detector.completeness(text)) == 0.0
+
+
+def test_fixed_command_commits_on_recognition(detector):
+    detector.speech_started(10.0)
+    detector.speech_ended(11.0)
+    detector.add_fragment("what time is it", 11.0)
+    assert detector.turns_committed == ["what time is it"]
+
+
+def test_continued_speech_is_merged_into_one_turn(detector):
+    now = time.monotonic()
+    detector.speech_started(now - 1.0)
+    detector.speech_ended(now)
+    detector.add_fragment("play songs by", now)
+    assert detector.turns_committed == []
+    # The user goes on before the wait is over; the turn is held until it is recognized
+    detector.speech_started(now + 0.2)
+    assert detector.poll() is None
+    detector.speech_ended(now + 0.8)
+    detector.add_fragment("queen on youtube", now + 0.8)
+    detector.flush()
+    assert detector.turns_committed == ["play songs by queen on youtube"]
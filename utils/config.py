@@ -16,6 +16,68 @@ class Config:
     VOICE = "en-US-ChristopherNeural"
     SILENCE_THRESHOLD = 0.5
     MAX_HISTORY_LENGTH = 10
+    TTS_LOOKAHEAD = 2  # Sentences synthesized ahead of the one being played
+    EDGE_TTS_BATCHED = True  # One Edge TTS session per response, streamed to the player
+    TTS_HEDGE_BUDGET = 1.5  # Seconds of silence before the offline voice starts in parallel
+    TTS_TTFA_TARGET = 2.0  # Backends with a slower median time-to-first-audio lose priority
+    ELEVENLABS_TTFA_DEADLINE = 6.0  # Seconds each backend gets to produce its first audio
+    EDGE_TTFA_DEADLINE = 5.0
+    OFFLINE_TTFA_DEADLINE = 3.0
+    AUDIO_OUTPUT_SAMPLE_RATE = 24000  # Native rate of Edge TTS voices
+    AUDIO_OUTPUT_BLOCK_MS = 20  # Output device period, bounds stop latency
+    ENABLE_TTS_CACHE = True  # Reuse rendered audio for repeated phrases
+    TTS_CACHE_DIR = "tts_cache"
+    TTS_CACHE_MAX_MB = 100
+    PRONUNCIATION_DICT = "pronunciations.json"  # Optional {"term": "spoken form"} overrides
+    SPEECH_RECOGNIZER = "google"  # "google" (cloud), "whisper" (local, CPU) or "stub" (testing)
+    WHISPER_MODEL = "base.en"  # tiny.en / base.en / small.en - bigger is slower but more accurate
+    WHISPER_THREADS = 4  # CPU threads used for decoding
+    WHISPER_STEP_SECONDS = 1.0  # Re-decode the utterance after this much new audio
+    WHISPER_PARTIAL_WINDOW_SECONDS = 8.0  # Interim decodes only look at this much trailing audio
+    RECOGNITION_WORKERS = 3  # Utterances transcribed concurrently; results still arrive in order
+    ENABLE_SPECULATIVE_COMMANDS = True  # Start read-only commands on interim transcripts
+    SPECULATION_MIN_STABILITY = 0.5  # Share of the interim words that must have stopped changing
+    REQUEST_WORKERS = 1  # Requests answered at once; more than one interleaves the conversation history
+    REQUEST_QUEUE_SIZE = 8  # Waiting requests; further input is merged into the newest one
+    REQUEST_POLICY_VOICE = "coalesce"  # queue / coalesce / supersede - for input arriving while one waits
+    REQUEST_POLICY_TYPED = "queue"
+    IO_WORKERS = 8  # Threads of the shared event loop for blocking HTTP, LLM and mail calls
+    WEB_REQUEST_TIMEOUT = 10.0  # Seconds before a search/weather/news call gives up (abandoned calls end too)
+    LLM_REQUEST_TIMEOUT = 20.0  # Seconds before an OpenAI chat call gives up
+    ENABLE_TRACING = True  # Append per-turn stage timings to TRACE_FILE
+    TRACE_FILE = "traces.jsonl"  # Summarize with: python -m core.tracing summary
+    TURN_MIN_WAIT = 0.3  # Shortest silence before an uncertain voice turn is committed (seconds)
+    TURN_MAX_WAIT = 2.5  # Longest silence to wait for the rest of an incomplete sentence (seconds)
+    TURN_PRIOR_PAUSE = 0.8  # Assumed within-turn pause until enough of the user's own are measured
+    TURN_PROFILE_FILE = "turn_profile.json"  # Learned pause lengths, kept between sessions
+    CAPTURE_SAMPLE_RATE = 16000  # Microphone rate; Whisper and Google both work at 16 kHz
+    CAPTURE_BLOCK_MS = 20  # Input device period
+    CAPTURE_BUFFER_SECONDS = 30.0  # Ring buffer length, must cover the longest utterance
+    SPECTRUM_BANDS = 32  # Log-spaced bands shown by the GUI visualizer (0 disables)
+    SPECTRUM_RATE_HZ = 20.0  # Visualizer spectrum updates per second
+    VAD_FRAME_MS = 20  # Analysis frame for voice activity detection
+    VAD_MARGIN_DB = 10.0  # Frames this far above the noise floor count as speech
+    VAD_MAX_ZCR = 0.35  # Quieter frames crossing zero more often than this are treated as noise
+    VAD_MIN_SPEECH_MS = 60  # Speech needed before an utterance starts
+    VAD_HANGOVER_MS = 300  # Silence that ends an utterance - the main latency knob
+    NOISE_FLOOR_WINDOW_SECONDS = 5.0  # Sliding window the background level is estimated over
+    NOISE_FLOOR_PERCENTILE = 10.0  # Quiet fraction of that window taken as the noise floor
+    VAD_PRE_ROLL_MS = 300  # Audio from before the onset included in every utterance
+    MAX_UTTERANCE_SECONDS = 30.0  # Longer speech is split into several utterances
+    ECHO_CANCELLATION = True  # Remove the assistant's own voice from the microphone signal
+    ECHO_FILTER_MS = 200  # Longest speaker-to-microphone echo path the filter can learn
+    BARGE_IN_MS = 300  # Speech needed over the assistant's voice before it stops talking
+    BARGE_IN_MIN_ERLE_DB = 6.0  # Echo removed before speech over the assistant counts as the user
+
+    # Wake word gate (enroll examples with: python -m core.wake_word enroll jarvis)
+    WAKE_WORD_ENABLED = True  # Only used once examples exist in WAKE_WORD_DIR
+    WAKE_WORDS = ["jarvis"]  # One folder of WAV examples per phrase
+    WAKE_WORD_DIR = "wake_words"
+    WAKE_WORD_SENSITIVITY = 0.5  # 0..1 - higher accepts more (fewer misses, more false triggers)
+    WAKE_WORD_FOLLOWUP_SECONDS = 8.0  # Follow-up questions need no wake word within this window
+    ENABLE_TTS_PRERENDER = True  # Render fixed replies into the TTS cache at startup
+    PRERENDER_DELAY_MS = 3000  # Let the GUI and greeting settle before warming the cache
+    PRERENDER_PHRASES = []  # Extra phrases to warm; command and chat replies come from their modules
     
     # API Settings
     USE_GEMINI_FOR_CHAT = True  # Use Gemini instead of OpenAI when available